@@ -1,12 +1,18 @@
-import re
+import time
+import hashlib
+import argparse
 import torch
 from pathlib import Path
 from typing import List, Optional
-from tqdm import tqdm
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.docstore.document import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from index_manifest import get_collection_entry, hnsw_metadata, mark_tiers_stale, update_collection_entry
+from embedding_pipeline import run_pipeline
+from embedding_profile import record_profile, resolve_profile
+from doc_loader import iter_chunks, iter_files, iter_record_chunks, iter_records
+from corpus_dataset import CORPUS_DIR, iter_pages
 
 
 class GoogleAPIDocumentProcessor:
@@ -20,13 +26,17 @@ class GoogleAPIDocumentProcessor:
         db_dir: str = "./chroma_text_api",
         collection_name: str = "google_api_docs",
         embedding_model_name: str = "BAAI/bge-m3",
+        corpus_dir: Optional[str] = None,
     ):
         self.api_data_dir = Path(api_data_dir)
+        # corpus_dataset.py로 만든 데이터셋 폴더 (지정하면 txt 파일 대신 memory-map 데이터셋에서 읽음)
+        self.corpus_dir = Path(corpus_dir) if corpus_dir else None
         self.db_dir = Path(db_dir)
         self.collection_name = collection_name
         self.embedding_model_name = embedding_model_name
 
         self.documents: List[Document] = []
+        self.ids: List[str] = []
         self.vectorstore: Optional[Chroma] = None
         self.embedding_model: Optional[HuggingFaceEmbeddings] = None
 
@@ -34,26 +44,6 @@ class GoogleAPIDocumentProcessor:
     # 유틸 메서드
     # ============================================================
 
-    @staticmethod
-    def _extract_source_url(content: str) -> str:
-        """문서에서 Source URL 추출"""
-        pattern = r"(?i)Source\s*URL\s*:\s*(https?://\S+)"
-        match = re.search(pattern, content)
-        if match:
-            return match.group(1).strip()
-        else:
-            return ""
-
-    @staticmethod
-    def _get_api_tag_from_path(path: Path) -> str:
-        """파일 경로에서 API 태그 추출"""
-        folder = path.parent.name
-        return (
-            folder.replace("_docs_crawled", "")
-            if folder.endswith("_docs_crawled")
-            else folder
-        )
-
     @staticmethod
     def _get_device() -> str:
         """가장 적합한 디바이스 선택"""
@@ -65,42 +55,46 @@ class GoogleAPIDocumentProcessor:
     # 문서 로드 및 처리
     # ============================================================
 
-    def load_api_documents(self) -> List[Document]:
-        """데이터 디렉토리에서 txt 문서를 읽고 청크 단위 Document 리스트 생성"""
+    @staticmethod
+    def _file_hash(file_path: Path) -> str:
+        return hashlib.sha1(file_path.read_bytes()).hexdigest()
+
+    def _file_paths(self) -> List[Path]:
+        return sorted(self.api_data_dir.rglob("*.txt"))
+
+    def _source_exists(self) -> bool:
+        if self.corpus_dir:
+            if not self.corpus_dir.exists():
+                print(f"코퍼스 데이터셋이 존재하지 않습니다: {self.corpus_dir} (corpus_dataset.py pages 먼저 실행)")
+                return False
+            return True
         if not self.api_data_dir.exists():
             print(f"데이터 디렉토리가 존재하지 않습니다: {self.api_data_dir}")
+            return False
+        return True
+
+    def _iter_source_chunks(self, workers: Optional[int] = None):
+        """txt 파일 또는 코퍼스 데이터셋 → (청크 id, 텍스트, 메타데이터) 스트림"""
+        if self.corpus_dir:
+            return iter_record_chunks(iter_pages(self.corpus_dir), workers)
+        return iter_chunks(self._file_paths(), workers)
+
+    def load_api_documents(self, workers: Optional[int] = None) -> List[Document]:
+        """
+        데이터 디렉토리에서 txt 문서를 읽고 청크 단위 Document 리스트 생성
+        - 파일 읽기/분할은 프로세스 풀에서 병렬 처리 (doc_loader.py)
+        - 벡터 DB 구축만 할 때는 이 메서드 없이 initialize_vectorstore()가 파일을 바로 스트리밍
+        """
+        if not self._source_exists():
             return []
 
-        print(f"API 문서 로드 중: {self.api_data_dir}")
-        file_paths = list(self.api_data_dir.rglob("*.txt"))
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1200, chunk_overlap=150, separators=["\n\n", "\n", ". ", " ", ""]
-        )
-
-        documents = []
-        for file_path in file_paths:
-            try:
-                content = file_path.read_text(encoding="utf-8")
-                source_url = self._extract_source_url(content)
-                tag = self._get_api_tag_from_path(file_path)
-
-                chunks = text_splitter.split_text(content)
-                for i, chunk in enumerate(chunks):
-                    documents.append(
-                        Document(
-                            page_content=chunk,
-                            metadata={
-                                "chunk_id": i,
-                                "source": source_url,
-                                "tags": tag,
-                                "source_file": file_path.name,
-                                "last_verified": "2025-08-19",
-                            },
-                        )
-                    )
-            except Exception as e:
-                print(f"⚠️ {file_path} 로드 중 오류 발생: {e}")
+        print(f"API 문서 로드 중: {self.corpus_dir or self.api_data_dir}")
+        ids, documents = [], []
+        for _id, text, metadata in self._iter_source_chunks(workers):
+            ids.append(_id)
+            documents.append(Document(page_content=text, metadata=metadata))
 
+        self.ids = ids
         self.documents = documents
         print(f"✅ 총 {len(documents)}개의 문서 청크 로드 완료")
         return documents
@@ -122,39 +116,196 @@ class GoogleAPIDocumentProcessor:
                 encode_kwargs={"normalize_embeddings": True},
             )
 
-    def initialize_vectorstore(self, batch_size: int = 100):
-        """문서를 벡터화하여 DB 생성"""
-        if not self.documents:
-            print("문서가 없습니다. 먼저 `load_api_documents()`를 실행하세요.")
-            return
-
-        self._init_embedding_model()
-
-        # 첫 배치로 DB 생성
-        first_batch, remaining_docs = (
-            self.documents[:batch_size],
-            self.documents[batch_size:],
-        )
-        self.vectorstore = Chroma.from_documents(
-            documents=first_batch,
-            embedding=self.embedding_model,
+    def _open_vectorstore(self) -> Chroma:
+        """컬렉션 열기 (없으면 생성, hnsw_sweep.py로 선택한 설정이 매니페스트에 있으면 적용)"""
+        return Chroma(
             persist_directory=str(self.db_dir),
             collection_name=self.collection_name,
+            collection_metadata=hnsw_metadata(self.db_dir, self.collection_name) or None,
         )
 
-        # 나머지 배치 추가
-        for batch in tqdm(
-            [
-                remaining_docs[i : i + batch_size]
-                for i in range(0, len(remaining_docs), batch_size)
-            ],
-            desc="임베딩 및 저장",
-        ):
-            self.vectorstore.add_documents(batch)
+    def _embed_and_add(self, items, workers: Optional[int] = None):
+        """
+        임베딩 파이프라인으로 인코딩하면서 바로 Chroma에 추가
+        - items: (id, 텍스트, 메타데이터) 목록 또는 제너레이터
+        - 길이순 배치 + 프로세스 풀 인코딩 + 쓰기 스레드 (embedding_pipeline.py)
+        - 컬렉션에 기록된 임베딩 프로필(모델, passage 접두어, 정규화)로 인코딩해 기존 벡터와 방식을 맞춤
+        """
+        collection = self.vectorstore._collection
+        profile = resolve_profile(self.db_dir, self.collection_name)
+        dims = []
+
+        def write(batch_items, embeddings):
+            collection.add(
+                ids=[_id for _id, _, _ in batch_items],
+                embeddings=embeddings.tolist(),
+                documents=[text for _, text, _ in batch_items],
+                metadatas=[meta for _, _, meta in batch_items],
+            )
+            dims.append(embeddings.shape[1])
+
+        stats = run_pipeline(
+            items,
+            write,
+            model_name=profile["model"],
+            device=self._get_device(),
+            workers=workers,
+            normalize=profile["normalize"],
+            prefix=profile["passage_prefix"],
+        )
+        record_profile(self.db_dir, self.collection_name, profile, dims[0] if dims else None)
+        return stats
+
+    def initialize_vectorstore(self, workers: Optional[int] = None):
+        """
+        문서를 벡터화하여 DB 생성
+        - load_api_documents()로 미리 로드한 문서가 있으면 그대로 사용 (DB에 이미 있는 청크 id는 건너뜀)
+        - 없으면 파일을 읽는 즉시 청크를 임베딩 파이프라인으로 흘려보냄 (전체 로드 대기 없음)
+        - 컬렉션에 이미 청크가 있으면 sync_vectorstore()로 변경분만 반영
+          (같은 id 재추가는 Chroma가 무시하므로 전체 재임베딩은 낭비, 사라진 청크 삭제 / 파일 매니페스트 기록도 필요)
+        """
+        if not self.documents and not self._source_exists():
+            return
+
+        self.vectorstore = self._open_vectorstore()
+        collection = self.vectorstore._collection
+        if collection.count() > 0 and not self.documents:
+            print(f"기존 컬렉션에 청크 {collection.count()}개 → 변경분만 반영 (--sync)")
+            self.sync_vectorstore(workers)
+            return
+
+        if self.documents:
+            existing = set(collection.get(include=[])["ids"])
+            items = [
+                (_id, doc.page_content, doc.metadata)
+                for _id, doc in zip(self.ids, self.documents)
+                if _id not in existing
+            ]
+        else:
+            items = self._iter_source_chunks(workers)
+
+        stats = self._embed_and_add(items, workers)
+        if stats["chunks"]:
+            mark_tiers_stale(self.db_dir, self.collection_name)
 
         print(f"벡터 저장소 생성 완료: {self.db_dir}")
         print(f"저장된 문서 수: {self.vectorstore._collection.count()}")
 
+    # ============================================================
+    # 증분 동기화
+    # ============================================================
+
+    def _iter_file_hashes(self):
+        """
+        (분할 작업 키, 상대 경로, 파일 hash) 순회 (읽기 실패 시 hash None)
+        - 코퍼스 데이터셋이면 path / content_sha1 컬럼만 읽음 (본문과 헤더는 읽지 않음)
+        """
+        if self.corpus_dir:
+            for row in iter_pages(self.corpus_dir, columns=["path", "content_sha1"]):
+                yield row["path"], row["path"], row["content_sha1"]
+            return
+
+        for file_path in self._file_paths():
+            rel = file_path.relative_to(self.api_data_dir).as_posix()
+            try:
+                yield file_path, rel, self._file_hash(file_path)
+            except Exception as e:
+                print(f"⚠️ {file_path} 로드 중 오류 발생: {e}")
+                yield file_path, rel, None
+
+    def _split_changed(self, changed_paths: dict, workers: Optional[int] = None):
+        """{분할 작업 키: (상대 경로, hash)} → (상대 경로, hash, 청크 목록) (분할 실패한 파일은 빠짐)"""
+        if self.corpus_dir:
+            split_results = iter_records(iter_pages(self.corpus_dir, paths=changed_paths), workers)
+        else:
+            split_results = iter_files(changed_paths, workers)
+        for key, chunks in split_results:
+            rel, file_hash = changed_paths[key]
+            yield rel, file_hash, chunks
+
+    def sync_vectorstore(self, workers: Optional[int] = None, delete_batch: int = 1000):
+        """
+        현재 txt 파일(또는 코퍼스 데이터셋)과 매니페스트의 파일 상태를 비교해 바뀐 부분만 반영
+        - 파일 hash가 같으면 분할도 생략하고 기존 청크 id 유지
+        - 새/변경 파일만 분할 → DB에 없는 청크 id만 임베딩
+        - 더 이상 나오지 않는 청크 id(변경 전 청크, 삭제된 파일)는 DB에서 삭제
+        - near_dedup.py로 병합된 중복 청크는 대표 청크가 없어졌을 때만 다시 임베딩
+        - 청크가 추가 / 삭제되면 PCA / sparse / ColBERT 인덱스는 stale 표시 (run_all.sh에서 다시 빌드)
+        """
+        if not self._source_exists():
+            return
+
+        t0 = time.perf_counter()
+        prev_files = get_collection_entry(self.db_dir, self.collection_name).get("files", {})
+        files, new_chunks = {}, {}
+        changed_paths = {}
+        for key, rel, file_hash in self._iter_file_hashes():
+            if file_hash is None:
+                # 읽기 실패한 파일은 이전 상태 유지 (청크가 삭제되지 않도록)
+                if rel in prev_files:
+                    files[rel] = prev_files[rel]
+                continue
+            if prev_files.get(rel, {}).get("sha1") == file_hash:
+                files[rel] = prev_files[rel]
+            else:
+                changed_paths[key] = (rel, file_hash)
+
+        # 새/변경 파일만 프로세스 풀에서 분할 (분할 실패한 파일은 이전 상태 유지)
+        for rel, file_hash, chunks in self._split_changed(changed_paths, workers):
+            files[rel] = {"sha1": file_hash, "ids": [_id for _id, _, _ in chunks]}
+            new_chunks.update((_id, (_id, text, meta)) for _id, text, meta in chunks)
+        for rel, _ in changed_paths.values():
+            if rel not in files and rel in prev_files:
+                files[rel] = prev_files[rel]
+        changed = len(changed_paths)
+        removed_files = len(set(prev_files) - set(files))
+
+        self.vectorstore = self._open_vectorstore()
+        collection = self.vectorstore._collection
+
+        # DB 실제 id와 비교 (매니페스트 밖의 랜덤 id 청크도 함께 정리됨)
+        existing = set(collection.get(include=[])["ids"])
+        desired = {_id for entry in files.values() for _id in entry["ids"]}
+        to_delete = sorted(existing - desired)
+        kept = existing & desired
+
+        # near_dedup.py로 병합된 청크는 대표 청크가 남아 있으면 다시 임베딩하지 않음
+        collapsed = (
+            get_collection_entry(self.db_dir, self.collection_name).get("near_dup") or {}
+        ).get("collapsed", {})
+
+        def is_missing(_id):
+            return _id not in kept and collapsed.get(_id) not in kept
+
+        # 변경 없는 파일인데 청크가 빠져 있으면(대표 청크가 변경/삭제됨) 그 파일도 다시 분할
+        changed_rels = {rel for rel, _ in changed_paths.values()}
+        orphan_paths = {}
+        for rel, entry in files.items():
+            if rel not in changed_rels and any(is_missing(_id) for _id in entry["ids"]):
+                key = rel if self.corpus_dir else self.api_data_dir / rel
+                orphan_paths[key] = (rel, entry["sha1"])
+        for rel, _, chunks in self._split_changed(orphan_paths, workers):
+            new_chunks.update((_id, (_id, text, meta)) for _id, text, meta in chunks)
+
+        to_add = [_id for _id in new_chunks if is_missing(_id)]
+
+        for i in range(0, len(to_delete), delete_batch):
+            collection.delete(ids=to_delete[i : i + delete_batch])
+
+        if to_add:
+            self._embed_and_add([new_chunks[_id] for _id in to_add], workers)
+
+        update_collection_entry(self.db_dir, self.collection_name, "files", files)
+        if to_add or to_delete:
+            mark_tiers_stale(self.db_dir, self.collection_name)
+
+        elapsed = time.perf_counter() - t0
+        print(
+            f"동기화 완료 ({elapsed:.1f}s): 파일 {len(files)}개 중 변경/신규 {changed}개, 삭제 {removed_files}개 / "
+            f"청크 추가 {len(to_add)}개, 삭제 {len(to_delete)}개 (청크 복구 파일 {len(orphan_paths)}개)"
+        )
+        print(f"저장된 문서 수: {collection.count()}")
+
     # ============================================================
     # DB 검증
     # ============================================================
@@ -191,14 +342,32 @@ class GoogleAPIDocumentProcessor:
 # ============================================================
 
 if __name__ == "__main__":
-    processor = GoogleAPIDocumentProcessor()
+    parser = argparse.ArgumentParser(description="Google API 문서 벡터 DB 구축")
+    parser.add_argument(
+        "--sync", action="store_true", help="전체 재임베딩 대신 변경된 청크만 반영"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="인코딩 프로세스 수 (기본: CPU 코어 수 / 2)"
+    )
+    parser.add_argument(
+        "--from-corpus",
+        nargs="?",
+        const=CORPUS_DIR,
+        default=None,
+        help="txt 파일 대신 corpus_dataset.py 데이터셋(pages)에서 읽기 (기본: ./corpus)",
+    )
+    args = parser.parse_args()
+
+    processor = GoogleAPIDocumentProcessor(corpus_dir=args.from_corpus)
 
     print("=" * 60)
-    print("Google API 문서 벡터 DB 구축 시작")
+    print("Google API 문서 벡터 DB " + ("동기화" if args.sync else "구축") + " 시작")
     print("=" * 60)
 
-    processor.load_api_documents()
-    processor.initialize_vectorstore()
+    if args.sync:
+        processor.sync_vectorstore(workers=args.workers)
+    else:
+        processor.initialize_vectorstore(workers=args.workers)
     processor.verify_db()
 
     print("\n" + "=" * 60)
@@ -2,11 +2,23 @@ import os
 import re
 import json
 import time
-import tiktoken
-from tqdm import tqdm
-from openai import OpenAI
+import asyncio
+import argparse
+from collections import Counter
+from functools import lru_cache, partial
+from pathlib import Path
+
+import numpy as np
 from dotenv import load_dotenv
 
+from qa_ids import qa_record_id
+from qa_engine import RPM, TPM, CONCURRENCY, ChatClient, JsonlWriter, count_message_tokens, run_docs, usage_summary
+from qa_manifest import QAManifest, compact_jsonl, text_sha1
+from question_dedup import THRESHOLD, DUP_LOG_SUFFIX, QuestionIndex
+from token_cache import TokenCache
+import batch_api
+from corpus_dataset import CORPUS_DIR, iter_pages
+
 load_dotenv()
 
 # =========================
@@ -20,10 +32,17 @@ CHUNK_TOKENS = 900  # 청크 크기(토큰 기준)
 CHUNK_OVERLAP_TOKENS = 150  # 청크 오버랩(토큰 기준)
 PAIR_WINDOW = 2  # 연속 청크 페어 크기
 MAX_CONTEXT_TOKENS = 4096  # 모델 컨텍스트 상한
-MAX_RETRY = 4  # API 재시도 횟수8
-client = OpenAI()  # OPENAI_API_KEY 필요
+MAX_TOKENS = 1100  # 응답 토큰 상한
+MAX_RETRY = 4  # API 재시도 횟수
+DOCS_PER_REQUEST = 2  # 동시 처리 문서 수 = 동시 요청 수 x 2 (페어가 적은 문서가 많아 요청 슬롯을 채우려면 여유 필요)
+BATCH_DIR = "./qa_batch"  # --batch 입력 파일 / 제출 상태 저장 폴더
+PROMPT_VERSION = "qa-v2"  # 프롬프트 / 응답 형식을 바꾸면 올림 → 재실행 시 모든 페어 다시 생성
+
+PAIR_SEP = "\n\n---\n\n"  # 페어 안 청크 구분자
 
-enc = tiktoken.get_encoding("cl100k_base")
+token_cache = TokenCache()  # 문서별 토큰 배열 (./token_cache, 내용 sha1 키)
+enc = token_cache.enc
+PAIR_SEP_TOKENS = np.asarray(enc.encode(PAIR_SEP), dtype=np.uint32)
 
 
 # =========================
@@ -39,11 +58,15 @@ def parse_source_meta(text):
 
 
 def smart_split(text):
-    """토큰 기반 청킹 + 오버랩."""
+    """
+    토큰 기반 청킹 + 오버랩 → [(청크 텍스트, 토큰 slice)]
+    - 토큰 배열은 token_cache에서 (같은 내용이면 인코딩 생략), 윈도우는 배열 slice
+    - 청크 텍스트는 윈도우마다 한 번만 decode (페어 두 개가 공유)
+    """
     text = text.replace("\r\n", "\n").strip()
     if not text:
         return []
-    toks = enc.encode(text)
+    toks = token_cache.tokens(text)
     chunks = []
     """
     CHUNK_TOKENS: 900 토큰
@@ -56,11 +79,11 @@ def smart_split(text):
     step = max(1, CHUNK_TOKENS - CHUNK_OVERLAP_TOKENS)
     for i in range(0, len(toks), step):
         block = toks[i : i + CHUNK_TOKENS]
-        if not block:
+        if not len(block):
             break
-        chunk_text = enc.decode(block).strip()
+        chunk_text = enc.decode(block.tolist()).strip()
         if chunk_text:
-            chunks.append(chunk_text)
+            chunks.append((chunk_text, block))
     return chunks
 
 
@@ -71,12 +94,21 @@ def make_pairs(chunks, window=PAIR_WINDOW):
     return [(i, chunks[i : i + window]) for i in range(len(chunks) - (window - 1))]
 
 
-def trim_to_context_limit(text):
-    """컨텍스트 초과 시 텍스트를 토큰 기준으로 상한 내로 자름."""
-    toks = enc.encode(text)
-    if len(toks) <= MAX_CONTEXT_TOKENS:
-        return text
-    return enc.decode(toks[:MAX_CONTEXT_TOKENS])
+def join_pair(chunk_group):
+    """
+    청크 그룹 → (페어 텍스트, 토큰 수)
+    - 토큰 수는 slice 길이 합으로 계산 (페어 텍스트를 다시 인코딩하지 않음)
+    - 컨텍스트 상한을 넘을 때만 slice를 이어 붙여 상한에서 자른 뒤 한 번 decode
+    """
+    n_tokens = sum(len(block) for _, block in chunk_group) + len(PAIR_SEP_TOKENS) * (len(chunk_group) - 1)
+    if n_tokens <= MAX_CONTEXT_TOKENS:
+        return PAIR_SEP.join(chunk_text for chunk_text, _ in chunk_group), n_tokens
+    parts = []
+    for i, (_, block) in enumerate(chunk_group):
+        if i:
+            parts.append(PAIR_SEP_TOKENS)
+        parts.append(block)
+    return enc.decode(np.concatenate(parts)[:MAX_CONTEXT_TOKENS].tolist()), MAX_CONTEXT_TOKENS
 
 
 def json_loads_strict_or_strip_codefence(s):
@@ -100,24 +132,13 @@ def get_api_tag_from_path(path: str) -> str:
 # =========================
 # 모델 호출
 # =========================
-def ask_model(pair_text, n, source_url, prev_qs=None, tag=""):
+def build_messages(pair_text, n, source_url, tag=""):
     """
-    해당 텍스트 범위에서 Q&A n개(JSON) 생성. 없으면 빈 리스트 반환.
+    해당 텍스트 범위에서 Q&A n개(JSON)를 만드는 chat 메시지
     - 문서 범위 밖 정보 금지
     - 실무 친화적 질문/정확한 답변
-    - prev_qs: 이미 만든 질문(원문 문자열) 목록 → 중복 생성 금지 유도
+    - 중복 질문은 프롬프트가 아니라 생성 후 question_dedup.py 인덱스에서 제거
     """
-    if n <= 0:
-        return []
-
-    prev_qs = prev_qs or []
-    prev_block = ""
-    if prev_qs:
-        # prev_qs[:-30] : 리스트에서 마지막 30개를 제외한 앞부분 전부
-        # prev_qs[-30:] : 최근 30개
-        preview_prev = "\n".join(f"- {q}" for q in prev_qs[-30:])
-        prev_block = f"\n\n이미 생성된(중복 금지) 질문 목록:\n{preview_prev}\n"
-
     system_prompt = (
         "당신은 구글 API 중 {tag} API의 공식 문서 텍스트에서만 근거를 삼아 Q&A를 만듭니다. "
         "문서에 명시된 내용만 사용하고 추측은 금지합니다. 실무자가 바로 쓰도록 자세하고 이해하기 쉽게 답변해주세요."
@@ -135,7 +156,6 @@ def ask_model(pair_text, n, source_url, prev_qs=None, tag=""):
 - 질문은 실무 친화적으로 구체적·명확하게
 - 답변은 문서 용어/표기 준수
 - 각 항목: question, answer
-- 아래 '이미 생성된 질문 목록'과 **중복되지 않게** 새 질문만 생성
 
 [언어/표기 규칙]
 - **출력은 한국어**로 하되, 모든 핵심 기술 용어/식별자/상수/메서드/필드/에러명/스키마명/리소스명은 **원문 영문을 괄호로 병기**합니다.
@@ -166,8 +186,6 @@ def ask_model(pair_text, n, source_url, prev_qs=None, tag=""):
 
 {url_hint}
 
-{prev_block}
-
 [원문 시작]
 {pair_text}
 [원문 끝]
@@ -183,25 +201,48 @@ JSON 스키마:
 }}
 """.strip()
 
-    for attempt in range(1, MAX_RETRY + 1):
-        try:
-            resp = client.chat.completions.create(
-                model=MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.0,
-                max_tokens=1100,
-            )
-            data = json_loads_strict_or_strip_codefence(resp.choices[0].message.content)
-            items = data.get("items", []) if isinstance(data, dict) else []
-            return items[:n]
-        except Exception:
-            if attempt == MAX_RETRY:
-                return []
-            time.sleep(0.8 * attempt)
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def parse_items(content, n):
+    """응답 본문 → Q&A 아이템 최대 n개 (JSON이 아니면 None)"""
+    try:
+        data = json_loads_strict_or_strip_codefence(content)
+    except Exception:
+        return None
+    items = data.get("items", []) if isinstance(data, dict) else []
+    return items[:n]
+
+
+@lru_cache(maxsize=None)
+def prompt_overhead_tokens(n, tag):
+    """원문을 뺀 프롬프트 토큰 수 (태그별 1회만 계산)"""
+    return count_message_tokens(build_messages("", n, None, tag))
+
+
+async def ask_model(chat, pair_text, n, source_url, tag="", pair_tokens=None):
+    """
+    해당 텍스트 범위에서 Q&A n개 생성 (속도 제한 / 재시도는 ChatClient)
+    - pair_tokens: 원문 토큰 수 (있으면 속도 제한 예약량을 프롬프트 재인코딩 없이 계산)
+    - 요청 실패 / 응답 파싱 실패면 None (다음 실행에서 다시 시도), 생성할 게 없으면 빈 리스트
+    """
+    if n <= 0:
+        return []
+    prompt_tokens = None
+    if pair_tokens is not None:
+        prompt_tokens = prompt_overhead_tokens(n, tag) + pair_tokens + len(enc.encode(source_url or ""))
+    content = await chat.complete(
+        build_messages(pair_text, n, source_url, tag),
+        MAX_TOKENS,
+        prompt_tokens=prompt_tokens,
+        usage_key=tag,
+        response_format={"type": "json_object"},
+        temperature=0.0,
+    )
+    return parse_items(content, n) if content else None
 
 
 # =========================
@@ -209,119 +250,329 @@ JSON 스키마:
 # =========================
 def build_record(q, a, doc_path, source_url, tag):
     """RAG 친화 JSON 레코드 + 추적 정보."""
+    source_file = os.path.basename(doc_path)
     return {
+        "id": qa_record_id(tag, source_file, q, a),
         "question": q.strip(),
         "answer": a.strip(),
         "source": [source_url or f"file://{doc_path}"],
         "tags": tag,
         "last_verified": "2025-08-19",
-        "source_file": os.path.basename(doc_path),
+        "source_file": source_file,
     }
 
 
-def process_qa_items(items, asked_qs_for_model, out_fh, file_path, source_url, tag):
-    """Q&A 아이템들을 처리하고 작성된 개수를 반환"""
-    written = 0
+def process_qa_items(items, file_path, source_url, tag):
+    """Q&A 아이템들 → 레코드 목록 (빈 질문/답변은 제외)"""
+    records = []
     for item in items:
         q, a = (item.get("question") or "").strip(), (item.get("answer") or "").strip()
         if not q or not a:
             continue
 
-        asked_qs_for_model.append(q)
-        rec = build_record(q, a, file_path, source_url, tag)
-        out_fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
-        written += 1
+        records.append(build_record(q, a, file_path, source_url, tag))
 
-    return written
+    return records
 
 
-def process_chunks_optimized(
-    chunks, asked_qs_for_model, out_fh, file_path, source_url, tag
-):
-    """최적화된 청크 처리 함수"""
-    written = 0
-
+def make_text_groups(chunks):
+    """요청 단위 텍스트 그룹 [(번호, [청크…])]"""
     # 단일 청크와 다중 청크를 동일한 방식으로 처리
     if len(chunks) == 1:
         # 단일 청크는 pairs로 변환하지 않고 직접 처리
-        text_groups = [(0, [chunks[0]])]
-        log_prefix = "단일페어"
-    else:
-        # 다중 청크는 페어로 변환
-        text_groups = make_pairs(chunks, window=PAIR_WINDOW)
-        log_prefix = "페어번호"
-        if not text_groups:
-            return 0
+        return [(0, [chunks[0]])]
+    # 다중 청크는 페어로 변환
+    return make_pairs(chunks, window=PAIR_WINDOW)
+
+
+def doc_key(file_path):
+    """매니페스트 문서 키 (ROOT_DIR 기준 상대 경로, txt 파일 / 코퍼스 행 공통)"""
+    return os.path.relpath(file_path, ROOT_DIR).replace(os.sep, "/")
 
-    # 통합된 처리 로직
+
+def pending_pairs(manifest, key, text_groups, dedup=None):
+    """
+    아직 생성하지 않은 페어 [(번호, 페어 텍스트, sha1, 토큰 수)]
+    - 텍스트 / 프롬프트가 같은 완료 페어는 건너뜀
+    - 다시 만드는 페어의 예전 질문은 중복 인덱스에서 빼 둠 (새 질문이 예전 버전과 중복으로 걸리지 않게)
+    """
+    pending = []
     for group_idx, chunk_group in text_groups:
-        pair_text = trim_to_context_limit("\n\n---\n\n".join(chunk_group))
-        items = ask_model(
-            pair_text, PAIR_MAX_QA, source_url, prev_qs=asked_qs_for_model, tag=tag
-        )
+        pair_text, n_tokens = join_pair(chunk_group)
+        pair_sha1 = text_sha1(pair_text)
+        if manifest.pair_done(key, group_idx, pair_sha1) is not None:
+            continue
+        if dedup is not None:
+            dedup.remove(manifest.pair_ids(key, group_idx))
+        pending.append((group_idx, pair_text, pair_sha1, n_tokens))
+    return pending
 
-        if items:
-            written += process_qa_items(
-                items, asked_qs_for_model, out_fh, file_path, source_url, tag
-            )
 
-        # if len(chunks) == 1:
-        #     print(f"{log_prefix} / 금지질문 : {asked_qs_for_model}")
-        # else:
-        #     print(f"{log_prefix}: {group_idx} / 금지질문 : {asked_qs_for_model}")
+async def process_chunks_optimized(
+    chat, writer, manifest, chunks, file_path, source_url, tag, doc_sha1, dedup=None
+):
+    """
+    청크 처리 함수
+    - 페어끼리 의존이 없으므로 문서 안 페어도 동시에 요청 (동시 요청 수는 ChatClient가 제한)
+    - 결과는 페어 순서대로 writer에 넘기고, writer가 중복 질문을 거른 뒤 기록 → 매니페스트에 완료 표시
+    """
+    written = 0
+    key = doc_key(file_path)
+    text_groups = make_text_groups(chunks)
+
+    manifest.start_file(key, doc_sha1, tag, os.path.basename(file_path), len(text_groups))
+    pending = pending_pairs(manifest, key, text_groups, dedup)
+    results = await asyncio.gather(
+        *(
+            ask_model(chat, pair_text, PAIR_MAX_QA, source_url, tag=tag, pair_tokens=n_tokens)
+            for _, pair_text, _, n_tokens in pending
+        )
+    )
 
+    failed = False
+    for (group_idx, _, pair_sha1, _), items in zip(pending, results):
+        if items is None:
+            failed = True
+            continue
+        records = process_qa_items(items, file_path, source_url, tag)
+        await writer.put(records, on_written=partial(manifest.mark_pair, key, group_idx, pair_sha1))
+        written += len(records)
+
+    # 모든 페어가 끝난 문서만 완료 표시 (다음 실행에서 청킹 없이 통째로 건너뜀)
+    if not failed:
+        await writer.put([], on_written=lambda _: manifest.finish_file(key))
     return written
 
 
-def process_one_file(file_path, out_fh):
+def read_txt_doc(file_path):
     """
-    단일 문서 처리:
-    - 상단 메타(Source URL) 추출 → 토큰 청킹
-    - 청크=1이면 그 1개로 최대 5개 생성
-    - 청크>=2면 (연속 페어)마다 최대 5개 생성
-    - 생성 없으면 스킵, 결과는 JSONL append
+    txt 문서 하나 → (본문, 경로, Source URL, 태그)
+    - 상단 메타(Source URL) 추출, 태그는 폴더명
     """
     with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
         text = f.read()
+    return text, file_path, parse_source_meta(text), get_api_tag_from_path(file_path)
 
-    if not text.strip():  # 비어 있는 파일은 처리하지 않음
-        return 0
 
-    source_url = parse_source_meta(text)  # Source URL 추출
-    chunks = smart_split(text)  # 텍스트를 청크로 나누기
-    tag = get_api_tag_from_path(file_path)
-    asked_qs_for_model = []  # 모델에 보여줄 '이미 만든 질문' 목록
+async def process_one_text(chat, writer, manifest, text, file_path, source_url, tag, doc_sha1=None, dedup=None):
+    """
+    단일 문서 처리 (txt 파일 / 코퍼스 데이터셋 행 공통):
+    - 토큰 청킹
+    - 청크=1이면 그 1개로 최대 5개 생성
+    - 청크>=2면 (연속 페어)마다 최대 5개 생성
+    - 생성 없으면 스킵, 결과는 writer가 JSONL append
+    """
+    doc_sha1 = doc_sha1 or text_sha1(text)
+    chunks = smart_split(text) if text.strip() else []  # 텍스트를 청크로 나누기 (빈 파일은 페어 0개로 완료)
 
-    # 최적화된 청크 처리 함수 사용
-    return process_chunks_optimized(
-        chunks, asked_qs_for_model, out_fh, file_path, source_url, tag
+    return await process_chunks_optimized(
+        chat, writer, manifest, chunks, file_path, source_url, tag, doc_sha1, dedup
     )
 
 
 # =========================
 # 엔트리포인트
 # =========================
-def walk_and_generate():
-    """폴더 재귀 순회 → 모든 문서를 처리 → 하나의 JSONL로 누적 저장."""
-    os.makedirs(os.path.dirname(OUT_JSONL) or ".", exist_ok=True)
-
-    # 전체 txt 파일 목록 먼저 수집
-    txt_files = []
+def iter_txt_docs():
+    """폴더 재귀 순회 → (본문, 경로, Source URL, 태그)"""
     for root, _, files in os.walk(ROOT_DIR):
         for name in files:
             if name.lower().endswith(".txt"):
-                txt_files.append(os.path.join(root, name))
+                yield read_txt_doc(os.path.join(root, name))
 
-    total_docs, total_qas = 0, 0
 
-    # tqdm으로 진행률 표시
-    with open(OUT_JSONL, "a", encoding="utf-8") as out_fh:
-        for path in tqdm(txt_files, desc="Processing files", unit="file"):
-            cnt = process_one_file(path, out_fh)
-            total_docs += 1
-            total_qas += cnt
+def iter_corpus_docs(corpus_dir=CORPUS_DIR):
+    """
+    corpus_dataset.py 데이터셋(pages)에서 문서 읽기
+    - 폴더 순회/헤더 정규식 없이 url / tag 컬럼을 그대로 사용
+    """
+    for row in iter_pages(corpus_dir):
+        yield row["text"], os.path.join(ROOT_DIR, row["path"]), row["url"], row["tag"]
+
 
-    print(f"\n[DONE] docs={total_docs}, qas={total_qas}, out={OUT_JSONL}")
+def open_dedup(threshold):
+    """중복 질문 인덱스 (threshold가 없으면 None), 시작 시 현재 JSONL과 동기화"""
+    if not threshold:
+        return None
+    dedup = QuestionIndex(threshold=threshold, dup_log=OUT_JSONL + DUP_LOG_SUFFIX)
+    dedup.sync(OUT_JSONL)
+    return dedup
 
 
-walk_and_generate()
+async def generate_async(docs, concurrency=CONCURRENCY, rpm=RPM, tpm=TPM, dedup_threshold=THRESHOLD):
+    """
+    문서들을 동시에 처리하고 결과를 하나의 JSONL로 누적 저장
+    - API 요청은 RPM / TPM 한도와 동시 요청 수(concurrency) 안에서만 나감
+    - 문서 간 / 문서 안 페어 모두 병렬
+    - JSONL은 단일 writer 태스크만 씀 (기록 전에 데이터셋 전체 기준 중복 질문 제거)
+    - 진행 상태는 OUT_JSONL 옆 매니페스트에 기록 → 중단 후 재실행하면 완료된 문서 / 페어는 건너뜀
+    - 끝까지 완료된 실행에서만 JSONL 정리 (바뀐 페어의 예전 레코드 / 중단으로 생긴 중복 제거)
+    """
+    os.makedirs(os.path.dirname(OUT_JSONL) or ".", exist_ok=True)
+    manifest = QAManifest(OUT_JSONL, f"{PROMPT_VERSION}/{MODEL}")
+    dedup = open_dedup(dedup_threshold)
+    chat = ChatClient(MODEL, rpm=rpm, tpm=tpm, concurrency=concurrency, max_retry=MAX_RETRY)
+    writer = JsonlWriter(OUT_JSONL, "a", transform=dedup.filter if dedup else None)
+    writer_task = asyncio.create_task(writer.run())
+    skipped = 0
+
+    async def process_doc(doc):
+        nonlocal skipped
+        text, file_path, source_url, tag = doc
+        doc_sha1 = text_sha1(text)
+        if manifest.file_done(doc_key(file_path), doc_sha1):
+            skipped += 1
+            return 0
+        return await process_one_text(chat, writer, manifest, text, file_path, source_url, tag, doc_sha1, dedup)
+
+    t0 = time.perf_counter()
+    try:
+        totals = await run_docs(docs, process_doc, workers=concurrency * DOCS_PER_REQUEST)
+    finally:
+        await writer.close()
+        await writer_task
+        manifest.save()
+
+    removed = compact_jsonl(OUT_JSONL, manifest)
+    print(
+        f"\n[DONE] docs={totals['docs']} (skipped={skipped}), "
+        f"qas={totals['qas']} (written={writer.count}), out={OUT_JSONL}"
+    )
+    if removed:
+        print(f"[COMPACT] 이전 / 중복 레코드 {removed}개 제거")
+        if dedup:
+            dedup.sync(OUT_JSONL)
+    if dedup:
+        print(f"[DEDUP] {dedup.summary()}")
+    print(f"[API] {usage_summary(chat.usage, time.perf_counter() - t0)}")
+    print(f"[TOKENS] {token_cache.summary()}")
+
+
+# =========================
+# Batch API 모드
+# =========================
+def build_batch_requests(docs, manifest):
+    """
+    남은 페어 전부 → Batch 입력 줄 목록 + 결과 병합용 메타
+    - custom_id = "문서 키#페어 번호" (매니페스트 키와 동일)
+    """
+    lines, pairs, docs_meta = [], {}, {}
+    for text, file_path, source_url, tag in docs:
+        key, doc_sha1 = doc_key(file_path), text_sha1(text)
+        if manifest.file_done(key, doc_sha1):
+            continue
+        chunks = smart_split(text) if text.strip() else []
+        text_groups = make_text_groups(chunks)
+        docs_meta[key] = {
+            "sha1": doc_sha1, "tag": tag, "source_file": os.path.basename(file_path), "pairs": len(text_groups),
+        }
+        for group_idx, pair_text, pair_sha1, _ in pending_pairs(manifest, key, text_groups):
+            custom_id = f"{key}#{group_idx}"
+            lines.append(
+                batch_api.batch_line(
+                    custom_id,
+                    MODEL,
+                    build_messages(pair_text, PAIR_MAX_QA, source_url, tag),
+                    max_tokens=MAX_TOKENS,
+                    response_format={"type": "json_object"},
+                    temperature=0.0,
+                )
+            )
+            pairs[custom_id] = {
+                "key": key, "index": group_idx, "sha1": pair_sha1,
+                "file_path": file_path, "source_url": source_url, "tag": tag,
+            }
+    return lines, {"pairs": pairs, "docs": docs_meta}
+
+
+def merge_batch_results(results, meta, manifest, dedup=None):
+    """배치 응답 → 실시간 모드와 같은 스키마로 중복 질문을 거른 뒤 JSONL append, 기록 후 매니페스트 갱신"""
+    for key, d in meta["docs"].items():
+        manifest.start_file(key, d["sha1"], d["tag"], d["source_file"], d["pairs"])
+
+    done, failed = [], set()
+    with open(OUT_JSONL, "a", encoding="utf-8") as f:
+        for custom_id, m in meta["pairs"].items():
+            content = results.get(custom_id)
+            items = parse_items(content, PAIR_MAX_QA) if content else None
+            if items is None:
+                failed.add(m["key"])
+                continue
+            records = process_qa_items(items, m["file_path"], m["source_url"], m["tag"])
+            if dedup is not None:
+                dedup.remove(manifest.pair_ids(m["key"], m["index"]))
+                records = dedup.filter(records)
+            for rec in records:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            done.append((m, records))
+        f.flush()
+        os.fsync(f.fileno())
+
+    for m, records in done:
+        manifest.mark_pair(m["key"], m["index"], m["sha1"], records)
+    for key in meta["docs"]:
+        if key not in failed:
+            manifest.finish_file(key)
+    manifest.save()
+    return sum(len(records) for _, records in done), len(failed)
+
+
+def generate_batch(docs, work_dir=BATCH_DIR, dedup_threshold=THRESHOLD):
+    """
+    실시간 요청 대신 Batch API로 전체 생성 (지연 최대 24h, 비용 / 처리량 우선)
+    - 남은 페어를 Batch 입력 JSONL로 만들어 제출 → 완료까지 폴링 → 같은 레코드 스키마로 병합
+    - 대기 중 중단되면 같은 명령으로 다시 실행 (제출한 배치를 이어서 기다림)
+    - 실패한 요청은 매니페스트에 남지 않아 다음 실행에서 다시 제출
+    """
+    manifest = QAManifest(OUT_JSONL, f"{PROMPT_VERSION}/{MODEL}")
+    if (Path(work_dir) / batch_api.STATE_FILE).exists():
+        lines, meta = [], None  # 제출된 배치가 있으면 새로 만들지 않고 이어서 대기
+    else:
+        lines, meta = build_batch_requests(docs, manifest)
+    if lines or meta is None:
+        results, meta, usage = batch_api.run_batches(lines, work_dir, meta, metadata={"job": "google_api_qa"})
+    else:
+        results, usage = {}, Counter()  # 남은 페어 없이 완료 표시만 필요한 문서 (빈 문서 등)
+    if not meta.get("docs"):
+        print("[DONE] 새로 생성할 페어 없음")
+        return
+
+    dedup = open_dedup(dedup_threshold)
+    written, failed_docs = merge_batch_results(results, meta, manifest, dedup)
+    batch_api.clear_state(work_dir)
+    removed = compact_jsonl(OUT_JSONL, manifest)
+    print(f"\n[DONE] pairs={len(meta['pairs'])}, qas={written}, 미완료 문서={failed_docs}, out={OUT_JSONL}")
+    if removed:
+        print(f"[COMPACT] 이전 / 중복 레코드 {removed}개 제거")
+        if dedup:
+            dedup.sync(OUT_JSONL)
+    if dedup:
+        print(f"[DEDUP] {dedup.summary()}")
+    print(f"[BATCH] {batch_api.usage_summary(usage)}")
+    print(f"[TOKENS] {token_cache.summary()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Google API 문서 → QA JSONL 생성")
+    parser.add_argument(
+        "--from-corpus",
+        nargs="?",
+        const=CORPUS_DIR,
+        default=None,
+        help="txt 파일 대신 corpus_dataset.py 데이터셋(pages)에서 읽기 (기본: ./corpus)",
+    )
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="동시 API 요청 수")
+    parser.add_argument("--rpm", type=int, default=RPM, help="분당 요청 수 상한")
+    parser.add_argument("--tpm", type=int, default=TPM, help="분당 토큰 수 상한")
+    parser.add_argument("--batch", action="store_true", help="Batch API로 제출하고 완료까지 대기 (실시간 요청 대신)")
+    parser.add_argument("--batch-dir", default=BATCH_DIR, help="배치 입력 파일 / 제출 상태 폴더")
+    parser.add_argument(
+        "--dedup-threshold", type=float, default=THRESHOLD, help="질문 중복 판정 cosine 유사도 (0이면 중복 검사 안 함)"
+    )
+    args = parser.parse_args()
+
+    docs = iter_corpus_docs(args.from_corpus) if args.from_corpus else iter_txt_docs()
+    if args.batch:
+        generate_batch(docs, args.batch_dir, args.dedup_threshold)
+    else:
+        asyncio.run(generate_async(docs, args.concurrency, args.rpm, args.tpm, args.dedup_threshold))
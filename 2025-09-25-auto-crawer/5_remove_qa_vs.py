@@ -1,28 +1,27 @@
 import chromadb
 
+from chunk_store import ids_for_tag
+from index_manifest import mark_tiers_stale
+
 COLLECTION_NAME = "qna_collection"
 # TAGS = ["google_identity", "youtube", "gmail", "calendar"]
 TAGS = ["google_identity"]
 
-client = chromadb.PersistentClient(path="./chroma_qa_db")
-collection = client.get_or_create_collection(name=COLLECTION_NAME)
+DB_DIR = "./chroma_qa_db"
 
-# 전체 메타데이터 조회
-all_data = collection.get(include=["metadatas"])
+client = chromadb.PersistentClient(path=DB_DIR)
+collection = client.get_or_create_collection(name=COLLECTION_NAME)
 
 for TAG in TAGS:
-    # 현재 태그에 해당하는 문서 ID 수집
-    ids_to_delete = [
-        _id
-        for _id, md in zip(all_data["ids"], all_data["metadatas"])
-        if md.get("tags") == TAG
-    ]
+    # 현재 태그에 해당하는 문서 ID 수집 (청크 저장소 태그 컬럼 → 없으면 where 필터)
+    ids_to_delete = ids_for_tag(collection, DB_DIR, TAG)
 
     print(f"[{TAG}] 삭제할 문서 수: {len(ids_to_delete)}")
 
     # 삭제 실행
     if ids_to_delete:
         collection.delete(ids=ids_to_delete)
+        mark_tiers_stale(DB_DIR, COLLECTION_NAME)
         print(f"[{TAG}] 삭제 완료")
     else:
         print(f"[{TAG}] 삭제할 문서가 없습니다")
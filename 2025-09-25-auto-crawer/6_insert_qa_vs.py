@@ -1,30 +1,29 @@
-import json, uuid
+import os
+import json
+import uuid
+import hashlib
 import chromadb
-from sentence_transformers import SentenceTransformer
-from chromadb.utils.embedding_functions import EmbeddingFunction
+
+from index_manifest import hnsw_metadata, mark_tiers_stale
+from embedding_profile import PassageEmbeddingFunction, record_profile, resolve_profile
+from qa_ids import record_id
+from corpus_dataset import iter_qa_records
 
 DB_PATH = "./chroma_qa_db"
 COLLECTION_NAME = "qna_collection"
 JSONL_PATH = "google_api_qa_dataset.jsonl"
-NORMALIZE = True
-
-
-class BGEPassageEmbedding(EmbeddingFunction):
-    def __init__(self, model_name="BAAI/bge-m3", normalize=True, device=None):
-        self.model = SentenceTransformer(model_name, device=device)
-        self.normalize = normalize
-
-    def __call__(self, texts):
-        texts = [f"passage: {t}" for t in texts]
-        embs = self.model.encode(texts, normalize_embeddings=self.normalize)
-        return embs.tolist()
+# QA 입력 (JSONL 파일 또는 corpus_dataset.py로 만든 QA 데이터셋 폴더, 예: QA_SOURCE=./corpus/qa)
+QA_SOURCE = os.getenv("QA_SOURCE", JSONL_PATH)
+# 컬렉션에 기록된 임베딩 프로필 (없으면 기존 "passage: " 접두어 설정, 바꾸려면 embedding_profile.py로 마이그레이션)
+PROFILE = resolve_profile(DB_PATH, COLLECTION_NAME)
 
 
+embedding_fn = PassageEmbeddingFunction(PROFILE)
 client = chromadb.PersistentClient(path=DB_PATH)
 collection = client.get_or_create_collection(
     name=COLLECTION_NAME,
-    embedding_function=BGEPassageEmbedding("BAAI/bge-m3", normalize=NORMALIZE),
-    metadata={"hnsw:space": "cosine"},
+    embedding_function=embedding_fn,
+    metadata={"hnsw:space": "cosine", **hnsw_metadata(DB_PATH, COLLECTION_NAME)},
 )
 
 
@@ -38,45 +37,99 @@ def to_meta_value(v):
         return str(v)
 
 
+def flush(docs, ids, metadatas):
+    """DB에 이미 있는 id는 건너뛰고 새 레코드만 임베딩 + upsert → 반영 개수"""
+    existing = set(collection.get(ids=ids, include=[])["ids"])
+    new = [i for i, _id in enumerate(ids) if _id not in existing]
+    if not new:
+        return 0
+    collection.upsert(
+        documents=[docs[i] for i in new],
+        metadatas=[metadatas[i] for i in new],
+        ids=[ids[i] for i in new],
+    )
+    return len(new)
+
+
+def doc_sha1(doc: str) -> str:
+    return hashlib.sha1(doc.encode("utf-8")).hexdigest()
+
+
 BATCH = 200
 docs, ids, metadatas = [], [], []
-inserted = 0
-
-with open(JSONL_PATH, "r", encoding="utf-8") as f:
-    for idx, line in enumerate(f, start=1):
-        line = line.strip()
-        if not line:
-            continue
-        obj = json.loads(line)
-
-        q = obj.get("question", "")
-        a = obj.get("answer", "")
-        _id = obj.get("id") or str(uuid.uuid4())
-
-        # 메타데이터(Q/A 제외)
-        raw_meta = {
-            "source": obj.get("source"),
-            "tags": obj.get("tags"),
-            "last_verified": obj.get("last_verified"),
-            "source_file": obj.get("source_file"),
-        }
-        meta = {k: to_meta_value(v) for k, v in raw_meta.items()}
-
-        # 저장 문서(질문/답변)
-        docs.append(f"Q: {q}\nA: {a}")
-        ids.append(_id)
-        metadatas.append(meta)
-
-        if idx % BATCH == 0:
-            collection.upsert(documents=docs, metadatas=metadatas, ids=ids)
-            inserted += len(ids)
-            print(f"[UPSERT] 누적 DB 반영: {inserted}개", flush=True)
-            docs, ids, metadatas = [], [], []
+seen = set()
+seen_docs = set()  # 이번 실행에 고정 id로 반영된 저장 문서("Q: ...\nA: ...") sha1
+inserted, skipped = 0, 0
+
+for obj in iter_qa_records(QA_SOURCE):
+    q = obj.get("question", "")
+    a = obj.get("answer", "")
+    # 고정 id (같은 레코드 재실행 시 중복 삽입 방지)
+    _id = record_id(obj)
+    if _id in seen:
+        skipped += 1
+        continue
+    seen.add(_id)
+
+    # 메타데이터(Q/A 제외)
+    raw_meta = {
+        "source": obj.get("source"),
+        "tags": obj.get("tags"),
+        "last_verified": obj.get("last_verified"),
+        "source_file": obj.get("source_file"),
+    }
+    meta = {k: to_meta_value(v) for k, v in raw_meta.items()}
+
+    # 저장 문서(질문/답변)
+    docs.append(f"Q: {q}\nA: {a}")
+    seen_docs.add(doc_sha1(docs[-1]))
+    ids.append(_id)
+    metadatas.append(meta)
+
+    if len(ids) == BATCH:
+        inserted += flush(docs, ids, metadatas)
+        print(f"[UPSERT] 누적 신규 반영: {inserted}개 / 확인 {len(seen)}개", flush=True)
+        docs, ids, metadatas = [], [], []
 
 if docs:
-    collection.upsert(documents=docs, metadatas=metadatas, ids=ids)
-    inserted += len(ids)
-    print(f"[UPSERT] 누적 DB 반영: {inserted}개", flush=True)
+    inserted += flush(docs, ids, metadatas)
+    print(f"[UPSERT] 누적 신규 반영: {inserted}개 / 확인 {len(seen)}개", flush=True)
 
-print(f"업서트 완료: {len(ids)}개")
+# 이전 버전이 uuid4로 넣은 레코드 정리
+# - 같은 "Q: ...\nA: ..." 내용이 이번에 고정 id로 들어간 경우만 중복으로 보고 삭제
+# - QA_SOURCE에 없는 레코드(미리 받은 chroma_qa_db에만 있는 QA 등)는 uuid id여도 유지
+def is_legacy_id(_id):
+    try:
+        return str(uuid.UUID(_id)) == _id
+    except ValueError:
+        return False
+
+
+legacy_ids, kept_legacy = [], 0
+candidates = [_id for _id in collection.get(include=[])["ids"] if _id not in seen and is_legacy_id(_id)]
+for start in range(0, len(candidates), 1000):
+    data = collection.get(ids=candidates[start : start + 1000], include=["documents"])
+    for _id, doc in zip(data["ids"], data["documents"]):
+        if doc is not None and doc_sha1(doc) in seen_docs:
+            legacy_ids.append(_id)
+        else:
+            kept_legacy += 1
+for start in range(0, len(legacy_ids), 1000):
+    collection.delete(ids=legacy_ids[start : start + 1000])
+if legacy_ids:
+    print(f"[CLEANUP] 고정 id로 다시 들어간 랜덤 id 레코드 {len(legacy_ids)}개 삭제", flush=True)
+if kept_legacy:
+    print(f"[CLEANUP] QA_SOURCE에 없는 랜덤 id 레코드 {kept_legacy}개 유지", flush=True)
+
+if inserted:
+    dim = len(collection.get(limit=1, include=["embeddings"])["embeddings"][0])
+    record_profile(DB_PATH, COLLECTION_NAME, PROFILE, dim)
+if inserted or legacy_ids:
+    mark_tiers_stale(DB_PATH, COLLECTION_NAME)
+
+print(f"업서트 완료: 신규 {inserted}개, 기존 유지 {len(seen) - inserted}개, JSONL 중복 {skipped}개")
+print(
+    f"[CACHE] 임베딩 캐시 hit {embedding_fn.cache.hits}개 / miss {embedding_fn.cache.misses}개",
+    flush=True,
+)
 print(f"[COUNT] 현재 컬렉션 문서 수: {collection.count()}", flush=True)
@@ -0,0 +1,160 @@
+import os
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+# =========================
+# 설정
+# =========================
+ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+MAX_BATCH_REQUESTS = 50_000  # Batch API 입력 파일당 요청 수 상한
+MAX_BATCH_BYTES = 190 * 1024 * 1024  # 입력 파일 크기 상한(200MB)보다 약간 작게
+POLL_SEC = 30.0  # 상태 확인 간격 (로컬 대체 서버는 OPENAI_BATCH_POLL_SEC로 줄여서 사용)
+DONE_STATUSES = {"completed", "failed", "expired", "cancelled"}
+STATE_FILE = "batch_state.json"
+
+
+def batch_line(custom_id: str, model: str, messages, **params) -> dict:
+    """Batch 입력 JSONL 한 줄 (chat completions 요청 하나)"""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": ENDPOINT,
+        "body": {"model": model, "messages": messages, **params},
+    }
+
+
+def write_batch_files(lines, work_dir, prefix="batch_input"):
+    """요청 목록 → 개수 / 크기 상한에 맞춰 나눈 입력 JSONL 파일 경로 목록"""
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    paths, out, count, size = [], None, 0, 0
+    for line in lines:
+        data = (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+        if out is None or count >= MAX_BATCH_REQUESTS or size + len(data) > MAX_BATCH_BYTES:
+            if out is not None:
+                out.close()
+            paths.append(work_dir / f"{prefix}_{len(paths):03d}.jsonl")
+            out, count, size = open(paths[-1], "wb"), 0, 0
+        out.write(data)
+        count += 1
+        size += len(data)
+    if out is not None:
+        out.close()
+    return paths
+
+
+# =========================
+# 제출 / 대기 / 결과
+# =========================
+def make_client():
+    """동기 OpenAI 클라이언트 (OPENAI_BASE_URL을 지정하면 로컬 대체 서버로 보냄)"""
+    from openai import OpenAI
+
+    return OpenAI()  # OPENAI_API_KEY 필요
+
+
+def submit(client, path, metadata=None):
+    """입력 파일 업로드 후 배치 생성 → 배치 id"""
+    with open(path, "rb") as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+    extra = {"metadata": metadata} if metadata else {}
+    batch = client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=ENDPOINT,
+        completion_window=COMPLETION_WINDOW,
+        **extra,
+    )
+    return batch.id
+
+
+def wait(client, batch_ids, poll_sec=None):
+    """모든 배치가 끝날 때까지 상태 출력하며 대기 → 배치 객체 목록"""
+    poll_sec = float(os.getenv("OPENAI_BATCH_POLL_SEC", poll_sec or POLL_SEC))
+    pending, done = list(batch_ids), {}
+    while pending:
+        for batch_id in list(pending):
+            batch = client.batches.retrieve(batch_id)
+            counts = batch.request_counts
+            progress = f"{counts.completed + counts.failed}/{counts.total}" if counts else "-"
+            print(f"[BATCH] {batch_id}: {batch.status} ({progress})")
+            if batch.status in DONE_STATUSES:
+                done[batch_id] = batch
+                pending.remove(batch_id)
+        if pending:
+            time.sleep(poll_sec)
+    return [done[b] for b in batch_ids]
+
+
+def read_results(client, batches):
+    """
+    완료된 배치 출력 → ({custom_id: 응답 본문 문자열}, usage Counter)
+    - 실패한 요청(오류 파일 / 200이 아닌 응답)은 결과에 넣지 않음 → 다음 실행에서 다시 요청
+    - 만료(expired) 배치도 끝난 요청의 출력은 있으므로 그대로 읽음
+    """
+    results, usage = {}, Counter()
+    for batch in batches:
+        if batch.error_file_id:
+            usage["failures"] += sum(1 for line in client.files.content(batch.error_file_id).text.splitlines() if line.strip())
+        if not batch.output_file_id:
+            continue
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            response = row.get("response") or {}
+            if row.get("error") or response.get("status_code") != 200:
+                usage["failures"] += 1
+                continue
+            body = response["body"]
+            usage["requests"] += 1
+            usage["prompt_tokens"] += body.get("usage", {}).get("prompt_tokens", 0)
+            usage["completion_tokens"] += body.get("usage", {}).get("completion_tokens", 0)
+            results[row["custom_id"]] = body["choices"][0]["message"]["content"]
+    return results, usage
+
+
+def run_batches(lines, work_dir, meta=None, client=None, metadata=None):
+    """
+    요청 목록 제출 → 완료 대기 → 결과 반환 ({custom_id: 본문}, 요청 메타, usage)
+    - 제출한 배치 id와 요청 메타(custom_id → 결과 병합에 필요한 정보)를 work_dir/batch_state.json에 저장
+      → 대기 중 중단돼도 다시 실행하면 재제출 없이 기존 배치를 이어서 기다림
+    - 결과 병합이 끝나면 clear_state()로 상태 파일 삭제
+    """
+    client = client or make_client()
+    state_path = Path(work_dir) / STATE_FILE
+    if state_path.exists():
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        print(f"[BATCH] 제출된 배치 {len(state['batch_ids'])}개 이어서 대기 ({state_path})")
+    else:
+        lines = list(lines)
+        if not lines:
+            return {}, meta or {}, Counter()
+        paths = write_batch_files(lines, work_dir)
+        batch_ids = [submit(client, p, metadata) for p in paths]
+        state = {"batch_ids": batch_ids, "meta": meta or {}, "requests": len(lines)}
+        tmp = state_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, state_path)
+        print(f"[BATCH] 요청 {len(lines)}개 → 배치 {len(batch_ids)}개 제출: {', '.join(batch_ids)}")
+
+    batches = wait(client, state["batch_ids"])
+    results, usage = read_results(client, batches)
+    return results, state["meta"], usage
+
+
+def clear_state(work_dir):
+    state_path = Path(work_dir) / STATE_FILE
+    if state_path.exists():
+        state_path.unlink()
+
+
+def usage_summary(usage: Counter) -> str:
+    return (
+        f"성공 {usage['requests']}개 / 실패 {usage['failures']}개 / "
+        f"토큰 프롬프트 {usage['prompt_tokens']:,}, 완성 {usage['completion_tokens']:,}"
+    )
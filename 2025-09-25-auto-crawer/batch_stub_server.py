@@ -0,0 +1,230 @@
+"""
+OpenAI Batch API 로컬 대체 서버 (배치 모드 종단 테스트용, 실제 모델 호출 없음)
+- 지원: POST /v1/files, GET /v1/files/{id}, GET /v1/files/{id}/content,
+        POST /v1/batches, GET /v1/batches/{id}, POST /v1/batches/{id}/cancel
+- 응답 본문은 요청 형식에 맞춘 더미 (response_format=json_object면 {"items": [...]}, 아니면 Markdown)
+
+사용:
+  python3 batch_stub_server.py --port 8765 &
+  OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub OPENAI_BATCH_POLL_SEC=1 \\
+      python3 4_create_qa_json.py --batch
+"""
+import re
+import json
+import time
+import random
+import argparse
+import itertools
+import threading
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# =========================
+# 설정
+# =========================
+HOST = "127.0.0.1"
+PORT = 8765
+PROCESS_SEC = 2.0  # 배치 생성 후 완료까지 걸리는 시간 (in_progress 상태 확인용)
+
+_ids = itertools.count(1)
+_lock = threading.Lock()
+FILES = {}  # id → {"meta": {...}, "data": bytes}
+BATCHES = {}  # id → batch 객체
+
+
+def _new_id(prefix):
+    return f"{prefix}-stub{next(_ids):06d}"
+
+
+def _add_file(data: bytes, filename: str, purpose: str):
+    file_id = _new_id("file")
+    FILES[file_id] = {
+        "meta": {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(data),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        },
+        "data": data,
+    }
+    return FILES[file_id]["meta"]
+
+
+# =========================
+# 더미 응답
+# =========================
+def _snippet(messages):
+    user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    m = re.search(r"\[원문 시작\]\s*(.+?)\s*\[원문 끝\]", user, flags=re.S)
+    text = (m.group(1) if m else user).strip()
+    return " ".join(text.split())[:200]
+
+
+def fake_completion(body: dict) -> dict:
+    messages = body.get("messages", [])
+    snippet = _snippet(messages)
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        n = int((re.search(r"Q&A (\d+)개", messages[-1]["content"]) or [None, 1])[1])
+        content = json.dumps(
+            {"items": [{"question": f"[stub {i + 1}] {snippet[:60]}?", "answer": snippet} for i in range(n)]},
+            ensure_ascii=False,
+        )
+    else:
+        content = f"## (stub 응답)\n\n{snippet}\n"
+    prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": _new_id("chatcmpl"),
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def process_batch(batch_id, fail_rate):
+    """입력 파일의 요청마다 더미 응답 생성 → 출력 / 오류 파일"""
+    time.sleep(PROCESS_SEC)
+    with _lock:
+        batch = BATCHES[batch_id]
+        if batch["status"] != "in_progress":
+            return
+        lines = FILES[batch["input_file_id"]]["data"].decode("utf-8").splitlines()
+
+    out, err = [], []
+    for line in filter(str.strip, lines):
+        req = json.loads(line)
+        if random.random() < fail_rate:
+            err.append({
+                "id": _new_id("batch_req"),
+                "custom_id": req["custom_id"],
+                "response": None,
+                "error": {"code": "server_error", "message": "stub failure"},
+            })
+            continue
+        out.append({
+            "id": _new_id("batch_req"),
+            "custom_id": req["custom_id"],
+            "response": {"status_code": 200, "request_id": _new_id("req"), "body": fake_completion(req["body"])},
+            "error": None,
+        })
+
+    def dump(rows):
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+
+    with _lock:
+        batch["output_file_id"] = _add_file(dump(out), f"{batch_id}_output.jsonl", "batch_output")["id"] if out else None
+        batch["error_file_id"] = _add_file(dump(err), f"{batch_id}_error.jsonl", "batch_output")["id"] if err else None
+        batch["request_counts"] = {"total": len(out) + len(err), "completed": len(out), "failed": len(err)}
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+
+
+# =========================
+# HTTP
+# =========================
+class Handler(BaseHTTPRequestHandler):
+    fail_rate = 0.0
+
+    def _send(self, status, payload=None, raw: bytes = None):
+        data = raw if raw is not None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream" if raw is not None else "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _not_found(self):
+        self._send(404, {"error": {"message": f"not found: {self.path}", "type": "invalid_request_error"}})
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/v1/files":
+            ctype = self.headers.get("Content-Type", "")
+            msg = BytesParser(policy=email_policy).parsebytes(
+                f"Content-Type: {ctype}\r\n\r\n".encode("utf-8") + self._body()
+            )
+            fields = {}
+            for part in msg.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                fields[name] = (part.get_filename(), part.get_payload(decode=True))
+            filename, data = fields["file"]
+            purpose = fields.get("purpose", (None, b"batch"))[1].decode("utf-8")
+            with _lock:
+                meta = _add_file(data, filename or "upload.jsonl", purpose)
+            return self._send(200, meta)
+
+        if path == "/v1/batches":
+            req = json.loads(self._body() or b"{}")
+            if req.get("input_file_id") not in FILES:
+                return self._send(400, {"error": {"message": "unknown input_file_id"}})
+            batch_id = _new_id("batch")
+            now = int(time.time())
+            with _lock:
+                BATCHES[batch_id] = {
+                    "id": batch_id,
+                    "object": "batch",
+                    "endpoint": req.get("endpoint"),
+                    "errors": None,
+                    "input_file_id": req["input_file_id"],
+                    "completion_window": req.get("completion_window", "24h"),
+                    "status": "in_progress",
+                    "output_file_id": None,
+                    "error_file_id": None,
+                    "created_at": now,
+                    "in_progress_at": now,
+                    "expires_at": now + 24 * 3600,
+                    "completed_at": None,
+                    "request_counts": {"total": 0, "completed": 0, "failed": 0},
+                    "metadata": req.get("metadata"),
+                }
+            threading.Thread(target=process_batch, args=(batch_id, self.fail_rate), daemon=True).start()
+            return self._send(200, BATCHES[batch_id])
+
+        m = re.fullmatch(r"/v1/batches/([^/]+)/cancel", path)
+        if m and m.group(1) in BATCHES:
+            with _lock:
+                batch = BATCHES[m.group(1)]
+                if batch["status"] == "in_progress":
+                    batch["status"] = "cancelled"
+            return self._send(200, batch)
+        self._not_found()
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        m = re.fullmatch(r"/v1/batches/([^/]+)", path)
+        if m and m.group(1) in BATCHES:
+            return self._send(200, BATCHES[m.group(1)])
+        m = re.fullmatch(r"/v1/files/([^/]+)(/content)?", path)
+        if m and m.group(1) in FILES:
+            entry = FILES[m.group(1)]
+            return self._send(200, raw=entry["data"]) if m.group(2) else self._send(200, entry["meta"])
+        self._not_found()
+
+    def log_message(self, fmt, *args):
+        print(f"[stub] {self.command} {self.path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI Batch API 로컬 대체 서버")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="요청별 실패 비율 (재제출 확인용)")
+    args = parser.parse_args()
+
+    Handler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Batch API 대체 서버: http://{args.host}:{args.port}/v1")
+    server.serve_forever()
@@ -0,0 +1,198 @@
+import sys
+import time
+import argparse
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+from langchain_community.vectorstores import Chroma
+from langchain.retrievers import EnsembleRetriever
+from langchain_community.retrievers import BM25Retriever
+from langchain.docstore.document import Document
+
+from corpus_dataset import iter_qa_records
+
+# 서빙 코드(임베딩 프로필, bge-m3 하이브리드 retriever, MaxSim 재정렬)를 그대로 측정
+sys.path.append(str(Path(__file__).resolve().parent.parent / "TEST_DOCS" / "app"))
+from apichat.utils.bge_m3 import encode_query
+from apichat.utils.chunk_store import load_chunk_store
+from apichat.utils.embedding_profile import ProfileEmbeddings
+from apichat.utils.reranker_colbert import load_colbert_store
+from apichat.utils.retriever_pca import load_pca_tier
+from apichat.utils.retriever_sparse import BGEM3HybridRetriever, load_sparse_index
+
+# =========================
+# 설정
+# =========================
+EMBED_MODEL = "BAAI/bge-m3"
+QA_JSONL = "./google_api_qa_dataset.jsonl"
+NUM_QUERIES = 200
+TEXT_K = 5  # 서빙 기본값과 동일 (vector_search_tool text_k)
+EVAL_K = [1, 3, 5]
+
+
+# =========================
+# 평가 데이터
+# =========================
+def load_eval_queries(jsonl_path, num_queries, seed=0):
+    """QA 레코드의 질문 → 정답은 같은 source_file에서 나온 원문 청크."""
+    records = [
+        obj
+        for obj in iter_qa_records(jsonl_path)
+        if obj.get("question") and obj.get("source_file") and obj.get("tags")
+    ]
+
+    rng = np.random.default_rng(seed)
+    if len(records) > num_queries:
+        records = [records[i] for i in rng.choice(len(records), num_queries, replace=False)]
+    return records
+
+
+# =========================
+# 기준선: 서빙과 같은 Chroma + BM25 EnsembleRetriever
+# =========================
+def build_baseline(vs, k):
+    data = vs.get(include=["documents", "metadatas"])
+    tag_docs = defaultdict(list)
+    for doc, meta in zip(data["documents"], data["metadatas"]):
+        tag_docs[meta["tags"]].append(Document(page_content=doc, metadata=meta))
+
+    bm25_by_tag = {}
+    for tag, docs in tag_docs.items():
+        r = BM25Retriever.from_documents(docs)
+        r.k = k
+        bm25_by_tag[tag] = r
+
+    def retriever_for(tag):
+        dense = vs.as_retriever(search_kwargs={"k": k, "filter": {"tags": tag}})
+        if tag not in bm25_by_tag:
+            return dense
+        return EnsembleRetriever(retrievers=[dense, bm25_by_tag[tag]], weights=[0.8, 0.2])
+
+    return retriever_for
+
+
+# =========================
+# 서빙 재정렬 대상: bge-m3 하이브리드(dense + sparse) 융합 순서
+# =========================
+def build_hybrid(vs, embeddings, db_dir, collection_name, k):
+    """서빙 sparse 모드와 같은 구성 (sparse 모드가 꺼져 있으면 None → 서빙에서도 재정렬 없음)"""
+    sparse_index = load_sparse_index(db_dir, collection_name)
+    if sparse_index is None:
+        return None
+    pca_tier = load_pca_tier(db_dir, collection_name)
+    chunk_store = load_chunk_store(db_dir, collection_name)
+
+    def retriever_for(tag):
+        return BGEM3HybridRetriever(
+            vectorstore=vs,
+            embeddings=embeddings,
+            sparse_index=sparse_index,
+            pca_tier=pca_tier,
+            chunk_store=chunk_store,
+            k=k,
+            sparse_k=k,
+            tags=[tag],
+        )
+
+    return retriever_for
+
+
+def timed_search(retriever, query):
+    """쿼리 캐시를 비우고 검색 → (문서, 지연) (bge-m3 forward를 지연에 포함)"""
+    encode_query.cache_clear()
+    t0 = time.perf_counter()
+    docs = retriever.invoke(query)
+    return docs, time.perf_counter() - t0
+
+
+def timed_rerank(store, query, docs, top_n=None):
+    """
+    검색 직후 MaxSim 재정렬 → (문서, 추가 지연)
+    - 쿼리 토큰 벡터는 encode_query 캐시 재사용 (검색이 같은 bge-m3 forward를 썼으면 MaxSim 계산만 추가)
+    """
+    t0 = time.perf_counter()
+    reranked = store.rerank(query, docs, top_n)
+    return reranked, time.perf_counter() - t0
+
+
+# =========================
+# 지표
+# =========================
+def first_hit_rank(docs, source_file):
+    for rank, doc in enumerate(docs, start=1):
+        if doc.metadata.get("source_file") == source_file:
+            return rank
+    return None
+
+
+def summarize(ranks, latencies):
+    out = {f"hit@{k}": np.mean([r is not None and r <= k for r in ranks]) for k in EVAL_K}
+    out["mrr"] = np.mean([1.0 / r if r else 0.0 for r in ranks])
+    out["p50(ms)"] = float(np.percentile(latencies, 50) * 1000)
+    out["p99(ms)"] = float(np.percentile(latencies, 99) * 1000)
+    return out
+
+
+def print_row(label, stats):
+    cols = "".join(f"{v:>10.3f}" if "ms" not in k else f"{v:>10.2f}" for k, v in stats.items())
+    print(f"{label:<20}{cols}")
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EnsembleRetriever / bge-m3 하이브리드 순서 vs MaxSim 재정렬 비교")
+    parser.add_argument("--db-dir", default="./chroma_text_api")
+    parser.add_argument("--collection", default="google_api_docs")
+    parser.add_argument("--queries", default=QA_JSONL, help="QA JSONL 또는 QA 데이터셋 폴더")
+    parser.add_argument("--num-queries", type=int, default=NUM_QUERIES)
+    parser.add_argument("--k", type=int, default=TEXT_K)
+    args = parser.parse_args()
+
+    store = load_colbert_store(args.db_dir, args.collection)
+    if store is None:
+        raise SystemExit(f"[{args.collection}] multi-vector 저장소가 없습니다: 먼저 colbert_store.py 실행")
+
+    # 서빙과 같은 컬렉션 임베딩 프로필 (torch bge-m3 프로필이면 하이브리드 / 재정렬과 모델 공유)
+    embeddings = ProfileEmbeddings(args.db_dir, args.collection, EMBED_MODEL)
+    vs = Chroma(
+        collection_name=args.collection,
+        persist_directory=args.db_dir,
+        embedding_function=embeddings,
+    )
+    ensemble_for = build_baseline(vs, args.k)
+    hybrid_for = build_hybrid(vs, embeddings, args.db_dir, args.collection, args.k)
+    if hybrid_for is None:
+        print(f"⚠️ [{args.collection}] sparse 모드가 꺼져 있어 서빙에서는 재정렬 안 함 → EnsembleRetriever 기준만 측정")
+    embeddings.embed_query("warmup")  # 모델 로드 시간은 지연에서 제외
+
+    results = defaultdict(lambda: ([], []))  # 방식 → (정답 순위, 지연)
+
+    def record(label, docs, latency, source_file):
+        ranks, latencies = results[label]
+        ranks.append(first_hit_rank(docs, source_file))
+        latencies.append(latency)
+
+    for rec in load_eval_queries(args.queries, args.num_queries):
+        query, source_file = rec["question"], rec["source_file"]
+
+        docs, latency = timed_search(ensemble_for(rec["tags"]), query)
+        record("ensemble", docs, latency, source_file)
+        reranked, extra = timed_rerank(store, query, docs)
+        record("ensemble+maxsim*", reranked, latency + extra, source_file)
+
+        if hybrid_for is not None:
+            docs, latency = timed_search(hybrid_for(rec["tags"]), query)
+            record("hybrid", docs, latency, source_file)
+            # 서빙 with_rerank와 같은 top_n (dense k + sparse k)
+            reranked, extra = timed_rerank(store, query, docs, top_n=2 * args.k)
+            record("hybrid+maxsim", reranked, latency + extra, source_file)
+
+    header = "".join(f"{h:>10}" for h in [f"hit@{k}" for k in EVAL_K] + ["mrr", "p50(ms)", "p99(ms)"])
+    print(f"\n쿼리 {len(results['ensemble'][0])}개 / k={args.k}")
+    print(f"{'방식':<20}{header}")
+    for label, (ranks, latencies) in results.items():
+        print_row(label, summarize(ranks, latencies))
+    print("* 서빙에는 없는 조합 (EnsembleRetriever 경로는 재정렬하지 않음), 지연은 쿼리 인코딩 포함")
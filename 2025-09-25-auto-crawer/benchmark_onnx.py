@@ -0,0 +1,120 @@
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from onnx_encoder import EMBED_MODEL, ONNX_DIR, OnnxEncoder
+from corpus_dataset import iter_qa_records
+
+# =========================
+# 설정
+# =========================
+QA_JSONL = "./google_api_qa_dataset.jsonl"
+NUM_TEXTS = 256
+BATCH_SIZES = [1, 64]
+MIN_COSINE = {"fp32": 0.999, "int8": 0.98}  # torch 대비 최소 코사인 (이보다 낮으면 실패)
+REPEAT = 3
+
+
+# =========================
+# 데이터
+# =========================
+def load_texts(jsonl_path, num_texts, seed=0):
+    """QA 데이터셋의 질문(짧은 쿼리)과 Q/A 문서(긴 패시지)를 섞어서 사용."""
+    texts = []
+    for obj in iter_qa_records(jsonl_path):
+        if obj.get("question"):
+            texts.append(obj["question"])
+            texts.append(f"Q: {obj['question']}\nA: {obj.get('answer', '')}")
+
+    rng = np.random.default_rng(seed)
+    if len(texts) > num_texts:
+        texts = [texts[i] for i in rng.choice(len(texts), num_texts, replace=False)]
+    return texts
+
+
+# =========================
+# 측정
+# =========================
+def parity(reference, candidate):
+    """행별 코사인 유사도 (두 출력 모두 L2 정규화되어 있음)"""
+    cos = np.sum(reference * candidate, axis=1)
+    return {
+        "mean": float(cos.mean()),
+        "p1": float(np.percentile(cos, 1)),
+        "min": float(cos.min()),
+    }
+
+
+def throughput(encode_fn, texts, batch_size, repeat=REPEAT):
+    """배치 단위 지연(p50/p99)과 초당 텍스트 수"""
+    n = len(texts) if batch_size > 1 else min(len(texts), 64)
+    batches = [texts[i : i + batch_size] for i in range(0, n, batch_size)]
+    encode_fn(batches[0])  # 워밍업
+
+    latencies = []
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for batch in batches:
+            t = time.perf_counter()
+            encode_fn(batch)
+            latencies.append(time.perf_counter() - t)
+    total = time.perf_counter() - t0
+    return {
+        "p50(ms)": float(np.percentile(latencies, 50) * 1000),
+        "p99(ms)": float(np.percentile(latencies, 99) * 1000),
+        "texts/s": n * repeat / total,
+    }
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    from sentence_transformers import SentenceTransformer
+
+    parser = argparse.ArgumentParser(description="bge-m3 torch vs ONNX(fp32/int8) 출력 일치도 + 처리량 비교")
+    parser.add_argument("--onnx-dir", default=ONNX_DIR)
+    parser.add_argument("--queries", default=QA_JSONL, help="텍스트를 꺼낼 QA JSONL 또는 QA 데이터셋 폴더")
+    parser.add_argument("--num-texts", type=int, default=NUM_TEXTS)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--skip-fp32", action="store_true", help="int8 모델만 비교")
+    args = parser.parse_args()
+
+    texts = load_texts(args.queries, args.num_texts)
+    torch_model = SentenceTransformer(EMBED_MODEL, device="cpu")
+    backends = {
+        "torch": lambda batch: torch_model.encode(
+            batch, batch_size=len(batch), normalize_embeddings=True
+        )
+    }
+    variants = ["int8"] if args.skip_fp32 else ["fp32", "int8"]
+    for name in variants:
+        encoder = OnnxEncoder(args.onnx_dir, quantized=(name == "int8"))
+        backends[f"onnx-{name}"] = lambda batch, enc=encoder: enc.encode(
+            batch, batch_size=len(batch), normalize_embeddings=True
+        )
+
+    # 출력 일치도 (torch 기준 코사인 drift)
+    print(f"\n텍스트 {len(texts)}개 / torch 대비 코사인")
+    reference = backends["torch"](texts)
+    failed = False
+    for name in variants:
+        stats = parity(reference, backends[f"onnx-{name}"](texts))
+        ok = stats["min"] >= MIN_COSINE[name]
+        failed |= not ok
+        print(
+            f"  onnx-{name:<6} mean={stats['mean']:.5f} p1={stats['p1']:.5f} "
+            f"min={stats['min']:.5f} (기준 {MIN_COSINE[name]}) {'OK' if ok else 'FAIL'}"
+        )
+
+    # 처리량 / 지연
+    for batch_size in args.batch_sizes:
+        print(f"\n배치 {batch_size}")
+        print(f"{'백엔드':<14}{'p50(ms)':>10}{'p99(ms)':>10}{'texts/s':>10}")
+        for name, fn in backends.items():
+            stats = throughput(fn, texts, batch_size)
+            print(f"{name:<14}{stats['p50(ms)']:>10.1f}{stats['p99(ms)']:>10.1f}{stats['texts/s']:>10.1f}")
+
+    sys.exit(1 if failed else 0)
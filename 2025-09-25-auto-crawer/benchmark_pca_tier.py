@@ -0,0 +1,136 @@
+import time
+import argparse
+
+import numpy as np
+import chromadb
+
+from pca_tier import fit_pca, project, read_collection
+from corpus_dataset import iter_qa_records
+
+# =========================
+# 설정
+# =========================
+TOP_K = 5
+NUM_QUERIES = 200
+QA_JSONL = "./google_api_qa_dataset.jsonl"
+EMBED_MODEL = "BAAI/bge-m3"
+
+
+# =========================
+# 쿼리 준비
+# =========================
+def load_query_vectors(jsonl_path, num_queries, seed=0):
+    """QA 데이터셋의 질문을 bge-m3로 임베딩해 쿼리로 사용 (서빙과 동일하게 prefix 없음)."""
+    from sentence_transformers import SentenceTransformer
+
+    questions = [obj["question"] for obj in iter_qa_records(jsonl_path) if obj.get("question")]
+
+    rng = np.random.default_rng(seed)
+    if len(questions) > num_queries:
+        questions = [questions[i] for i in rng.choice(len(questions), num_queries, replace=False)]
+
+    model = SentenceTransformer(EMBED_MODEL)
+    return model.encode(questions, normalize_embeddings=True).astype(np.float32)
+
+
+def sample_self_queries(vectors, num_queries, seed=0, noise=0.05):
+    """모델 없이 돌릴 때: 저장된 벡터에 노이즈를 섞어 쿼리로 사용."""
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.choice(len(vectors), min(num_queries, len(vectors)), replace=False)]
+    noisy = picked + noise * rng.standard_normal(picked.shape).astype(np.float32)
+    return noisy / np.linalg.norm(noisy, axis=1, keepdims=True)
+
+
+# =========================
+# 검색
+# =========================
+def top_k(scores, k):
+    k = min(k, len(scores))
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+def exact_search(vectors, q, k):
+    """정확 검색 (recall 기준값, 지연 비교 대상 아님)"""
+    return top_k(vectors @ q, k)
+
+
+def hnsw_search(collection, q, k):
+    """서빙 원본 차원 검색과 같은 Chroma HNSW 쿼리 → id 목록"""
+    return collection.query(query_embeddings=[q.tolist()], n_results=k, include=[])["ids"][0]
+
+
+def tier_search(collection, reduced, ids, mean, components, q, k, candidates):
+    """
+    서빙 pca_search_by_vector와 같은 경로 → id 목록
+    - 축소 차원 1차 검색 후 후보의 원본 차원 벡터를 Chroma에서 읽어 재채점 (쿼리마다 SQLite 조회 포함)
+    - 텍스트는 청크 저장소에서 최종 k개만 읽는 구성 기준이라 임베딩만 조회
+    """
+    zq = project(q[None, :], mean, components)[0]
+    cand = top_k(reduced @ zq, candidates)
+    data = collection.get(ids=[ids[i] for i in cand], include=["embeddings"])
+    full = np.asarray(data["embeddings"], dtype=np.float32)
+    return [data["ids"][i] for i in top_k(full @ q, k)]
+
+
+def percentile_ms(samples, p):
+    return float(np.percentile(samples, p) * 1000)
+
+
+def run_benchmark(collection, ids, vectors, queries, dims, candidate_list, k):
+    exact_results = [{ids[i] for i in exact_search(vectors, q, k)} for q in queries]
+
+    def measure(search):
+        recalls, times = [], []
+        for q, exact in zip(queries, exact_results):
+            t0 = time.perf_counter()
+            got = search(q)
+            times.append(time.perf_counter() - t0)
+            recalls.append(len(exact & set(got)) / len(exact))
+        return np.mean(recalls), percentile_ms(times, 50), percentile_ms(times, 99)
+
+    print(f"\n벡터 {vectors.shape[0]}개 x {vectors.shape[1]}차원 / 쿼리 {len(queries)}개 / k={k}")
+    print(
+        f"{'방식':<22}{'recall@k':>10}{'p50(ms)':>10}{'p99(ms)':>10}{'스캔MB':>10}"
+    )
+    recall, p50, p99 = measure(lambda q: hnsw_search(collection, q, k))
+    print(f"{'hnsw (서빙 기본)':<22}{recall:>10.3f}{p50:>10.2f}{p99:>10.2f}{'-':>10}")
+
+    for dim in dims:
+        mean, components, explained = fit_pca(vectors, dim)
+        reduced = project(vectors, mean, components)
+        for candidates in candidate_list:
+            recall, p50, p99 = measure(
+                lambda q: tier_search(collection, reduced, ids, mean, components, q, k, candidates)
+            )
+            label = f"pca{dim}+rescore{candidates}"
+            print(
+                f"{label:<22}{recall:>10.3f}{p50:>10.2f}{p99:>10.2f}{reduced.nbytes / 2**20:>10.1f}"
+                f"   (설명 분산 {explained:.3f})"
+            )
+    print("recall@k는 정확 검색 기준, 지연은 서빙과 같은 Chroma 호출 포함 (재채점용 임베딩 조회 / HNSW 쿼리)")
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PCA 1차 검색 vs 원본 차원 검색 recall/지연 비교")
+    parser.add_argument("--db-dir", default="./chroma_text_api")
+    parser.add_argument("--collection", default="google_api_docs")
+    parser.add_argument("--dims", type=int, nargs="+", default=[128, 256, 384])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--num-queries", type=int, default=NUM_QUERIES)
+    parser.add_argument("--queries", default=QA_JSONL, help="질문을 꺼낼 QA JSONL 또는 QA 데이터셋 폴더")
+    parser.add_argument("--self-queries", action="store_true", help="모델 없이 저장 벡터로 쿼리 생성")
+    args = parser.parse_args()
+
+    ids, _, vectors = read_collection(args.db_dir, args.collection)
+    if args.self_queries:
+        queries = sample_self_queries(vectors, args.num_queries)
+    else:
+        queries = load_query_vectors(args.queries, args.num_queries)
+
+    collection = chromadb.PersistentClient(path=args.db_dir).get_collection(name=args.collection)
+    run_benchmark(collection, ids, vectors, queries, args.dims, args.candidates, args.k)
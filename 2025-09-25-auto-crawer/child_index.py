@@ -0,0 +1,177 @@
+import hashlib
+import argparse
+from datetime import date
+
+import torch
+import chromadb
+
+from doc_loader import SEPARATORS
+from embedding_pipeline import run_pipeline
+from embedding_profile import record_profile, resolve_profile
+from index_manifest import hnsw_metadata, update_collection_entry
+
+# =========================
+# 설정
+# =========================
+READ_BATCH = 5000
+DELETE_BATCH = 1000
+CHILD_CHARS = 300  # 자식 스팬 크기 (파라미터 설명 1~2개 정도, 부모 청크는 1200자)
+CHILD_OVERLAP = 50
+CHILD_SUFFIX = "_child"  # 자식 컬렉션명 = 부모 컬렉션명 + 접미어 (같은 DB 폴더)
+BUDGET_CHARS = 3000  # 서빙 시 검색 결과 전체 글자 수 상한 (기존: 부모 청크 5개 ≈ 6000자)
+
+
+# =========================
+# 부모 청크 → 자식 스팬
+# =========================
+_splitter = None
+
+
+def _get_splitter():
+    global _splitter
+    if _splitter is None:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+        _splitter = RecursiveCharacterTextSplitter(
+            chunk_size=CHILD_CHARS, chunk_overlap=CHILD_OVERLAP, separators=SEPARATORS
+        )
+    return _splitter
+
+
+def child_id(parent_id: str, start: int, span: str) -> str:
+    """자식 고정 id = hash(부모 id, 시작 위치, 스팬 내용 hash) → 부모가 그대로면 재실행해도 같은 id"""
+    content_hash = hashlib.sha1(span.encode("utf-8")).hexdigest()
+    return hashlib.sha1(f"{parent_id}|{start}|{content_hash}".encode("utf-8")).hexdigest()
+
+
+def split_parent(parent_id: str, text: str, metadata: dict):
+    """
+    부모 청크 하나 → [(자식 id, 스팬 텍스트, 메타데이터), ...]
+    - 메타데이터는 부모 것(tags, source, chunk_id 등)을 복사하고 parent_id / span_index / start / end 추가
+    - start / end는 부모 텍스트 안의 글자 위치 (서빙 시 이웃 스팬으로 확장할 때 사용)
+    """
+    children = []
+    cursor = 0
+    for i, span in enumerate(_get_splitter().split_text(text)):
+        start = text.find(span, cursor)
+        if start < 0:
+            start = cursor
+        end = start + len(span)
+        cursor = max(start + 1, end - CHILD_OVERLAP)  # 다음 스팬은 겹침 길이 이상 앞에서 시작하지 않음
+        md = dict(metadata)
+        md.pop("dup_sources", None)  # near_dedup.py 출처 목록은 부모에만 유지
+        md.update({"parent_id": parent_id, "span_index": i, "start": start, "end": end})
+        children.append((child_id(parent_id, start, span), span, md))
+    return children
+
+
+# =========================
+# 빌드
+# =========================
+def _read_collection(collection, include):
+    ids, documents, metadatas = [], [], []
+    total = collection.count()
+    for offset in range(0, total, READ_BATCH):
+        data = collection.get(include=include, limit=READ_BATCH, offset=offset)
+        ids.extend(data["ids"])
+        if "documents" in include:
+            documents.extend(data["documents"])
+        if "metadatas" in include:
+            metadatas.extend(md or {} for md in data["metadatas"])
+    return ids, documents, metadatas
+
+
+def build_child_index(
+    db_dir: str,
+    collection_name: str,
+    budget_chars: int = BUDGET_CHARS,
+    workers: int = None,
+):
+    """
+    부모 컬렉션의 청크를 작은 자식 스팬으로 나눠 <collection>_child 컬렉션에 임베딩
+    - 부모 청크가 바뀌지 않았으면 자식 id도 같으므로 새 자식만 임베딩, 부모가 사라진 자식은 삭제
+      (3_insert_vs.py --sync, near_dedup.py 다음에 실행)
+    - 매니페스트 parent_child에 자식 컬렉션명 / 스팬 크기 / 서빙 글자 예산 기록
+    """
+    client = chromadb.PersistentClient(path=str(db_dir))
+    parents = client.get_collection(name=collection_name)
+    parent_ids, documents, metadatas = _read_collection(parents, ["documents", "metadatas"])
+    if not parent_ids:
+        print(f"[{collection_name}] 저장된 문서가 없습니다.")
+        return None
+
+    child_name = collection_name + CHILD_SUFFIX
+    children = client.get_or_create_collection(
+        name=child_name, metadata=hnsw_metadata(db_dir, collection_name) or None
+    )
+    existing = set(_read_collection(children, [])[0])
+
+    desired = {}
+    for pid, text, md in zip(parent_ids, documents, metadatas):
+        desired.update((cid, (cid, span, cmd)) for cid, span, cmd in split_parent(pid, text, md))
+
+    to_delete = sorted(existing - set(desired))
+    for start in range(0, len(to_delete), DELETE_BATCH):
+        children.delete(ids=to_delete[start : start + DELETE_BATCH])
+
+    to_add = [item for cid, item in desired.items() if cid not in existing]
+    if to_add:
+        # 쿼리는 부모 컬렉션 프로필로 임베딩되므로, 자식이 비어 있으면 부모 프로필을 그대로 사용
+        profile = resolve_profile(db_dir, child_name) if existing else resolve_profile(db_dir, collection_name)
+        dims = []
+
+        def write(batch_items, embeddings):
+            children.add(
+                ids=[_id for _id, _, _ in batch_items],
+                embeddings=embeddings.tolist(),
+                documents=[text for _, text, _ in batch_items],
+                metadatas=[meta for _, _, meta in batch_items],
+            )
+            dims.append(embeddings.shape[1])
+
+        run_pipeline(
+            to_add,
+            write,
+            model_name=profile["model"],
+            device="cuda" if torch.cuda.is_available() else "cpu",
+            workers=workers,
+            normalize=profile["normalize"],
+            prefix=profile["passage_prefix"],
+        )
+        record_profile(db_dir, child_name, profile, dims[0] if dims else None)
+
+    config = {
+        "enabled": True,
+        "collection": child_name,
+        "child_chars": CHILD_CHARS,
+        "child_overlap": CHILD_OVERLAP,
+        "budget_chars": budget_chars,
+        "parents": len(parent_ids),
+        "count": len(desired),
+        "built_at": date.today().isoformat(),
+    }
+    update_collection_entry(db_dir, collection_name, "parent_child", config)
+    print(
+        f"[{collection_name}] 자식 스팬 인덱스 {child_name}: 부모 {len(parent_ids)}개 → 자식 {len(desired)}개 "
+        f"(추가 {len(to_add)}개, 삭제 {len(to_delete)}개), 서빙 글자 예산 {budget_chars}자"
+    )
+    return config
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="부모-자식(small-to-big) 청크 인덱스 빌드")
+    parser.add_argument("--db-dir", default="./chroma_text_api")
+    parser.add_argument("--collection", default="google_api_docs")
+    parser.add_argument("--budget-chars", type=int, default=BUDGET_CHARS, help="서빙 시 검색 결과 글자 수 상한")
+    parser.add_argument("--workers", type=int, default=None, help="인코딩 프로세스 수 (기본: CPU 코어 수 / 2)")
+    parser.add_argument("--disable", action="store_true", help="서빙 시 부모 청크 검색으로 되돌리기 (자식 컬렉션은 유지)")
+    args = parser.parse_args()
+
+    if args.disable:
+        update_collection_entry(args.db_dir, args.collection, "parent_child", None)
+        print(f"[{args.collection}] 부모-자식 검색 비활성화")
+    else:
+        build_child_index(args.db_dir, args.collection, args.budget_chars, args.workers)
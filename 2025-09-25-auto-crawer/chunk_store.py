@@ -0,0 +1,182 @@
+import sys
+import json
+import hashlib
+import argparse
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import chromadb
+import zstandard as zstd
+
+from index_manifest import get_collection_entry, update_collection_entry
+
+# 리더(ChunkStore)는 서빙 앱 구현을 그대로 사용 (쓰기 포맷과 읽기 포맷을 한 곳에서 관리)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "TEST_DOCS" / "app"))
+from apichat.utils.chunk_store import DICT_COLUMNS, load_chunk_store
+
+# =========================
+# 설정
+# =========================
+READ_BATCH = 5000
+STORE_DIRNAME = "chunk_store"
+ZSTD_LEVEL = 10
+ZSTD_DICT_SIZE = 112 * 1024  # 청크 단위 개별 압축이라 공용 사전으로 압축률 보완
+ZSTD_DICT_SAMPLES = 5000
+COLUMN_KEYS = set(DICT_COLUMNS) | {"chunk_id"}  # 나머지 메타데이터 키(last_verified, dup_sources 등)는 JSON 컬럼
+
+
+# =========================
+# 쓰기
+# =========================
+def _dict_encode(values):
+    """문자열 컬럼 → (codes int32, vocab)"""
+    vocab, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return codes.astype(np.int32), vocab
+
+
+def ids_fingerprint(ids) -> str:
+    """id 집합 지문 (정렬한 id의 sha1, 저장소가 컬렉션과 같은 id를 가졌는지 비교용)"""
+    h = hashlib.sha1()
+    for _id in sorted(ids):
+        h.update(_id.encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def write_chunk_store(out_dir: Path, ids, documents, metadatas):
+    """
+    청크 텍스트/메타데이터를 memory-map 가능한 컬럼 파일로 저장
+    - blob.bin + offsets.npy: 청크별 zstd 압축 텍스트를 이어붙인 파일과 오프셋
+    - <col>_codes.npy + <col>_vocab.npy: tags / source / source_file 사전 인코딩
+    - chunk_id.npy: 원문 청크 번호 (QA 레코드는 -1)
+    - extra.bin + extra_offsets.npy: 그 밖의 메타데이터 키를 행별 JSON으로 (없으면 빈 구간)
+    - ids.npy, id_sorted.npy, id_rows.npy: row → id / id → row(이진 탐색) 맵
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    raw = [doc.encode("utf-8") for doc in documents]
+
+    rng = np.random.default_rng(0)
+    sample_idx = rng.choice(len(raw), min(ZSTD_DICT_SAMPLES, len(raw)), replace=False)
+    try:
+        dict_data = zstd.train_dictionary(ZSTD_DICT_SIZE, [raw[i] for i in sample_idx])
+        (out_dir / "zstd_dict.bin").write_bytes(dict_data.as_bytes())
+    except zstd.ZstdError:
+        # 샘플이 너무 적으면 사전 없이 압축
+        dict_data = None
+        (out_dir / "zstd_dict.bin").unlink(missing_ok=True)
+    compressor = zstd.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dict_data)
+
+    offsets = np.zeros(len(raw) + 1, dtype=np.uint64)
+    with open(out_dir / "blob.bin", "wb") as f:
+        for i, data in enumerate(raw):
+            block = compressor.compress(data)
+            f.write(block)
+            offsets[i + 1] = offsets[i] + len(block)
+    np.save(out_dir / "offsets.npy", offsets)
+
+    metadatas = [md or {} for md in metadatas]
+    for col in DICT_COLUMNS:
+        codes, vocab = _dict_encode([md.get(col) or "" for md in metadatas])
+        np.save(out_dir / f"{col}_codes.npy", codes)
+        np.save(out_dir / f"{col}_vocab.npy", vocab)
+    chunk_ids = [md.get("chunk_id") for md in metadatas]
+    np.save(out_dir / "chunk_id.npy", np.asarray([-1 if c is None else c for c in chunk_ids], dtype=np.int32))
+
+    extra_offsets = np.zeros(len(metadatas) + 1, dtype=np.uint64)
+    with open(out_dir / "extra.bin", "wb") as f:
+        for i, md in enumerate(metadatas):
+            extra = {key: value for key, value in md.items() if key not in COLUMN_KEYS}
+            data = json.dumps(extra, ensure_ascii=False).encode("utf-8") if extra else b""
+            f.write(data)
+            extra_offsets[i + 1] = extra_offsets[i] + len(data)
+    np.save(out_dir / "extra_offsets.npy", extra_offsets)
+
+    ids = np.asarray(ids, dtype=str)
+    order = np.argsort(ids)
+    np.save(out_dir / "ids.npy", ids)
+    np.save(out_dir / "id_sorted.npy", ids[order])
+    np.save(out_dir / "id_rows.npy", order.astype(np.int64))
+
+    return {"raw_bytes": sum(len(d) for d in raw), "blob_bytes": int(offsets[-1])}
+
+
+def build_chunk_store(db_dir: str, collection_name: str):
+    """Chroma 컬렉션의 문서/메타데이터를 청크 저장소로 내보내기 (임베딩 제외)."""
+    client = chromadb.PersistentClient(path=str(db_dir))
+    collection = client.get_collection(name=collection_name)
+    total = collection.count()
+
+    ids, documents, metadatas = [], [], []
+    for offset in range(0, total, READ_BATCH):
+        data = collection.get(include=["documents", "metadatas"], limit=READ_BATCH, offset=offset)
+        ids.extend(data["ids"])
+        documents.extend(data["documents"])
+        metadatas.extend(data["metadatas"])
+
+    if not ids:
+        print(f"[{collection_name}] 저장된 문서가 없습니다.")
+        return None
+
+    rel_dir = Path(STORE_DIRNAME) / collection_name
+    stats = write_chunk_store(Path(db_dir) / rel_dir, ids, documents, metadatas)
+
+    config = {
+        "enabled": True,
+        "path": rel_dir.as_posix(),
+        "count": len(ids),
+        "compression": "zstd",
+        "ids_sha1": ids_fingerprint(ids),
+        "built_at": date.today().isoformat(),
+        **stats,
+    }
+    update_collection_entry(db_dir, collection_name, "chunk_store", config)
+    print(
+        f"[{collection_name}] 청크 저장소 생성 완료: {len(ids)}개, "
+        f"{stats['raw_bytes'] / 2**20:.1f}MB → {stats['blob_bytes'] / 2**20:.1f}MB"
+    )
+    return config
+
+
+# =========================
+# 조회
+# =========================
+def collection_ids(collection):
+    """컬렉션의 전체 id (문서 / 메타데이터 없이 id만 조회)"""
+    ids = []
+    for offset in range(0, collection.count(), READ_BATCH):
+        ids.extend(collection.get(include=[], limit=READ_BATCH, offset=offset)["ids"])
+    return ids
+
+
+def ids_for_tag(collection, db_dir: str, tag: str):
+    """
+    태그에 해당하는 문서 id 목록
+    - 청크 저장소가 컬렉션과 같은 id 집합이면 태그 컬럼만 읽음 (SQLite 전체 메타데이터 조회 없음)
+    - 없거나 id 지문이 다르면(저장소 생성 뒤 추가 / 삭제, 수가 같아도) Chroma where 필터로 id만 조회
+    """
+    store = load_chunk_store(db_dir, collection.name)
+    if store is not None:
+        config = get_collection_entry(db_dir, collection.name)["chunk_store"]
+        if config.get("ids_sha1") == ids_fingerprint(collection_ids(collection)):
+            return store.ids[store.rows_for_tags([tag])].tolist()
+    return collection.get(where={"tags": tag}, include=[])["ids"]
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chroma 컬렉션 → memory-map 청크 저장소 내보내기")
+    parser.add_argument("--db-dir", default="./chroma_text_api")
+    parser.add_argument("--collection", default="google_api_docs")
+    parser.add_argument(
+        "--if-stale", action="store_true", help="id 변경으로 stale 표시됐거나 아직 저장소가 없을 때만 빌드"
+    )
+    args = parser.parse_args()
+
+    config = get_collection_entry(args.db_dir, args.collection).get("chunk_store")
+    if args.if_stale and config and not config.get("stale"):
+        print(f"[{args.collection}] 청크 저장소 최신 상태, 건너뜀")
+    else:
+        build_chunk_store(args.db_dir, args.collection)
@@ -0,0 +1,120 @@
+import sys
+import argparse
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import chromadb
+from tqdm import tqdm
+
+from index_manifest import get_collection_entry, stale_tier_config, update_collection_entry
+
+# 청크 키 규칙 / int8 스케일은 서빙 리더(reranker_colbert.py)와 공유 (저장소 읽기 / MaxSim은 서빙 코드 하나만 둠)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "TEST_DOCS" / "app"))
+from apichat.utils.reranker_colbert import INT8_SCALE, chunk_key
+
+# =========================
+# 설정
+# =========================
+EMBED_MODEL = "BAAI/bge-m3"
+ENCODE_BATCH = 16
+MAX_LENGTH = 1024
+READ_BATCH = 2000
+STORE_DIRNAME = "colbert_store"
+
+
+# =========================
+# 압축
+# =========================
+def quantize(vecs: np.ndarray) -> np.ndarray:
+    """정규화된 토큰 벡터를 int8로 압축 (float32 대비 1/4, 성분이 [-1, 1] 범위라 INT8_SCALE 배)."""
+    return np.clip(np.rint(vecs * INT8_SCALE), -127, 127).astype(np.int8)
+
+
+# =========================
+# 빌드
+# =========================
+def build_colbert_store(db_dir: str, collection_name: str):
+    """
+    컬렉션 청크를 bge-m3 multi-vector로 인코딩해 int8 토큰 벡터 저장소 생성
+    - tokens.npy: 모든 청크 토큰 벡터를 이어붙인 (T, 1024) int8
+    - offsets.npy: 청크 i의 토큰은 tokens[offsets[i]:offsets[i+1]]
+    """
+    from FlagEmbedding import BGEM3FlagModel
+
+    client = chromadb.PersistentClient(path=str(db_dir))
+    collection = client.get_collection(name=collection_name)
+    total = collection.count()
+    if total == 0:
+        print(f"[{collection_name}] 저장된 문서가 없습니다.")
+        return None
+
+    model = BGEM3FlagModel(EMBED_MODEL, use_fp16=False)
+
+    rel_dir = Path(STORE_DIRNAME) / collection_name
+    out_dir = Path(db_dir) / rel_dir
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    ids, keys, lengths = [], [], []
+    token_parts = []
+    for offset in tqdm(range(0, total, READ_BATCH), desc=f"[{collection_name}] multi-vector 인코딩"):
+        data = collection.get(include=["documents", "metadatas"], limit=READ_BATCH, offset=offset)
+        out = model.encode(
+            data["documents"],
+            batch_size=ENCODE_BATCH,
+            max_length=MAX_LENGTH,
+            return_dense=False,
+            return_sparse=False,
+            return_colbert_vecs=True,
+        )
+        for _id, md, vecs in zip(data["ids"], data["metadatas"], out["colbert_vecs"]):
+            ids.append(_id)
+            keys.append(chunk_key(md or {}))
+            lengths.append(len(vecs))
+            token_parts.append(quantize(np.asarray(vecs, dtype=np.float32)))
+
+    tokens = np.concatenate(token_parts)
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    np.save(out_dir / "tokens.npy", tokens)
+    np.save(out_dir / "offsets.npy", offsets)
+    np.save(out_dir / "ids.npy", np.asarray(ids))
+    np.save(out_dir / "keys.npy", np.asarray(keys))
+
+    config = {
+        "enabled": True,
+        "model": EMBED_MODEL,
+        "path": rel_dir.as_posix(),
+        "count": len(ids),
+        "tokens": int(len(tokens)),
+        "dtype": "int8",
+        "built_at": date.today().isoformat(),
+    }
+    update_collection_entry(db_dir, collection_name, "colbert", config)
+    print(
+        f"[{collection_name}] multi-vector 저장 완료: 청크 {len(ids)}개, "
+        f"토큰 {len(tokens)}개 ({tokens.nbytes / 2**20:.1f}MB)"
+    )
+    if not (get_collection_entry(db_dir, collection_name).get("sparse") or {}).get("enabled"):
+        print(f"⚠️ [{collection_name}] sparse 모드가 꺼져 있어 서빙 시 재정렬 안 함 (sparse_index.py 먼저 실행)")
+    return config
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="bge-m3 multi-vector(ColBERT) 재정렬용 토큰 벡터 저장소 빌드")
+    parser.add_argument("--db-dir", default="./chroma_text_api")
+    parser.add_argument("--collection", default="google_api_docs")
+    parser.add_argument("--disable", action="store_true", help="서빙 시 MaxSim 재정렬 끄기")
+    parser.add_argument("--if-stale", action="store_true", help="id 변경으로 stale 표시된 경우에만 다시 빌드")
+    args = parser.parse_args()
+
+    if args.disable:
+        update_collection_entry(args.db_dir, args.collection, "colbert", None)
+        print(f"[{args.collection}] MaxSim 재정렬 비활성화")
+    elif args.if_stale:
+        if stale_tier_config(args.db_dir, args.collection, "colbert"):
+            build_colbert_store(args.db_dir, args.collection)
+    else:
+        build_colbert_store(args.db_dir, args.collection)
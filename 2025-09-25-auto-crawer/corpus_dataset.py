@@ -0,0 +1,350 @@
+import re
+import json
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+from doc_loader import extract_source_url
+from doc_cleaner import DocCleaner, TokenReport, iter_docs, learn_boilerplate
+from qa_ids import record_id
+
+# =========================
+# 설정
+# =========================
+API_DATA_DIR = "./GOOGLE_API_DATA"
+QA_INPUTS = ["./google_api_qa_dataset.jsonl", "./GOOGLE_API_DATA_QA"]
+CORPUS_DIR = "./corpus"
+PAGES_DIRNAME = "pages"
+QA_DIRNAME = "qa"
+BOILERPLATE_FILENAME = "boilerplate.json"  # doc_cleaner.py로 학습한 태그별 상용구 줄
+WRITE_BATCH = 256  # RecordBatch 당 행 수
+FORMATS = {"arrow": "ipc", "parquet": "parquet"}  # arrow(IPC, 비압축)는 memory-map으로 복사 없이 읽힘
+
+PAGE_SCHEMA = pa.schema(
+    [
+        ("tag", pa.string()),
+        ("path", pa.string()),  # API_DATA_DIR 기준 상대 경로
+        ("source_file", pa.string()),
+        ("url", pa.string()),
+        ("last_updated", pa.string()),  # "[YYYY-MM-DD] Source URL:" 헤더의 날짜 (없으면 null)
+        ("content_sha1", pa.string()),  # text 컬럼의 sha1 (3_insert_vs.py --sync 변경 감지용)
+        ("text", pa.large_string()),  # 헤더 포함 본문 (기본은 상용구 제거 후, --raw면 원문 그대로)
+    ]
+)
+
+QA_SCHEMA = pa.schema(
+    [
+        ("tag", pa.string()),  # 파티션 키 (tags의 첫 번째 값)
+        ("id", pa.string()),
+        ("question", pa.large_string()),
+        ("answer", pa.large_string()),
+        ("tags", pa.string()),
+        ("url", pa.string()),  # 첫 번째 출처 URL
+        ("sources", pa.list_(pa.string())),  # 출처 URL 전체 (이전 API별 스크립트 레코드는 여러 개)
+        ("source_file", pa.string()),
+        ("last_verified", pa.string()),
+        ("content_sha1", pa.string()),  # 질문+답변 sha1
+        ("origin", pa.string()),  # 레코드를 읽은 JSONL 파일명
+        ("extra", pa.string()),  # 위 컬럼에 없는 나머지 필드 (JSON)
+    ]
+)
+
+QA_COLUMNS = {"id", "question", "answer", "tags", "source", "sources", "source_file", "last_verified"}
+PARTITIONING = ds.partitioning(pa.schema([("tag", pa.string())]), flavor="hive")
+HEADER_DATE = re.compile(r"^\[([^\]]*)\]\s*Source\s*URL\s*:", re.I)
+
+
+# =========================
+# 헤더 파싱
+# =========================
+def parse_last_updated(content: str):
+    """1_update_docs.py 헤더 "[날짜] Source URL: ..."에서 날짜 추출 (이전 형식 파일은 None)"""
+    match = HEADER_DATE.match(content)
+    if not match:
+        return None
+    return match.group(1).strip() or None
+
+
+# =========================
+# 쓰기
+# =========================
+def _batches(rows, schema, size=WRITE_BATCH):
+    """dict 행 제너레이터 → RecordBatch 제너레이터 (size 행씩만 메모리에 올림)"""
+    buf = []
+    for row in rows:
+        buf.append(row)
+        if len(buf) >= size:
+            yield pa.RecordBatch.from_pylist(buf, schema=schema)
+            buf = []
+    if buf:
+        yield pa.RecordBatch.from_pylist(buf, schema=schema)
+
+
+def _write_dataset(rows, schema, out_dir: Path, fmt: str):
+    """
+    tag 파티션(hive: tag=<tag>/) 데이터셋으로 저장
+    - 임시 폴더에 쓴 뒤 교체 → 쓰는 도중 로더가 반쯤 쓴 데이터셋을 읽지 않음
+    """
+    tmp_dir = out_dir.with_name(out_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    count = 0
+
+    def counted():
+        nonlocal count
+        for batch in _batches(rows, schema):
+            count += batch.num_rows
+            yield batch
+
+    ds.write_dataset(
+        counted(),
+        tmp_dir,
+        schema=schema,
+        format=FORMATS[fmt],
+        partitioning=PARTITIONING,
+        basename_template="part-{i}." + fmt,
+        max_rows_per_group=64 * 1024,
+    )
+    shutil.rmtree(out_dir, ignore_errors=True)
+    tmp_dir.rename(out_dir)
+    return count
+
+
+def _page_rows(api_data_dir: Path, cleaner: DocCleaner = None, report: TokenReport = None):
+    for rel, tag, content in iter_docs(api_data_dir):
+        text = cleaner.clean(content, tag, rel) if cleaner else content
+        if report:
+            report.add(tag, content, text)
+        yield {
+            "tag": tag,
+            "path": rel,
+            "source_file": Path(rel).name,
+            "url": extract_source_url(content) or None,
+            "last_updated": parse_last_updated(content),
+            "content_sha1": hashlib.sha1(text.encode("utf-8")).hexdigest(),
+            "text": text,
+        }
+
+
+def load_cleaner(api_data_dir: Path, corpus_dir, relearn: bool = False) -> DocCleaner:
+    """
+    상용구 모델 준비 (<corpus_dir>/boilerplate.json)
+    - 파일이 있으면 그대로 재사용: 상용구 줄 / 원본을 남길 문서는 코퍼스 전체 비율 / 순서로 정해지므로,
+      매번 다시 학습하면 새 문서 몇 개에도 바뀌지 않은 문서의 정제 결과(content_sha1)가 달라져 --sync가 재임베딩함
+    - 모델에 없는 새 태그만 그 태그 문서로 학습해 추가
+    - relearn=True거나 파일이 없으면 전체 다시 학습
+    """
+    path = Path(corpus_dir) / BOILERPLATE_FILENAME
+    if relearn or not path.exists():
+        cleaner = DocCleaner(learn_boilerplate(iter_docs(api_data_dir)))
+        print(f"[BOILERPLATE] 전체 학습: 태그 {len(cleaner.model)}개 → {path}")
+    else:
+        cleaner = DocCleaner.load(path)
+        new_tags = {tag for _, tag, _ in iter_docs(api_data_dir)} - cleaner.model.keys()
+        if new_tags:
+            docs = (doc for doc in iter_docs(api_data_dir) if doc[1] in new_tags)
+            cleaner.model.update(learn_boilerplate(docs))
+            print(f"[BOILERPLATE] 기존 모델 재사용, 새 태그만 학습: {', '.join(sorted(new_tags))}")
+        else:
+            print(f"[BOILERPLATE] 기존 모델 재사용: {path} (다시 학습하려면 --relearn)")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cleaner.save(path)
+    return cleaner
+
+
+def pack_pages(
+    api_data_dir=API_DATA_DIR, corpus_dir=CORPUS_DIR, fmt="arrow", clean: bool = True, relearn: bool = False
+):
+    """
+    크롤링 txt 문서 → <corpus_dir>/pages/tag=<tag>/part-0.<fmt>
+    - clean: 태그별 상용구(내비게이션, 피드백 위젯, 공통 안내문) 제거 + 링크 주석 압축 (doc_cleaner.py)
+      상용구 모델은 <corpus_dir>/boilerplate.json을 재사용 (relearn=True면 다시 학습), 정제 전/후 토큰 수는 태그별로 출력
+    """
+    api_data_dir = Path(api_data_dir)
+    if not api_data_dir.exists():
+        print(f"데이터 디렉토리가 존재하지 않습니다: {api_data_dir}")
+        return 0
+
+    cleaner, report = None, None
+    if clean:
+        cleaner = load_cleaner(api_data_dir, corpus_dir, relearn)
+        report = TokenReport()
+
+    out_dir = Path(corpus_dir) / PAGES_DIRNAME
+    count = _write_dataset(_page_rows(api_data_dir, cleaner, report), PAGE_SCHEMA, out_dir, fmt)
+    print(f"✅ 문서 {count}개 → {out_dir}")
+    if report:
+        report.print()
+    return count
+
+
+def _jsonl_files(inputs):
+    for path in map(Path, inputs):
+        if path.is_dir():
+            yield from sorted(path.glob("*.jsonl"))
+        elif path.exists():
+            yield path
+
+
+def _qa_rows(inputs):
+    """QA JSONL 레코드 → 컬럼 행 (같은 id는 처음 나온 것만)"""
+    seen = set()
+    for jsonl_path in _jsonl_files(inputs):
+        with open(jsonl_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                obj = json.loads(line)
+                q, a = obj.get("question"), obj.get("answer")
+                if not q:
+                    continue
+                _id = record_id(obj)
+                if _id in seen:
+                    continue
+                seen.add(_id)
+
+                tags = obj.get("tags")
+                tags = ",".join(tags) if isinstance(tags, list) else (tags or "")
+                sources = obj.get("source") or obj.get("sources") or []
+                sources = [sources] if isinstance(sources, str) else sources
+                extra = {k: v for k, v in obj.items() if k not in QA_COLUMNS}
+                yield {
+                    "tag": tags.split(",")[0].strip() or "untagged",
+                    "id": _id,
+                    "question": q,
+                    "answer": a or "",
+                    "tags": tags,
+                    "url": sources[0] if sources else None,
+                    "sources": list(sources),
+                    "source_file": obj.get("source_file"),
+                    "last_verified": obj.get("last_verified"),
+                    "content_sha1": hashlib.sha1(f"{q}\n{a or ''}".encode("utf-8")).hexdigest(),
+                    "origin": jsonl_path.name,
+                    "extra": json.dumps(extra, ensure_ascii=False) if extra else None,
+                }
+
+
+def pack_qa(inputs=QA_INPUTS, corpus_dir=CORPUS_DIR, fmt="arrow"):
+    """QA JSONL 파일/폴더 → <corpus_dir>/qa/tag=<tag>/part-0.<fmt>"""
+    out_dir = Path(corpus_dir) / QA_DIRNAME
+    count = _write_dataset(_qa_rows(inputs), QA_SCHEMA, out_dir, fmt)
+    print(f"✅ QA {count}개 → {out_dir}")
+    return count
+
+
+# =========================
+# 읽기
+# =========================
+def open_dataset(path):
+    """
+    데이터셋 열기 (memory-map 파일 시스템, 포맷은 파일 확장자로 판단)
+    - 폴더가 없거나 비어 있으면 None
+    """
+    path = Path(path)
+    first = next(path.rglob("part-*.*"), None) if path.is_dir() else None
+    if first is None:
+        return None
+    return ds.dataset(
+        str(path),
+        format=FORMATS[first.suffix.lstrip(".")],
+        partitioning=PARTITIONING,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def _tag_filter(tags):
+    return ds.field("tag").isin(list(tags)) if tags else None
+
+
+def iter_pages(corpus_dir=CORPUS_DIR, tags=None, columns=None, paths=None):
+    """
+    문서 행을 dict로 순회 (batch 단위로만 메모리에 올림)
+    - tags: 읽을 파티션 / columns: 읽을 컬럼 (text를 빼면 본문은 디스크에서 읽지 않음)
+    - paths: 이 상대 경로 집합에 속한 행만 반환
+    """
+    dataset = open_dataset(Path(corpus_dir) / PAGES_DIRNAME)
+    if dataset is None:
+        return
+    expr = _tag_filter(tags)
+    if paths is not None:
+        path_expr = ds.field("path").isin(list(paths))
+        expr = path_expr if expr is None else expr & path_expr
+    for batch in dataset.to_batches(columns=columns, filter=expr):
+        yield from batch.to_pylist()
+
+
+def _qa_record(row):
+    """컬럼 행 → 기존 JSONL 레코드 형식 (source는 출처 URL 전체 리스트)"""
+    record = json.loads(row["extra"]) if row.get("extra") else {}
+    sources = row.get("sources")
+    if sources is None:  # sources 컬럼이 없던 이전 데이터셋
+        sources = [row["url"]] if row.get("url") else []
+    record.update(
+        {
+            "id": row["id"],
+            "question": row["question"],
+            "answer": row["answer"],
+            "source": sources,
+            "tags": row["tags"],
+            "last_verified": row["last_verified"],
+            "source_file": row["source_file"],
+        }
+    )
+    return record
+
+
+def iter_qa_records(source, tags=None):
+    """
+    QA 레코드 순회 (JSONL 파일 또는 QA 데이터셋 폴더 둘 다 지원)
+    - 데이터셋이면 memory-map으로 읽고 JSONL과 같은 dict 형식으로 반환
+    """
+    path = Path(source)
+    if path.is_dir():
+        dataset = open_dataset(path)
+        if dataset is None:
+            return
+        for batch in dataset.to_batches(filter=_tag_filter(tags)):
+            for row in batch.to_pylist():
+                yield _qa_record(row)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def load_qa_records(source, tags=None):
+    return list(iter_qa_records(source, tags))
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="크롤링 문서 / QA JSONL → tag 파티션 Arrow(Parquet) 데이터셋")
+    parser.add_argument("target", nargs="?", choices=["pages", "qa", "all"], default="all")
+    parser.add_argument("--api-data-dir", default=API_DATA_DIR)
+    parser.add_argument("--qa-inputs", nargs="+", default=QA_INPUTS, help="QA JSONL 파일 또는 JSONL 폴더")
+    parser.add_argument("--corpus-dir", default=CORPUS_DIR)
+    parser.add_argument(
+        "--format", choices=list(FORMATS), default="arrow",
+        help="arrow: memory-map 읽기용 (기본) / parquet: 압축 보관·공유용",
+    )
+    parser.add_argument("--raw", action="store_true", help="상용구 제거 없이 원문 그대로 저장")
+    parser.add_argument(
+        "--relearn", action="store_true",
+        help="boilerplate.json을 재사용하지 않고 상용구를 전체 다시 학습 (정제 결과가 바뀐 문서는 --sync 때 재임베딩)",
+    )
+    args = parser.parse_args()
+
+    if args.target in ("pages", "all"):
+        pack_pages(args.api_data_dir, args.corpus_dir, args.format, clean=not args.raw, relearn=args.relearn)
+    if args.target in ("qa", "all"):
+        pack_qa(args.qa_inputs, args.corpus_dir, args.format)
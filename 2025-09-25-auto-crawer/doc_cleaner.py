@@ -0,0 +1,264 @@
+import re
+import json
+import argparse
+from pathlib import Path
+from collections import Counter, defaultdict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from doc_loader import api_tag_from_path, extract_source_url
+
+# =========================
+# 설정
+# =========================
+API_DATA_DIR = "./GOOGLE_API_DATA"
+MIN_DOCS = 5  # 이 문서 수 이상에서 반복되는 줄만 상용구 후보
+DF_RATIO = 0.2  # 태그 문서의 20% 이상에 똑같이 나오는 줄 = 상용구 (내비게이션, 피드백 위젯, 공통 안내문)
+HEAD_LINES = 15  # 문서 앞 영역 최대 줄 수 (브레드크럼, 번역 안내, bookmark_border 등 / 첫 긴 문장 전까지)
+TAIL_LINES = 5  # 문서 뒤 영역 (의견 보내기, 도움이 되었나요? 등)
+MIN_LETTERS = 4
+NOTICE_LETTERS = 20  # 본문 중간에서는 이 글자 수 이상인 문장(공통 안내문)만 상용구로 봄 (소제목 보호)
+DROP_QUERY_PARAMS = {"hl", "authuser"}  # 링크 주석에서 지울 로케일/계정 파라미터
+
+LINK_ANNOTATION = re.compile(r"\s?\[(https?://[^\]\s]+)\]")
+HEADER_LINE = re.compile(r"^(\[[^\]]*\]\s*)?Source\s*URL\s*:", re.I)
+CODE_CHARS = re.compile(r"[{}();=<>\"`]")
+LETTERS = re.compile(r"[A-Za-z가-힣]")
+
+
+# =========================
+# 줄 판별
+# =========================
+def _split_header(content: str):
+    """첫 줄이 "[날짜] Source URL:" 헤더면 (헤더, 본문 줄 목록)으로 분리"""
+    lines = content.split("\n")
+    if lines and HEADER_LINE.match(lines[0]):
+        return lines[0], lines[1:]
+    return None, lines
+
+
+def _letters(line: str) -> int:
+    return len(LETTERS.findall(LINK_ANNOTATION.sub("", line)))
+
+
+def _is_prose(line: str) -> bool:
+    """
+    상용구로 볼 수 있는 줄인지
+    - 코드(괄호/대입/따옴표), 표 행, URL만 있는 줄(OAuth 범위 목록 등)은 반복돼도 본문이라 제외
+    """
+    prose = LINK_ANNOTATION.sub("", line).strip()
+    if _letters(prose) < MIN_LETTERS:
+        return False
+    return not (CODE_CHARS.search(prose) or prose.startswith(("|", "//", "#", "/", "http")))
+
+
+def _head_end(lines, notices) -> int:
+    """머리 영역 끝 = 공통 안내문이 아닌 첫 긴 문장 (최대 HEAD_LINES줄)"""
+    for i, line in enumerate(lines[:HEAD_LINES]):
+        if _letters(line) >= NOTICE_LETTERS and line.strip() not in notices:
+            return i
+    return min(HEAD_LINES, len(lines))
+
+
+def _is_candidate(line: str, position: int, head_end: int, tail_start: int) -> bool:
+    """
+    긴 안내 문장은 위치와 상관없이, 짧은 줄은 문서 앞/뒤 영역에서만 상용구 후보
+    (본문 중간의 요청 본문 / 응답 본문 같은 소제목 보호)
+    """
+    if not _is_prose(line):
+        return False
+    if _letters(line) >= NOTICE_LETTERS:
+        return True
+    return position < head_end or position >= tail_start
+
+
+def _normalize_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if k not in DROP_QUERY_PARAMS])
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, parts.fragment))
+
+
+def compact_links(line: str, page_url: str = "") -> str:
+    """
+    "[https://...]" 링크 주석 압축
+    - 같은 페이지 안의 앵커 링크(목차 등)는 주석 삭제
+    - 나머지는 hl / authuser 파라미터만 제거
+    """
+    page = _normalize_url(page_url).split("#")[0] if page_url else ""
+
+    def repl(match):
+        url = _normalize_url(match.group(1))
+        base, _, fragment = url.partition("#")
+        if fragment and base == page:
+            return ""
+        return f" [{url}]"
+
+    return LINK_ANNOTATION.sub(repl, line)
+
+
+# =========================
+# 학습
+# =========================
+def learn_boilerplate(docs, min_docs: int = MIN_DOCS, df_ratio: float = DF_RATIO):
+    """
+    태그별로 여러 문서에 똑같이 나오는 줄 학습
+    - docs: (문서 키, 태그, 원문) 제너레이터 (문서별로 앞 HEAD_LINES줄과 줄 집합만 남김)
+    - 긴 안내 문장을 먼저 학습한 뒤, 그 안내문을 건너뛴 머리 영역에서 짧은 줄(브레드크럼 등) 학습
+    - 반환: {태그: {"docs": 문서 수, "lines": {상용구 줄: 원본을 남길 문서 키}}}
+    - 처음 나온 문서 1곳에는 그대로 남겨서 공통 안내문 내용 자체가 인덱스에서 사라지지 않게 함
+    """
+    long_freq = defaultdict(Counter)
+    num_docs = Counter()
+    seen_docs = []
+    for key, tag, content in docs:
+        _, lines = _split_header(content)
+        tail_start = len(lines) - TAIL_LINES
+        long_lines, tail_short = set(), set()
+        for i, line in enumerate(lines):
+            if not _is_prose(line):
+                continue
+            if _letters(line) >= NOTICE_LETTERS:
+                long_lines.add(line.strip())
+            elif i >= tail_start:
+                tail_short.add(line.strip())
+        long_freq[tag].update(long_lines)
+        num_docs[tag] += 1
+        seen_docs.append((key, tag, lines[:HEAD_LINES], long_lines, tail_short))
+
+    cutoffs = {tag: max(min_docs, df_ratio * n) for tag, n in num_docs.items()}
+    notices = {
+        tag: {line for line, df in counter.items() if df >= cutoffs[tag]}
+        for tag, counter in long_freq.items()
+    }
+
+    doc_freq = defaultdict(Counter)
+    first_doc = defaultdict(dict)
+    for key, tag, head, long_lines, tail_short in seen_docs:
+        head_end = _head_end(head, notices[tag])
+        found = long_lines | tail_short
+        found.update(
+            line.strip()
+            for i, line in enumerate(head[:head_end])
+            if _is_prose(line) and _letters(line) < NOTICE_LETTERS
+        )
+        doc_freq[tag].update(found)
+        for line in found:
+            first_doc[tag].setdefault(line, key)
+
+    model = {}
+    for tag, counter in doc_freq.items():
+        lines = {line: first_doc[tag][line] for line, df in sorted(counter.items()) if df >= cutoffs[tag]}
+        model[tag] = {"docs": num_docs[tag], "lines": lines}
+    return model
+
+
+# =========================
+# 정제
+# =========================
+class DocCleaner:
+    """학습한 상용구 줄 삭제 + 링크 주석 압축 + 빈 줄 정리 (Source URL 헤더는 그대로 유지)"""
+
+    def __init__(self, model: dict):
+        self.model = model
+
+    def clean(self, content: str, tag: str, key: str = None) -> str:
+        """key: 학습 때와 같은 문서 키 (원본을 남길 문서면 상용구 줄도 유지)"""
+        header, lines = _split_header(content)
+        page_url = extract_source_url(header) if header else ""
+        boilerplate = self.model.get(tag, {}).get("lines", {})
+        head_end, tail_start = _head_end(lines, boilerplate), len(lines) - TAIL_LINES
+
+        out = [header, ""] if header is not None else []
+        blank = True
+        for i, line in enumerate(lines):
+            keep_in = boilerplate.get(line.strip())
+            if keep_in is not None and keep_in != key and _is_candidate(line, i, head_end, tail_start):
+                continue
+            line = compact_links(line, page_url).rstrip()
+            if not line.strip():
+                if not blank:
+                    out.append("")
+                blank = True
+                continue
+            out.append(line)
+            blank = False
+        return "\n".join(out).rstrip() + "\n"
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.model, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+
+def iter_docs(api_data_dir: Path):
+    """(상대 경로 = 문서 키, 태그, 원문) 순회 (경로순이라 학습/정제 때 같은 순서)"""
+    api_data_dir = Path(api_data_dir)
+    for file_path in sorted(api_data_dir.rglob("*.txt")):
+        try:
+            content = file_path.read_text(encoding="utf-8")
+        except Exception as e:
+            print(f"⚠️ {file_path} 로드 중 오류 발생: {e}")
+            continue
+        yield file_path.relative_to(api_data_dir).as_posix(), api_tag_from_path(file_path), content
+
+
+def learn_from_dir(api_data_dir=API_DATA_DIR) -> DocCleaner:
+    return DocCleaner(learn_boilerplate(iter_docs(api_data_dir)))
+
+
+# =========================
+# 리포트
+# =========================
+class TokenReport:
+    """태그별 정제 전/후 토큰 수 (GPT 프롬프트와 같은 cl100k_base 기준)"""
+
+    def __init__(self):
+        import tiktoken
+
+        self.enc = tiktoken.get_encoding("cl100k_base")
+        self.before = Counter()
+        self.after = Counter()
+
+    def add(self, tag: str, raw: str, cleaned: str):
+        self.before[tag] += len(self.enc.encode(raw, disallowed_special=()))
+        self.after[tag] += len(self.enc.encode(cleaned, disallowed_special=()))
+
+    def print(self):
+        print(f"\n{'태그':<24}{'정제 전':>12}{'정제 후':>12}{'감소':>8}")
+        for tag in sorted(self.before):
+            before, after = self.before[tag], self.after[tag]
+            print(f"{tag:<24}{before:>12,}{after:>12,}{1 - after / max(before, 1):>8.1%}")
+        before, after = sum(self.before.values()), sum(self.after.values())
+        print(f"{'합계':<24}{before:>12,}{after:>12,}{1 - after / max(before, 1):>8.1%}")
+        return {"tokens_before": before, "tokens_after": after}
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="크롤링 문서 상용구/내비게이션 제거 + 토큰 감소량 리포트")
+    parser.add_argument("--api-data-dir", default=API_DATA_DIR)
+    parser.add_argument("--out-dir", default=None, help="정제한 txt를 같은 폴더 구조로 저장 (없으면 리포트만)")
+    parser.add_argument("--model-out", default=None, help="학습한 상용구 줄 목록 JSON 저장 경로")
+    args = parser.parse_args()
+
+    api_data_dir = Path(args.api_data_dir)
+    cleaner = learn_from_dir(api_data_dir)
+    for tag, entry in sorted(cleaner.model.items()):
+        print(f"[{tag}] 문서 {entry['docs']}개 / 상용구 줄 {len(entry['lines'])}개")
+    if args.model_out:
+        cleaner.save(args.model_out)
+
+    report = TokenReport()
+    for rel, tag, content in iter_docs(api_data_dir):
+        cleaned = cleaner.clean(content, tag, rel)
+        report.add(tag, content, cleaned)
+        if args.out_dir:
+            out_path = Path(args.out_dir) / rel
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            out_path.write_text(cleaned, encoding="utf-8")
+    report.print()
@@ -0,0 +1,153 @@
+import os
+import re
+import hashlib
+import multiprocessing as mp
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+# =========================
+# 설정
+# =========================
+CHUNK_SIZE = 1200
+CHUNK_OVERLAP = 150
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+LAST_VERIFIED = "2025-08-19"
+FILES_IN_FLIGHT = 4  # 워커당 동시에 처리 중인 파일 수 (메모리 상한)
+
+
+# =========================
+# 파일 → 청크
+# =========================
+def extract_source_url(content: str) -> str:
+    """문서에서 Source URL 추출"""
+    match = re.search(r"(?i)Source\s*URL\s*:\s*(https?://\S+)", content)
+    return match.group(1).strip() if match else ""
+
+
+def api_tag_from_path(path: Path) -> str:
+    """파일 경로에서 API 태그 추출 (폴더명에서 _docs_crawled 제거)"""
+    folder = path.parent.name
+    return folder.replace("_docs_crawled", "") if folder.endswith("_docs_crawled") else folder
+
+
+def chunk_id(tag: str, source: str, position: int, chunk: str) -> str:
+    """
+    청크 고정 id = hash(태그, Source URL, 청크 위치, 청크 내용 hash)
+    - 내용이 같으면 재실행해도 같은 id → 변경된 청크만 재임베딩 가능
+    """
+    content_hash = hashlib.sha1(chunk.encode("utf-8")).hexdigest()
+    key = f"{tag}|{source}|{position}|{content_hash}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+_splitter = None
+
+
+def _get_splitter():
+    """프로세스당 splitter 1개만 생성해서 재사용"""
+    global _splitter
+    if _splitter is None:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+        _splitter = RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, separators=SEPARATORS
+        )
+    return _splitter
+
+
+def split_document(content: str, tag: str, source_file: str, source_url: str = None):
+    """문서 본문 하나 → [(청크 id, 텍스트, 메타데이터), ...] (source_url이 없으면 헤더에서 추출)"""
+    if source_url is None:
+        source_url = extract_source_url(content)
+
+    chunks = []
+    for i, chunk in enumerate(_get_splitter().split_text(content)):
+        metadata = {
+            "chunk_id": i,
+            "source": source_url,
+            "tags": tag,
+            "source_file": source_file,
+            "last_verified": LAST_VERIFIED,
+        }
+        chunks.append((chunk_id(tag, source_url or source_file, i, chunk), chunk, metadata))
+    return chunks
+
+
+def split_file(file_path):
+    """txt 파일 하나 → [(청크 id, 텍스트, 메타데이터), ...]"""
+    file_path = Path(file_path)
+    content = file_path.read_text(encoding="utf-8")
+    return split_document(content, api_tag_from_path(file_path), file_path.name)
+
+
+def _split_file_safe(file_path):
+    try:
+        return file_path, split_file(file_path), None
+    except Exception as e:
+        return file_path, [], e
+
+
+def _split_record_safe(record):
+    """corpus_dataset.py 문서 행(path, tag, source_file, url, text) 분할"""
+    try:
+        chunks = split_document(
+            record["text"], record["tag"], record["source_file"], record.get("url") or ""
+        )
+        return record["path"], chunks, None
+    except Exception as e:
+        return record["path"], [], e
+
+
+# =========================
+# 스트리밍 로더
+# =========================
+def _iter_pool(split_fn, jobs, workers: int = None):
+    """
+    분할 작업을 프로세스 풀에서 실행하고, 끝나는 순서대로 (키, 청크 목록) 반환
+    - 동시에 처리 중인 작업은 워커 수 x FILES_IN_FLIGHT개로 제한 (전체 코퍼스를 메모리에 올리지 않음)
+    - 실패한 작업은 경고만 출력하고 건너뜀
+    """
+    workers = workers or max(1, (os.cpu_count() or 1) // 2)
+    jobs = iter(jobs)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+        in_flight = set()
+        while True:
+            for job in jobs:
+                in_flight.add(pool.submit(split_fn, job))
+                if len(in_flight) >= workers * FILES_IN_FLIGHT:
+                    break
+            if not in_flight:
+                return
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, chunks, error = future.result()
+                if error is not None:
+                    print(f"⚠️ {key} 로드 중 오류 발생: {error}")
+                    continue
+                yield key, chunks
+
+
+def iter_files(paths, workers: int = None):
+    """txt 파일 읽기 + 분할 → (경로, 청크 목록)"""
+    return _iter_pool(_split_file_safe, paths, workers)
+
+
+def iter_records(records, workers: int = None):
+    """
+    corpus_dataset.iter_pages() 문서 행 분할 → (상대 경로, 청크 목록)
+    - 파일 시스템 순회/헤더 파싱 없이 memory-map 데이터셋에서 바로 읽음 (청크 id는 파일 입력과 동일)
+    """
+    return _iter_pool(_split_record_safe, records, workers)
+
+
+def iter_chunks(paths, workers: int = None):
+    """iter_files 결과를 청크 단위로 펼쳐서 반환 (임베딩 파이프라인 입력)"""
+    for _, chunks in iter_files(paths, workers):
+        yield from chunks
+
+
+def iter_record_chunks(records, workers: int = None):
+    """iter_records 결과를 청크 단위로 펼쳐서 반환"""
+    for _, chunks in iter_records(records, workers):
+        yield from chunks
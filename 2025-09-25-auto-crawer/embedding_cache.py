@@ -0,0 +1,81 @@
+import sqlite3
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+# =========================
+# 설정
+# =========================
+CACHE_PATH = "./embedding_cache.sqlite3"
+QUERY_CHUNK = 500  # sqlite IN 절 변수 개수 제한 회피
+
+
+class EmbeddingCache:
+    """
+    텍스트 hash → 임베딩 벡터 로컬 캐시 (sqlite, float32 BLOB)
+    - 키에 인코더 설정(모델명, 백엔드 torch / onnx-int8 / onnx-fp32, 정규화, max_length)을 포함
+      → 설정이 바뀌면 자동으로 캐시 미스 (다른 인코더 벡터가 섞이지 않음)
+    - 임베딩할 텍스트는 prefix("passage: " 등)까지 포함한 최종 입력 기준
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        path: str = CACHE_PATH,
+        *,
+        backend: str = "torch",
+        normalize: bool = True,
+        max_length: int = None,
+    ):
+        self.model_name = model_name
+        self.signature = f"{model_name}\0{backend}\0{int(normalize)}\0{max_length}"
+        self.path = Path(path)
+        # 한 번에 한 스레드만 쓰면 생성 스레드와 달라도 됨 (QA writer 태스크의 to_thread 등)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vec BLOB NOT NULL)"
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.signature}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts):
+        """캐시에 있는 벡터만 {텍스트 index: 벡터}로 반환"""
+        keys = [self.key(t) for t in texts]
+        found = {}
+        for start in range(0, len(keys), QUERY_CHUNK):
+            part = keys[start : start + QUERY_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                part,
+            ).fetchall()
+            found.update({k: np.frombuffer(v, dtype=np.float32) for k, v in rows})
+        return {i: found[k] for i, k in enumerate(keys) if k in found}
+
+    def put_many(self, texts, vectors):
+        rows = [
+            (self.key(t), np.asarray(v, dtype=np.float32).tobytes())
+            for t, v in zip(texts, vectors)
+        ]
+        self.conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)", rows)
+        self.conn.commit()
+
+    def embed(self, texts, encode_fn) -> np.ndarray:
+        """캐시 미스인 텍스트만 encode_fn으로 임베딩하고 결과를 캐시에 저장"""
+        cached = self.get_many(texts)
+        missing = [i for i in range(len(texts)) if i not in cached]
+        self.hits += len(cached)
+        self.misses += len(missing)
+
+        if missing:
+            new_vecs = np.asarray(encode_fn([texts[i] for i in missing]), dtype=np.float32)
+            self.put_many([texts[i] for i in missing], new_vecs)
+            cached.update(zip(missing, new_vecs))
+
+        return np.stack([cached[i] for i in range(len(texts))]) if texts else np.zeros((0, 0), np.float32)
+
+    def close(self):
+        self.conn.close()
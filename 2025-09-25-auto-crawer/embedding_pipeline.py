@@ -0,0 +1,174 @@
+import os
+import time
+import queue
+import threading
+import multiprocessing as mp
+from itertools import islice
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+from tqdm import tqdm
+
+# =========================
+# 설정
+# =========================
+EMBED_MODEL = "BAAI/bge-m3"
+ENCODE_BATCH = 32  # 길이순 정렬 후 배치 크기 (비슷한 길이끼리 묶여 패딩 최소화)
+SORT_WINDOW = 4096  # 이 개수만큼 토큰화 → 길이순 정렬 → 배치로 나눠 바로 인코딩 시작
+FIRST_WINDOW_BATCHES = 4  # 첫 window는 작게 잡아 입력이 스트리밍될 때 인코딩을 바로 시작
+MAX_LENGTH = 8192
+WRITE_QUEUE_SIZE = 8  # DB 쓰기 대기 배치 수 (가득 차면 인코딩 결과 수집이 대기 → 역압)
+
+
+# =========================
+# 워커 프로세스
+# =========================
+_worker_model = None
+
+
+def _init_worker(model_name, device, num_threads):
+    """워커마다 모델 1회 로드 (코어를 워커 수로 나눠 torch / ONNX Runtime 스레드 지정)"""
+    global _worker_model
+    import torch
+    from onnx_encoder import load_encoder
+
+    torch.set_num_threads(num_threads)
+    _worker_model = load_encoder(model_name, device=device, num_threads=num_threads)
+
+
+def _encode_batch(texts, normalize):
+    return _worker_model.encode(
+        texts, batch_size=len(texts), normalize_embeddings=normalize, convert_to_numpy=True
+    ).astype(np.float32)
+
+
+# =========================
+# 파이프라인
+# =========================
+def _default_workers(device):
+    if device == "cuda":
+        return 1  # GPU 하나에 여러 프로세스를 올리면 오히려 느려짐
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def length_bucketed_batches(tokenizer, items, batch_size, window):
+    """
+    (토큰화 단계) window 단위로 토큰 길이를 계산하고 길이순 정렬 후 배치로 반환
+    - items는 리스트 또는 제너레이터 (window만큼만 메모리에 올림)
+    - 반환: (배치 item 목록, 배치 토큰 수 합, 배치 패딩 포함 토큰 수) 제너레이터
+    """
+    items = iter(items)
+    size = min(window, batch_size * FIRST_WINDOW_BATCHES)
+    while True:
+        part = list(islice(items, size))
+        if not part:
+            return
+        size = window
+        lengths = [
+            len(ids)
+            for ids in tokenizer(
+                [text for _, text, _ in part], truncation=True, max_length=MAX_LENGTH
+            )["input_ids"]
+        ]
+        order = np.argsort(lengths)
+        for b in range(0, len(order), batch_size):
+            idx = order[b : b + batch_size]
+            batch_lengths = [lengths[i] for i in idx]
+            yield [part[i] for i in idx], sum(batch_lengths), max(batch_lengths) * len(idx)
+
+
+def run_pipeline(
+    items,
+    write_fn,
+    model_name: str = EMBED_MODEL,
+    device: str = "cpu",
+    workers: int = None,
+    batch_size: int = ENCODE_BATCH,
+    window: int = SORT_WINDOW,
+    normalize: bool = True,
+    prefix: str = "",
+):
+    """
+    토큰화 → 인코딩(프로세스 풀) → DB 쓰기(스레드)를 겹쳐 실행하는 임베딩 파이프라인
+    - items: (id, text, metadata) 목록 또는 제너레이터 (doc_loader.iter_chunks 등)
+    - write_fn(batch_items, embeddings): 인코딩된 배치를 저장하는 함수 (Chroma add 등)
+    - prefix: 임베딩 입력에만 붙이는 접두어 (예: "passage: "), 저장 문서는 원문 그대로
+    - 동시에 인코딩 중인 배치는 워커 수 x 2개로 제한 (역압)
+    """
+    from transformers import AutoTokenizer
+
+    workers = workers or _default_workers(device)
+    num_threads = max(1, (os.cpu_count() or 1) // workers)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+    writer_error = []
+    total = len(items) if hasattr(items, "__len__") else None
+    progress = tqdm(total=total, desc=f"임베딩 및 저장 (워커 {workers}개)")
+
+    def writer():
+        while True:
+            job = write_queue.get()
+            if job is None:
+                return
+            batch_items, embeddings = job
+            try:
+                if not writer_error:
+                    write_fn(batch_items, embeddings)
+            except Exception as e:
+                writer_error.append(e)
+            progress.update(len(batch_items))
+
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    writer_thread.start()
+
+    count, real_tokens, padded_tokens = 0, 0, 0
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_name, device, num_threads),
+    ) as pool:
+        in_flight = {}
+
+        def drain(return_when):
+            done, _ = wait(in_flight, return_when=return_when)
+            for future in done:
+                write_queue.put((in_flight.pop(future), future.result()))
+
+        for batch_items, real, padded in length_bucketed_batches(
+            tokenizer, items, batch_size, window
+        ):
+            count += len(batch_items)
+            real_tokens += real
+            padded_tokens += padded
+            texts = [prefix + text for _, text, _ in batch_items]
+            in_flight[pool.submit(_encode_batch, texts, normalize)] = batch_items
+            if len(in_flight) >= workers * 2:
+                drain(FIRST_COMPLETED)
+            if writer_error:
+                break
+
+        if in_flight:
+            drain("ALL_COMPLETED")
+
+    write_queue.put(None)
+    writer_thread.join()
+    progress.close()
+    if writer_error:
+        raise writer_error[0]
+
+    elapsed = time.perf_counter() - t0
+    stats = {
+        "chunks": count,
+        "workers": workers,
+        "seconds": round(elapsed, 1),
+        "chunks_per_sec": round(count / max(elapsed, 1e-9), 1),
+        "padding_efficiency": round(real_tokens / max(padded_tokens, 1), 3),
+    }
+    print(
+        f"임베딩 완료: {stats['chunks']}개 청크 / {stats['seconds']}s / "
+        f"{stats['chunks_per_sec']} chunks/s / 패딩 효율 {stats['padding_efficiency']:.1%}"
+    )
+    return stats
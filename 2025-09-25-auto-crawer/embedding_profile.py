@@ -0,0 +1,217 @@
+import argparse
+from datetime import date
+
+import chromadb
+from chromadb.utils.embedding_functions import EmbeddingFunction
+
+from index_manifest import get_collection_entry, mark_tiers_stale, update_collection_entry
+from embedding_cache import EmbeddingCache
+from onnx_encoder import MAX_LENGTH, encoder_backend, load_encoder
+
+# =========================
+# 설정
+# =========================
+READ_BATCH = 5000
+EMBED_MODEL = "BAAI/bge-m3"
+
+# 임베딩 프로필: 컬렉션 벡터를 만든 방식 (매니페스트 embedding_profile에 컬렉션별로 기록)
+# - 입력 스크립트는 기록된 프로필로 새 청크를 임베딩하고, 서빙 쪽 쿼리 임베딩도 같은 프로필로 설정
+# - bge-m3는 query/passage 접두어 없이 학습된 모델이라 기본은 둘 다 빈 문자열
+DEFAULT_PROFILE = {
+    "model": EMBED_MODEL,
+    "query_prefix": "",
+    "passage_prefix": "",
+    "normalize": True,
+    "dim": 1024,
+    "max_length": 8192,
+}
+
+# 저장된 벡터 값에 영향을 주는 항목 (바뀌면 재임베딩, query_prefix만 바뀌면 기록만 갱신)
+VECTOR_KEYS = ("model", "passage_prefix", "normalize", "max_length", "dim")
+
+# 컬렉션별 목표 프로필 (DEFAULT_PROFILE에서 바꿀 항목만)
+TARGET_PROFILES = {}
+
+# 레지스트리 도입 전 컬렉션이 실제로 쓰던 설정 (매니페스트에 프로필이 없는 기존 컬렉션의 기준)
+# - qna_collection은 6_insert_qa_vs.py가 "passage: " 접두어로 임베딩했지만 쿼리는 접두어 없이 검색
+LEGACY_PROFILES = {
+    "qna_collection": {"passage_prefix": "passage: "},
+}
+
+# 마이그레이션 기본 대상 (DB 폴더, 컬렉션)
+COLLECTIONS = [
+    ("./chroma_text_api", "google_api_docs"),
+    ("./chroma_text_api", "google_api_docs_child"),
+    ("./chroma_qa_db", "qna_collection"),
+]
+
+
+# =========================
+# 프로필 조회 / 기록
+# =========================
+def make_profile(**overrides) -> dict:
+    profile = dict(DEFAULT_PROFILE)
+    profile.update(overrides)
+    return profile
+
+
+def target_profile(collection_name: str) -> dict:
+    return make_profile(**TARGET_PROFILES.get(collection_name, {}))
+
+
+def stored_profile(db_dir, collection_name: str):
+    """매니페스트에 기록된 프로필 (없으면 None)"""
+    profile = get_collection_entry(db_dir, collection_name).get("embedding_profile")
+    return make_profile(**profile) if profile else None
+
+
+def _collection_count(db_dir, collection_name: str) -> int:
+    client = chromadb.PersistentClient(path=str(db_dir))
+    try:
+        return client.get_collection(name=collection_name).count()
+    except Exception:
+        return 0
+
+
+def resolve_profile(db_dir, collection_name: str) -> dict:
+    """
+    새 청크를 임베딩할 때 쓸 프로필
+    - 컬렉션이 비어 있으면 맞출 기존 벡터가 없으므로 목표 프로필
+    - 기록된 프로필이 있으면 그대로 (기존 벡터와 같은 방식 유지, 바꾸려면 마이그레이션)
+    - 기록 없이 벡터만 있으면 레지스트리 도입 전 설정
+    """
+    if _collection_count(db_dir, collection_name) == 0:
+        return target_profile(collection_name)
+    profile = stored_profile(db_dir, collection_name)
+    if profile is not None:
+        return profile
+    return make_profile(**LEGACY_PROFILES.get(collection_name, {}))
+
+
+def record_profile(db_dir, collection_name: str, profile: dict, dim: int = None):
+    """프로필 기록 (dim은 실제 임베딩 결과 차원으로 갱신)"""
+    profile = dict(profile)
+    if dim:
+        profile["dim"] = int(dim)
+    profile["recorded_at"] = date.today().isoformat()
+    update_collection_entry(db_dir, collection_name, "embedding_profile", profile)
+    return profile
+
+
+def changed_keys(old: dict, new: dict, keys=VECTOR_KEYS):
+    return [k for k in keys if old.get(k) != new.get(k)]
+
+
+class PassageEmbeddingFunction(EmbeddingFunction):
+    """
+    프로필대로 문서를 임베딩하는 Chroma 임베딩 함수 (QA 입력 스크립트용)
+    - passage_prefix / 정규화 / 모델은 프로필을 따르고, 같은 입력은 embedding_cache.sqlite3에서 재사용
+    - 인코더는 임베딩할 레코드가 있을 때만 로드 (EMBED_BACKEND 설정을 따름)
+    """
+
+    def __init__(self, profile: dict, device: str = None):
+        self.model_name = profile["model"]
+        self.normalize = profile["normalize"]
+        self.prefix = profile["passage_prefix"]
+        self.device = device
+        self.model = None
+        self.cache = EmbeddingCache(
+            self.model_name, backend=encoder_backend(device), normalize=self.normalize, max_length=MAX_LENGTH
+        )
+
+    def encode(self, texts):
+        if self.model is None:
+            self.model = load_encoder(self.model_name, device=self.device)
+        return self.model.encode(texts, normalize_embeddings=self.normalize)
+
+    def __call__(self, texts):
+        texts = [self.prefix + t for t in texts]
+        return self.cache.embed(texts, self.encode).tolist()
+
+
+# =========================
+# 마이그레이션
+# =========================
+def _iter_documents(collection):
+    total = collection.count()
+    for offset in range(0, total, READ_BATCH):
+        data = collection.get(include=["documents"], limit=READ_BATCH, offset=offset)
+        for _id, doc in zip(data["ids"], data["documents"]):
+            yield _id, doc or "", None
+
+
+def _vector_dim(collection):
+    sample = collection.get(limit=1, include=["embeddings"])["embeddings"]
+    return len(sample[0]) if sample is not None and len(sample) else None
+
+
+def migrate_collection(db_dir, collection_name: str, workers: int = None, dry_run: bool = False):
+    """
+    현재 프로필과 목표 프로필 비교 → 벡터에 영향이 있는 항목이 바뀐 컬렉션만 재임베딩
+    - 문서 / 메타데이터 / id는 그대로 두고 embeddings만 update
+    - 실제 벡터 차원이 기록과 다르면(다른 모델로 만든 DB를 받은 경우 등) 재임베딩 대상
+    """
+    client = chromadb.PersistentClient(path=str(db_dir))
+    try:
+        collection = client.get_collection(name=collection_name)
+    except Exception:
+        print(f"[{collection_name}] 컬렉션 없음, 건너뜀 ({db_dir})")
+        return None
+
+    current = resolve_profile(db_dir, collection_name)
+    target = target_profile(collection_name)
+    actual_dim = _vector_dim(collection)
+    if actual_dim is not None:
+        current["dim"] = actual_dim
+
+    changed = changed_keys(current, target)
+    if not changed:
+        if dry_run:
+            print(f"[{collection_name}] 프로필 일치, 재임베딩 불필요")
+        else:
+            record_profile(db_dir, collection_name, target, actual_dim)
+            print(f"[{collection_name}] 프로필 일치, 기록만 갱신")
+        return {"collection": collection_name, "reembedded": 0, "changed": []}
+
+    diff = ", ".join(f"{k}: {current.get(k)!r} → {target.get(k)!r}" for k in changed)
+    print(f"[{collection_name}] 프로필 변경 ({diff}) → 문서 {collection.count()}개 재임베딩")
+    if dry_run:
+        return {"collection": collection_name, "reembedded": 0, "changed": changed}
+
+    import torch
+    from embedding_pipeline import run_pipeline
+
+    dims = []
+
+    def write(batch_items, embeddings):
+        collection.update(ids=[_id for _id, _, _ in batch_items], embeddings=embeddings.tolist())
+        dims.append(embeddings.shape[1])
+
+    stats = run_pipeline(
+        list(_iter_documents(collection)),
+        write,
+        model_name=target["model"],
+        device="cuda" if torch.cuda.is_available() else "cpu",
+        workers=workers,
+        normalize=target["normalize"],
+        prefix=target["passage_prefix"],
+    )
+    record_profile(db_dir, collection_name, target, dims[0] if dims else None)
+    mark_tiers_stale(db_dir, collection_name, tiers=("pca",))  # PCA 티어는 저장된 dense 벡터에서 학습
+    return {"collection": collection_name, "reembedded": stats["chunks"], "changed": changed}
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="컬렉션 임베딩 프로필 확인 / 바뀐 컬렉션만 재임베딩")
+    parser.add_argument("--db-dir", default=None, help="지정하면 --collection 하나만 처리")
+    parser.add_argument("--collection", default=None)
+    parser.add_argument("--workers", type=int, default=None, help="인코딩 프로세스 수 (기본: CPU 코어 수 / 2)")
+    parser.add_argument("--dry-run", action="store_true", help="재임베딩 없이 변경 항목만 출력")
+    args = parser.parse_args()
+
+    targets = [(args.db_dir, args.collection)] if args.db_dir and args.collection else COLLECTIONS
+    for db_dir, collection_name in targets:
+        migrate_collection(db_dir, collection_name, args.workers, args.dry_run)
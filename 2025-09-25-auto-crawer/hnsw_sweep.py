@@ -0,0 +1,230 @@
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import date
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+import chromadb
+from chromadb.api.client import SharedSystemClient
+
+from index_manifest import hnsw_metadata, update_collection_entry
+from pca_tier import read_collection
+from benchmark_pca_tier import (
+    QA_JSONL,
+    NUM_QUERIES,
+    TOP_K,
+    exact_search,
+    load_query_vectors,
+    percentile_ms,
+    sample_self_queries,
+)
+
+# =========================
+# 설정
+# =========================
+GRID_M = [16, 32, 48]
+GRID_CONSTRUCTION_EF = [100, 200, 400]
+GRID_SEARCH_EF = [10, 50, 100, 200]
+TARGET_RECALL = 0.95  # 이 recall 이상인 설정 중 p99가 가장 낮은 설정을 선택
+ADD_BATCH = 5000
+COPY_BATCH = 2000
+
+
+# =========================
+# 유틸
+# =========================
+def dir_size_mb(path: Path) -> float:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) / 2**20
+
+
+def segment_size_mb(db_dir: Path) -> float:
+    """HNSW 바이너리 인덱스 크기 (chroma.sqlite3 제외, 세그먼트 폴더만)"""
+    return sum(dir_size_mb(p) for p in db_dir.iterdir() if p.is_dir())
+
+
+def collection_space(db_dir: str, collection_name: str) -> str:
+    client = chromadb.PersistentClient(path=str(db_dir))
+    metadata = client.get_collection(name=collection_name).metadata or {}
+    return metadata.get("hnsw:space", "l2")
+
+
+# =========================
+# 스윕
+# =========================
+def build_index(work_dir: Path, ids, vectors, space, m, construction_ef):
+    """임시 DB에 임베딩만 넣어 HNSW 인덱스 생성 → (collection, 빌드 시간)"""
+    client = chromadb.PersistentClient(path=str(work_dir))
+    collection = client.create_collection(
+        name="hnsw_sweep",
+        metadata={"hnsw:space": space, "hnsw:M": m, "hnsw:construction_ef": construction_ef},
+    )
+    t0 = time.perf_counter()
+    for start in range(0, len(ids), ADD_BATCH):
+        collection.add(
+            ids=ids[start : start + ADD_BATCH],
+            embeddings=vectors[start : start + ADD_BATCH].tolist(),
+        )
+    return collection, time.perf_counter() - t0
+
+
+def measure_queries(collection, ids, queries, exact_results, k):
+    recalls, times = [], []
+    for q, exact in zip(queries, exact_results):
+        t0 = time.perf_counter()
+        got = collection.query(query_embeddings=[q.tolist()], n_results=k, include=[])["ids"][0]
+        times.append(time.perf_counter() - t0)
+        recalls.append(len(exact & set(got)) / len(exact))
+    return float(np.mean(recalls)), percentile_ms(times, 50), percentile_ms(times, 99)
+
+
+def run_sweep(ids, vectors, queries, space, grid_m, grid_cef, grid_sef, k):
+    """
+    (M, ef_construction) 조합마다 인덱스를 새로 빌드하고,
+    ef_search는 빌드된 인덱스에서 설정만 바꿔가며 측정 (재빌드 불필요)
+    """
+    exact_results = [{ids[i] for i in exact_search(vectors, q, k)} for q in queries]
+
+    print(f"\n벡터 {vectors.shape[0]}개 x {vectors.shape[1]}차원 / 쿼리 {len(queries)}개 / k={k} / space={space}")
+    print(
+        f"{'M':>4}{'ef_c':>6}{'ef_s':>6}{'빌드(s)':>10}{'인덱스MB':>10}"
+        f"{'recall@k':>10}{'p50(ms)':>10}{'p99(ms)':>10}"
+    )
+
+    results = []
+    for m, construction_ef in product(grid_m, grid_cef):
+        work_dir = Path(tempfile.mkdtemp(prefix="hnsw_sweep_"))
+        try:
+            collection, build_sec = build_index(work_dir, ids, vectors, space, m, construction_ef)
+            size_mb = segment_size_mb(work_dir)
+            for search_ef in grid_sef:
+                # 이미 메모리에 올라간 인덱스에는 ef_search 변경이 반영되지 않으므로 클라이언트를 다시 열어 측정
+                collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+                SharedSystemClient.clear_system_cache()
+                collection = chromadb.PersistentClient(path=str(work_dir)).get_collection("hnsw_sweep")
+                recall, p50, p99 = measure_queries(collection, ids, queries, exact_results, k)
+                row = {
+                    "M": m,
+                    "construction_ef": construction_ef,
+                    "search_ef": search_ef,
+                    "build_sec": round(build_sec, 2),
+                    "index_mb": round(size_mb, 1),
+                    "recall": round(recall, 4),
+                    "p50_ms": round(p50, 2),
+                    "p99_ms": round(p99, 2),
+                }
+                results.append(row)
+                print(
+                    f"{m:>4}{construction_ef:>6}{search_ef:>6}{build_sec:>10.1f}{size_mb:>10.1f}"
+                    f"{recall:>10.3f}{p50:>10.2f}{p99:>10.2f}"
+                )
+        finally:
+            SharedSystemClient.clear_system_cache()
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def choose_config(results, target_recall=TARGET_RECALL):
+    """목표 recall을 넘는 설정 중 p99 최소 (없으면 recall 최대)"""
+    passing = [r for r in results if r["recall"] >= target_recall]
+    if passing:
+        return min(passing, key=lambda r: (r["p99_ms"], r["index_mb"]))
+    return max(results, key=lambda r: (r["recall"], -r["p99_ms"]))
+
+
+# =========================
+# 적용 / 재빌드
+# =========================
+def save_hnsw_config(db_dir: str, collection_name: str, row: dict, k: int):
+    config = {
+        "M": row["M"],
+        "construction_ef": row["construction_ef"],
+        "search_ef": row["search_ef"],
+        "recall_at_k": row["recall"],
+        "k": k,
+        "p99_ms": row["p99_ms"],
+        "chosen_at": date.today().isoformat(),
+    }
+    update_collection_entry(db_dir, collection_name, "hnsw", config)
+    print(f"[{collection_name}] 매니페스트에 HNSW 설정 기록: {config}")
+    return config
+
+
+def rebuild_collection(db_dir: str, collection_name: str):
+    """
+    매니페스트의 HNSW 설정으로 실제 컬렉션 재빌드
+    - 임베딩/문서/메타데이터를 그대로 복사하므로 재임베딩 없음
+    - 임시 컬렉션에 다 옮긴 뒤 원본 삭제 → 이름 변경
+    """
+    client = chromadb.PersistentClient(path=str(db_dir))
+    source = client.get_collection(name=collection_name)
+    space = (source.metadata or {}).get("hnsw:space", "l2")
+    metadata = {"hnsw:space": space, **hnsw_metadata(db_dir, collection_name)}
+
+    tmp_name = f"{collection_name}_rebuild"
+    if tmp_name in [c.name for c in client.list_collections()]:
+        client.delete_collection(tmp_name)
+    target = client.create_collection(name=tmp_name, metadata=metadata)
+
+    total = source.count()
+    for offset in range(0, total, COPY_BATCH):
+        data = source.get(
+            include=["embeddings", "documents", "metadatas"], limit=COPY_BATCH, offset=offset
+        )
+        target.add(
+            ids=data["ids"],
+            embeddings=data["embeddings"],
+            documents=data["documents"],
+            metadatas=data["metadatas"],
+        )
+        print(f"[{collection_name}] 재빌드 복사: {min(offset + COPY_BATCH, total)}/{total}", flush=True)
+
+    client.delete_collection(collection_name)
+    target.modify(name=collection_name)
+    print(f"[{collection_name}] 재빌드 완료: {metadata}")
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HNSW 파라미터(M / ef_construction / ef_search) 스윕 및 재빌드")
+    parser.add_argument("--db-dir", default="./chroma_text_api")
+    parser.add_argument("--collection", default="google_api_docs")
+    parser.add_argument("--m", type=int, nargs="+", default=GRID_M)
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=GRID_CONSTRUCTION_EF)
+    parser.add_argument("--search-ef", type=int, nargs="+", default=GRID_SEARCH_EF)
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--num-queries", type=int, default=NUM_QUERIES)
+    parser.add_argument("--queries", default=QA_JSONL, help="질문을 꺼낼 QA JSONL")
+    parser.add_argument("--self-queries", action="store_true", help="모델 없이 저장 벡터로 쿼리 생성")
+    parser.add_argument("--target-recall", type=float, default=TARGET_RECALL)
+    parser.add_argument("--apply", action="store_true", help="선택된 설정을 매니페스트에 기록")
+    parser.add_argument("--rebuild", action="store_true", help="매니페스트 설정으로 실제 컬렉션 재빌드 (스윕 생략)")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_collection(args.db_dir, args.collection)
+    else:
+        ids, _, vectors = read_collection(args.db_dir, args.collection)
+        if args.self_queries:
+            queries = sample_self_queries(vectors, args.num_queries)
+        else:
+            queries = load_query_vectors(args.queries, args.num_queries)
+
+        results = run_sweep(
+            ids,
+            vectors,
+            queries,
+            collection_space(args.db_dir, args.collection),
+            args.m,
+            args.construction_ef,
+            args.search_ef,
+            args.k,
+        )
+        best = choose_config(results, args.target_recall)
+        print(f"\n선택: M={best['M']} ef_construction={best['construction_ef']} ef_search={best['search_ef']}")
+        if args.apply:
+            save_hnsw_config(args.db_dir, args.collection, best, args.k)
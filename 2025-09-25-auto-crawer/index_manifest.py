@@ -0,0 +1,99 @@
+import os
+import json
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+# 벡터 DB 폴더 안에 함께 저장되는 인덱스 매니페스트 파일명
+# (DB 폴더를 통째로 업로드/다운로드하므로 서빙 쪽에서도 같은 경로로 읽음)
+MANIFEST_FILENAME = "index_manifest.json"
+
+
+def manifest_path(db_dir) -> Path:
+    return Path(db_dir) / MANIFEST_FILENAME
+
+
+def load_manifest(db_dir) -> dict:
+    """매니페스트 로드. 없으면 빈 구조 반환."""
+    path = manifest_path(db_dir)
+    if not path.exists():
+        return {"collections": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest.setdefault("collections", {})
+    return manifest
+
+
+def save_manifest(db_dir, manifest: dict):
+    """임시 파일에 쓴 뒤 교체하는 방식으로 원자적 저장."""
+    path = manifest_path(db_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".manifest-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def get_collection_entry(db_dir, collection_name: str) -> dict:
+    """컬렉션별 설정 조회 (없으면 빈 dict)."""
+    return load_manifest(db_dir)["collections"].get(collection_name, {})
+
+
+def update_collection_entry(db_dir, collection_name: str, key: str, value):
+    """컬렉션 설정의 특정 키(pca, hnsw 등)를 갱신하고 저장."""
+    manifest = load_manifest(db_dir)
+    entry = manifest["collections"].setdefault(collection_name, {})
+    if value is None:
+        entry.pop(key, None)
+    else:
+        entry[key] = value
+    save_manifest(db_dir, manifest)
+    return entry
+
+
+# 컬렉션 id / 벡터에서 파생된 서빙 인덱스 (id가 추가 / 삭제되면 다시 빌드해야 함)
+DERIVED_TIERS = ("pca", "sparse", "colbert", "chunk_store")
+
+
+def mark_tiers_stale(db_dir, collection_name: str, tiers=DERIVED_TIERS):
+    """
+    켜진 파생 인덱스를 서빙에서 끄고 stale 표시 (빌드 설정은 유지) → 끈 인덱스 이름 목록
+    - 새 청크가 PCA / sparse 검색에 안 걸리거나, ColBERT 키(태그/파일/청크 번호)에 예전 토큰 벡터가 남는 것 방지
+    - 청크 저장소가 꺼지면 서빙은 Chroma에서 텍스트 조회 / BM25 구축 (새 id가 저장소에 없어 결과에서 빠지는 것 방지)
+    - 각 빌드 스크립트의 --if-stale 옵션으로 이전 설정 그대로 다시 빌드하면 다시 켜짐
+    """
+    manifest = load_manifest(db_dir)
+    entry = manifest["collections"].get(collection_name, {})
+    marked = []
+    for tier in tiers:
+        config = entry.get(tier)
+        if config and config.get("enabled"):
+            config.update(enabled=False, stale=True)
+            marked.append(tier)
+    if marked:
+        save_manifest(db_dir, manifest)
+        print(f"[{collection_name}] id 변경 → 파생 인덱스 비활성화 (다시 빌드 필요): {', '.join(marked)}")
+    return marked
+
+
+def stale_tier_config(db_dir, collection_name: str, tier: str):
+    """stale 표시된 파생 인덱스의 이전 빌드 설정 (없으면 None)"""
+    config = get_collection_entry(db_dir, collection_name).get(tier) or {}
+    return config if config.get("stale") else None
+
+
+def hnsw_metadata(db_dir, collection_name: str) -> dict:
+    """
+    매니페스트에 기록된 HNSW 설정(hnsw_sweep.py 선택 결과) → Chroma 컬렉션 메타데이터
+    - 설정이 없으면 빈 dict (Chroma 기본값 사용)
+    """
+    config = get_collection_entry(db_dir, collection_name).get("hnsw") or {}
+    keys = {"M": "hnsw:M", "construction_ef": "hnsw:construction_ef", "search_ef": "hnsw:search_ef"}
+    return {meta_key: config[key] for key, meta_key in keys.items() if key in config}
@@ -0,0 +1,238 @@
+import re
+import json
+import argparse
+from datetime import date
+from collections import defaultdict
+
+import numpy as np
+import chromadb
+
+from index_manifest import get_collection_entry, mark_tiers_stale, update_collection_entry
+
+# =========================
+# 설정
+# =========================
+READ_BATCH = 5000
+DELETE_BATCH = 1000
+SHINGLE_CHARS = 5  # 문자 n-gram (한국어/영어 공통, 공백은 하나로 정규화)
+NUM_PERM = 128
+BANDS = 16  # LSH 밴드 수 (밴드당 NUM_PERM / BANDS행 → 후보 기준 유사도 약 0.7)
+THRESHOLD = 0.85  # MinHash 추정 Jaccard가 이 이상이면 중복으로 묶음
+SEED = 42
+_HASH_BASE = np.uint64(1000003)
+
+
+# =========================
+# MinHash
+# =========================
+_rng = np.random.default_rng(SEED)
+_PERM_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)  # 홀수 곱셈 계수
+_PERM_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+
+
+def shingle_hashes(text: str, n: int = SHINGLE_CHARS) -> np.ndarray:
+    """문자 n-gram 집합 → uint64 hash 배열 (rolling hash, numpy에서 한 번에 계산)"""
+    norm = re.sub(r"\s+", " ", text.lower()).strip()
+    codes = np.frombuffer(norm.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) == 0:
+        return np.zeros(1, dtype=np.uint64)
+    n = min(n, len(codes))
+    width = len(codes) - n + 1
+    hashes = np.zeros(width, dtype=np.uint64)
+    for k in range(n):
+        hashes = hashes * _HASH_BASE + codes[k : k + width]  # uint64 overflow는 mod 2^64로 동작
+    return np.unique(hashes)
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """NUM_PERM개 multiply-shift hash의 최솟값 → (NUM_PERM,) uint32"""
+    hashes = shingle_hashes(text)
+    permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def estimated_jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float(np.mean(sig_a == sig_b))
+
+
+# =========================
+# LSH 클러스터링
+# =========================
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def cluster_signatures(signatures: np.ndarray, threshold: float = THRESHOLD, bands: int = BANDS):
+    """
+    LSH 밴드 버킷 → 같은 버킷 후보만 MinHash 유사도로 확인 → 연결 요소 = 중복 클러스터
+    - 버킷 안에서는 첫 번째 항목과만 비교 (상용구 페이지처럼 큰 버킷에서도 O(n))
+    - 반환: 2개 이상인 클러스터의 인덱스 목록
+    """
+    n = len(signatures)
+    rows = signatures.shape[1] // bands
+    uf = _UnionFind(n)
+    for b in range(bands):
+        band = np.ascontiguousarray(signatures[:, b * rows : (b + 1) * rows])
+        keys = band.view(np.dtype((np.void, band.dtype.itemsize * rows))).ravel()
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        buckets = defaultdict(list)
+        for i in np.flatnonzero(counts[inverse] > 1):
+            buckets[inverse[i]].append(i)
+        for members in buckets.values():
+            head = members[0]
+            for other in members[1:]:
+                if uf.find(head) != uf.find(other) and (
+                    estimated_jaccard(signatures[head], signatures[other]) >= threshold
+                ):
+                    uf.union(head, other)
+
+    clusters = defaultdict(list)
+    for i in range(n):
+        clusters[uf.find(i)].append(i)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+# =========================
+# 컬렉션 중복 제거
+# =========================
+def _read_collection(collection):
+    ids, documents, metadatas = [], [], []
+    total = collection.count()
+    for offset in range(0, total, READ_BATCH):
+        data = collection.get(include=["documents", "metadatas"], limit=READ_BATCH, offset=offset)
+        ids.extend(data["ids"])
+        documents.extend(data["documents"])
+        metadatas.extend(md or {} for md in data["metadatas"])
+    return ids, documents, metadatas
+
+
+def _sources(metadata: dict):
+    """청크의 원본 URL + 이전 실행에서 합쳐진 URL"""
+    sources = [metadata.get("source") or metadata.get("source_file") or ""]
+    if metadata.get("dup_sources"):
+        sources.extend(json.loads(metadata["dup_sources"]))
+    return sources
+
+
+def _merged_metadata(rep_md: dict, member_mds):
+    """대표 청크 메타데이터 + 중복 청크들의 출처 목록(dup_sources) / 합쳐진 청크 수(dup_count)"""
+    own = rep_md.get("source") or rep_md.get("source_file") or ""
+    merged = sorted({s for md in member_mds for s in _sources(md) if s and s != own})
+    md = dict(rep_md)
+    md["dup_count"] = sum(int(m.get("dup_count", 0)) + 1 for m in member_mds) - 1
+    md["dup_sources"] = json.dumps(merged, ensure_ascii=False)
+    return md
+
+
+def dedup_collection(
+    db_dir: str,
+    collection_name: str,
+    threshold: float = THRESHOLD,
+    dry_run: bool = False,
+):
+    """
+    태그별로 near-duplicate 청크를 묶어 대표 1개만 남기고 나머지 삭제
+    - 대표: 가장 긴 청크 (같으면 id 순), 메타데이터에 중복 청크들의 출처 URL 병합
+    - 검색이 태그 필터로 동작하므로 서로 다른 태그끼리는 묶지 않음
+    - 삭제된 id → 대표 id 맵은 매니페스트 near_dup.collapsed에 기록
+      (3_insert_vs.py --sync가 대표가 남아 있는 중복 청크를 다시 임베딩하지 않도록)
+    """
+    client = chromadb.PersistentClient(path=str(db_dir))
+    collection = client.get_collection(name=collection_name)
+    ids, documents, metadatas = _read_collection(collection)
+    if not ids:
+        print(f"[{collection_name}] 저장된 문서가 없습니다.")
+        return None
+
+    by_tag = defaultdict(list)
+    for i, md in enumerate(metadatas):
+        by_tag[md.get("tags", "")].append(i)
+
+    collapsed, rep_updates = {}, {}
+    for tag, rows in by_tag.items():
+        signatures = np.stack([minhash_signature(documents[i]) for i in rows])
+        for members in cluster_signatures(signatures, threshold):
+            members = [rows[m] for m in members]
+            rep = min(members, key=lambda i: (-len(documents[i]), ids[i]))
+            rep_updates[ids[rep]] = _merged_metadata(metadatas[rep], [metadatas[i] for i in members])
+            for i in members:
+                if i != rep:
+                    collapsed[ids[i]] = ids[rep]
+
+    text_bytes = sum(len(d.encode("utf-8")) for d in documents)
+    removed_bytes = sum(len(documents[i].encode("utf-8")) for i, _id in enumerate(ids) if _id in collapsed)
+    sample = collection.get(ids=[ids[0]], include=["embeddings"])["embeddings"]
+    dim = len(sample[0]) if sample is not None and len(sample) else 0
+    stats = {
+        "count_before": len(ids),
+        "count_after": len(ids) - len(collapsed),
+        "removed": len(collapsed),
+        "clusters": len(rep_updates),
+        "text_bytes_before": text_bytes,
+        "text_bytes_after": text_bytes - removed_bytes,
+        "vector_bytes_saved": len(collapsed) * dim * 4,
+    }
+    print(
+        f"[{collection_name}] 중복 클러스터 {stats['clusters']}개 / 청크 {stats['count_before']}개 → "
+        f"{stats['count_after']}개 ({stats['removed'] / len(ids):.1%} 감소), "
+        f"텍스트 {text_bytes / 2**20:.1f}MB → {stats['text_bytes_after'] / 2**20:.1f}MB, "
+        f"벡터 {stats['vector_bytes_saved'] / 2**20:.1f}MB 절감"
+    )
+    if dry_run:
+        return stats
+
+    rep_ids = list(rep_updates)
+    for start in range(0, len(rep_ids), DELETE_BATCH):
+        batch = rep_ids[start : start + DELETE_BATCH]
+        collection.update(ids=batch, metadatas=[rep_updates[_id] for _id in batch])
+    dup_ids = list(collapsed)
+    for start in range(0, len(dup_ids), DELETE_BATCH):
+        collection.delete(ids=dup_ids[start : start + DELETE_BATCH])
+
+    # 이전 실행의 맵은 대표가 아직 남아 있는 것만 유지 (이번에 대표가 다시 묶였으면 새 대표로 연결)
+    remaining = set(ids) - set(collapsed)
+    prev = (get_collection_entry(db_dir, collection_name).get("near_dup") or {}).get("collapsed", {})
+    for dup, rep in prev.items():
+        rep = collapsed.get(rep, rep)
+        if rep in remaining and dup not in remaining:
+            collapsed.setdefault(dup, rep)
+
+    config = {
+        "threshold": threshold,
+        "num_perm": NUM_PERM,
+        "bands": BANDS,
+        "shingle_chars": SHINGLE_CHARS,
+        "built_at": date.today().isoformat(),
+        **stats,
+        "collapsed": collapsed,
+    }
+    update_collection_entry(db_dir, collection_name, "near_dup", config)
+    if dup_ids:
+        mark_tiers_stale(db_dir, collection_name)
+    return stats
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MinHash LSH near-duplicate 청크 병합")
+    parser.add_argument("--db-dir", default="./chroma_text_api")
+    parser.add_argument("--collection", default="google_api_docs")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--dry-run", action="store_true", help="삭제 없이 감소량만 출력")
+    args = parser.parse_args()
+
+    dedup_collection(args.db_dir, args.collection, args.threshold, args.dry_run)
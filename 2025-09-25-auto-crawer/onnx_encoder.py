@@ -0,0 +1,136 @@
+import os
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# =========================
+# 설정
+# =========================
+EMBED_MODEL = "BAAI/bge-m3"
+ONNX_DIR = "./onnx/bge-m3"
+FP32_FILE = "model.onnx"
+INT8_FILE = "model_int8.onnx"
+MAX_LENGTH = 8192
+
+# 임베딩 백엔드 스위치 (기본 torch, EMBED_BACKEND=onnx 이면 ONNX Runtime 사용)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", ONNX_DIR)
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "1") == "1"
+
+
+# =========================
+# 변환
+# =========================
+def export_onnx(model_name: str = EMBED_MODEL, out_dir: str = ONNX_DIR, int8: bool = True):
+    """
+    bge-m3를 ONNX(feature-extraction)로 변환하고, 선택적으로 int8 동적 양자화
+    - model.onnx: fp32 (2GB 초과라 외부 데이터 파일과 함께 저장됨)
+    - model_int8.onnx: 가중치 int8 동적 양자화 (활성값은 실행 시 양자화)
+    """
+    from optimum.exporters.onnx import main_export
+
+    out = Path(out_dir)
+    print(f"ONNX 변환 중: {model_name} → {out}")
+    main_export(model_name, output=out, task="feature-extraction")
+
+    if int8:
+        quantize_int8(out)
+
+
+def quantize_int8(out_dir: str = ONNX_DIR):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    out = Path(out_dir)
+    print(f"int8 동적 양자화 중: {out / INT8_FILE}")
+    quantize_dynamic(
+        str(out / FP32_FILE),
+        str(out / INT8_FILE),
+        weight_type=QuantType.QInt8,
+        use_external_data_format=True,
+    )
+
+
+# =========================
+# 인코더
+# =========================
+class OnnxEncoder:
+    """
+    ONNX Runtime bge-m3 dense 인코더 (CLS 풀링 + L2 정규화, SentenceTransformer와 동일 출력)
+    - encode() 인자는 SentenceTransformer.encode와 맞춰서 기존 호출부에 그대로 끼울 수 있게 함
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, quantized: bool = ONNX_QUANTIZED, num_threads: int = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        model_path = Path(model_dir) / (INT8_FILE if quantized else FP32_FILE)
+        self.session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+    def encode(self, texts, batch_size: int = 32, normalize_embeddings: bool = True, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+
+        # 길이순으로 묶어 패딩 최소화 후 원래 순서로 복원
+        order = np.argsort([-len(t) for t in texts])
+        parts = []
+        for start in range(0, len(texts), batch_size):
+            batch = [texts[i] for i in order[start : start + batch_size]]
+            enc = self.tokenizer(
+                batch, padding=True, truncation=True, max_length=MAX_LENGTH, return_tensors="np"
+            )
+            feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            parts.append(hidden[:, 0].astype(np.float32))
+
+        if not parts:
+            return np.zeros((0, 0), dtype=np.float32)
+        out = np.empty((len(texts), parts[0].shape[1]), dtype=np.float32)
+        out[order] = np.concatenate(parts)
+        if normalize_embeddings:
+            out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        return out
+
+
+def encoder_backend(device: str = None) -> str:
+    """load_encoder가 사용할 백엔드 이름 (torch / onnx-int8 / onnx-fp32, 임베딩 캐시 키 구분용)"""
+    if EMBED_BACKEND == "onnx" and device != "cuda":
+        return "onnx-int8" if ONNX_QUANTIZED else "onnx-fp32"
+    return "torch"
+
+
+def load_encoder(model_name: str = EMBED_MODEL, device: str = None, num_threads: int = None):
+    """EMBED_BACKEND 설정에 따라 SentenceTransformer 또는 ONNX 인코더 반환 (CUDA면 항상 torch)"""
+    if encoder_backend(device) != "torch":
+        print(f"임베딩 백엔드: ONNX Runtime ({ONNX_MODEL_DIR}, int8={ONNX_QUANTIZED})")
+        return OnnxEncoder(ONNX_MODEL_DIR, ONNX_QUANTIZED, num_threads)
+
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name, device=device)
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="bge-m3 → ONNX 변환 (+ int8 동적 양자화)")
+    parser.add_argument("--model", default=EMBED_MODEL)
+    parser.add_argument("--out-dir", default=ONNX_DIR)
+    parser.add_argument("--no-int8", action="store_true", help="fp32 ONNX만 생성")
+    parser.add_argument("--quantize-only", action="store_true", help="이미 변환된 fp32 모델만 양자화")
+    args = parser.parse_args()
+
+    if args.quantize_only:
+        quantize_int8(args.out_dir)
+    else:
+        export_onnx(args.model, args.out_dir, int8=not args.no_int8)
@@ -0,0 +1,151 @@
+import argparse
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import chromadb
+
+from index_manifest import stale_tier_config, update_collection_entry
+
+# =========================
+# 설정
+# =========================
+PCA_DIM = 256  # 1차 후보 검색용 축소 차원 (bge-m3 1024 → 256)
+PCA_CANDIDATES = 100  # 1차 검색 후보 수 (이 후보만 원본 차원으로 재채점)
+PCA_FIT_SAMPLE = 20000  # PCA 학습에 사용할 최대 벡터 수
+READ_BATCH = 5000  # Chroma에서 한 번에 읽어올 행 수
+TIER_DIRNAME = "pca_tier"
+
+
+# =========================
+# PCA 계산
+# =========================
+def fit_pca(vectors: np.ndarray, dim: int = PCA_DIM, seed: int = 0):
+    """
+    공분산 행렬 고유분해로 PCA 학습.
+    - 반환: (mean, components[dim, D], explained_variance_ratio)
+    """
+    rng = np.random.default_rng(seed)
+    if len(vectors) > PCA_FIT_SAMPLE:
+        vectors = vectors[rng.choice(len(vectors), PCA_FIT_SAMPLE, replace=False)]
+
+    mean = vectors.mean(axis=0)
+    centered = vectors - mean
+    cov = centered.T @ centered / max(1, len(centered) - 1)
+    eigvals, eigvecs = np.linalg.eigh(cov)  # 오름차순 정렬됨
+
+    order = np.argsort(eigvals)[::-1][:dim]
+    components = eigvecs[:, order].T.astype(np.float32)
+    explained = float(eigvals[order].sum() / max(eigvals.sum(), 1e-12))
+    return mean.astype(np.float32), components, explained
+
+
+def project(vectors: np.ndarray, mean: np.ndarray, components: np.ndarray) -> np.ndarray:
+    """축소 차원으로 투영 후 L2 정규화 (내적 = 코사인)."""
+    reduced = (vectors - mean) @ components.T
+    norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+    return (reduced / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+# =========================
+# Chroma 읽기
+# =========================
+def read_collection(db_dir: str, collection_name: str):
+    """컬렉션 전체의 id / 태그 / 임베딩을 배치로 읽어옴."""
+    client = chromadb.PersistentClient(path=str(db_dir))
+    collection = client.get_collection(name=collection_name)
+    total = collection.count()
+
+    ids, tags, embeddings = [], [], []
+    for offset in range(0, total, READ_BATCH):
+        data = collection.get(
+            include=["embeddings", "metadatas"], limit=READ_BATCH, offset=offset
+        )
+        ids.extend(data["ids"])
+        tags.extend((md or {}).get("tags", "") for md in data["metadatas"])
+        embeddings.append(np.asarray(data["embeddings"], dtype=np.float32))
+
+    vectors = np.concatenate(embeddings) if embeddings else np.zeros((0, 0), np.float32)
+    return ids, tags, vectors
+
+
+# =========================
+# 티어 빌드
+# =========================
+def build_pca_tier(
+    db_dir: str,
+    collection_name: str,
+    dim: int = PCA_DIM,
+    candidates: int = PCA_CANDIDATES,
+):
+    """
+    컬렉션 임베딩으로 PCA를 학습하고, 축소 벡터를 DB 폴더 안에 저장.
+    - <db_dir>/pca_tier/<collection>/{mean,components,vectors,ids,tags}.npy
+    - 매니페스트에 컬렉션별 설정(pca) 기록 → 서빙 시 이 설정으로 1차 검색
+    """
+    ids, tags, vectors = read_collection(db_dir, collection_name)
+    if not ids:
+        print(f"[{collection_name}] 저장된 벡터가 없습니다.")
+        return None
+
+    print(f"[{collection_name}] PCA 학습: {vectors.shape[0]}개 x {vectors.shape[1]}차원 → {dim}차원")
+    mean, components, explained = fit_pca(vectors, dim)
+    reduced = project(vectors, mean, components)
+
+    rel_dir = Path(TIER_DIRNAME) / collection_name
+    out_dir = Path(db_dir) / rel_dir
+    out_dir.mkdir(parents=True, exist_ok=True)
+    np.save(out_dir / "mean.npy", mean)
+    np.save(out_dir / "components.npy", components)
+    np.save(out_dir / "vectors.npy", reduced)
+    np.save(out_dir / "ids.npy", np.asarray(ids))
+    np.save(out_dir / "tags.npy", np.asarray(tags))
+
+    config = {
+        "enabled": True,
+        "dim": dim,
+        "source_dim": int(vectors.shape[1]),
+        "candidates": candidates,
+        "path": rel_dir.as_posix(),
+        "count": len(ids),
+        "explained_variance": round(explained, 4),
+        "built_at": date.today().isoformat(),
+    }
+    update_collection_entry(db_dir, collection_name, "pca", config)
+
+    full_mb = vectors.nbytes / 1024 / 1024
+    tier_mb = reduced.nbytes / 1024 / 1024
+    print(
+        f"[{collection_name}] 저장 완료: {out_dir} "
+        f"(설명 분산 {explained:.3f}, 스캔 메모리 {full_mb:.1f}MB → {tier_mb:.1f}MB)"
+    )
+    return config
+
+
+def disable_pca_tier(db_dir: str, collection_name: str):
+    """매니페스트에서 PCA 1차 검색 비활성화 (파일은 유지)."""
+    update_collection_entry(db_dir, collection_name, "pca", None)
+    print(f"[{collection_name}] PCA 1차 검색 비활성화")
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PCA 축소 차원 1차 검색 티어 빌드")
+    parser.add_argument("--db-dir", default="./chroma_text_api")
+    parser.add_argument("--collection", default="google_api_docs")
+    parser.add_argument("--dim", type=int, default=PCA_DIM)
+    parser.add_argument("--candidates", type=int, default=PCA_CANDIDATES)
+    parser.add_argument("--disable", action="store_true", help="해당 컬렉션 PCA 티어 끄기")
+    parser.add_argument("--if-stale", action="store_true", help="id 변경으로 stale 표시된 경우에만 이전 설정으로 다시 빌드")
+    args = parser.parse_args()
+
+    if args.disable:
+        disable_pca_tier(args.db_dir, args.collection)
+    elif args.if_stale:
+        prev = stale_tier_config(args.db_dir, args.collection, "pca")
+        if prev:
+            build_pca_tier(args.db_dir, args.collection, prev["dim"], prev["candidates"])
+    else:
+        build_pca_tier(args.db_dir, args.collection, args.dim, args.candidates)
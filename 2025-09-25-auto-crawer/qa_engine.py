@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import random
+import asyncio
+from collections import Counter, defaultdict
+
+import tiktoken
+from tqdm import tqdm
+
+# =========================
+# 설정
+# =========================
+RPM = 500  # 분당 요청 수 상한 (gpt-4o-mini tier 1 기준, 계정 한도에 맞춰 조정)
+TPM = 200_000  # 분당 토큰 수 상한 (프롬프트 + max_tokens로 예약 후 실제 사용량으로 정산)
+CONCURRENCY = 16  # 동시에 대기 중인 API 요청 수
+MAX_RETRY = 4
+BACKOFF_BASE = 1.0  # 지수 백오프 (1, 2, 4, ...초 x 0.5~1.5 jitter)
+BACKOFF_MAX = 60.0
+WRITE_FLUSH_SEC = 2.0  # 이 간격마다 JSONL flush
+
+enc = tiktoken.get_encoding("cl100k_base")
+
+
+def count_message_tokens(messages) -> int:
+    """chat 메시지 토큰 수 (메시지당 포맷 오버헤드 4토큰 포함 근사치)"""
+    return sum(len(enc.encode(m["content"], disallowed_special=())) + 4 for m in messages) + 3
+
+
+# =========================
+# 속도 제한
+# =========================
+class RateLimiter:
+    """
+    RPM / TPM 토큰 버킷 (분당 한도를 초 단위로 연속 보충)
+    - acquire(tokens): 요청 1개 + 예상 토큰을 예약할 수 있을 때까지 대기 (대기 순서대로 통과)
+    - settle(reserved, used): 응답의 실제 사용량으로 예약분 정산
+    """
+
+    def __init__(self, rpm: int = RPM, tpm: int = TPM):
+        self.rpm, self.tpm = rpm, tpm
+        self.requests, self.tokens = float(rpm), float(tpm)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed, self.updated = now - self.updated, now
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens: int):
+        tokens = min(tokens, self.tpm)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.requests >= 1 and self.tokens >= tokens:
+                    self.requests -= 1
+                    self.tokens -= tokens
+                    return
+                wait = max(
+                    (1 - self.requests) * 60 / self.rpm,
+                    (tokens - self.tokens) * 60 / self.tpm,
+                )
+                await asyncio.sleep(max(wait, 0.01))
+
+    def settle(self, reserved: int, used: int):
+        self.tokens = min(self.tpm, self.tokens + reserved - used)
+
+
+# =========================
+# API 클라이언트
+# =========================
+def _retry_after(error) -> float:
+    """429 응답의 retry-after 헤더 (없으면 0)"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ChatClient:
+    """
+    속도 제한 + 동시 요청 수 제한 + 지수 백오프 재시도를 거치는 비동기 chat completions 클라이언트
+    - 여러 생성 작업이 하나를 공유하면 계정 한도 안에서 요청을 나눠 씀
+    - usage: 요청 / 재시도 / 실패 수와 프롬프트 / 완성 토큰 누적
+    - usage_by[usage_key]: 호출부가 붙인 키(태그 등)별 같은 누적 (작업별 처리량 / 토큰 사용량 보고용)
+    """
+
+    def __init__(
+        self,
+        model: str,
+        rpm: int = RPM,
+        tpm: int = TPM,
+        concurrency: int = CONCURRENCY,
+        max_retry: int = MAX_RETRY,
+        client=None,
+    ):
+        if client is None:
+            from openai import AsyncOpenAI
+
+            client = AsyncOpenAI()  # OPENAI_API_KEY 필요
+        self.client = client
+        self.model = model
+        self.limiter = RateLimiter(rpm, tpm)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.max_retry = max_retry
+        self.usage = Counter()
+        self.usage_by = defaultdict(Counter)
+
+    def _count(self, usage_key, name: str, value: int = 1):
+        self.usage[name] += value
+        if usage_key is not None:
+            self.usage_by[usage_key][name] += value
+
+    async def complete(self, messages, max_tokens: int, prompt_tokens: int = None, usage_key=None, **kwargs):
+        """
+        응답 본문 문자열 반환 (재시도를 모두 실패하면 None)
+        - prompt_tokens: 호출부가 이미 아는 프롬프트 토큰 수 (없으면 메시지를 인코딩해 계산)
+        - usage_key: 사용량을 따로 모을 키 (usage_by, 없으면 전체 usage에만 누적)
+        """
+        if prompt_tokens is None:
+            prompt_tokens = count_message_tokens(messages)
+        reserved = prompt_tokens + max_tokens
+        for attempt in range(1, self.max_retry + 1):
+            async with self.semaphore:
+                await self.limiter.acquire(reserved)
+                try:
+                    resp = await self.client.chat.completions.create(
+                        model=self.model, messages=messages, max_tokens=max_tokens, **kwargs
+                    )
+                except Exception as e:
+                    self.limiter.settle(reserved, 0)
+                    error = e
+                else:
+                    usage = resp.usage
+                    self.limiter.settle(reserved, usage.total_tokens if usage else reserved)
+                    self._count(usage_key, "requests")
+                    if usage:
+                        self._count(usage_key, "prompt_tokens", usage.prompt_tokens)
+                        self._count(usage_key, "completion_tokens", usage.completion_tokens)
+                    return resp.choices[0].message.content
+
+            # 재시도 대기는 세마포어 밖에서 (다른 요청은 계속 진행)
+            if attempt == self.max_retry:
+                self._count(usage_key, "failures")
+                print(f"⚠️ 요청 실패 ({type(error).__name__}): {error}")
+                return None
+            self._count(usage_key, "retries")
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)) * (0.5 + random.random())
+            await asyncio.sleep(max(delay, _retry_after(error)))
+
+
+# =========================
+# JSONL 쓰기
+# =========================
+class JsonlWriter:
+    """
+    출력 JSONL을 쓰는 단일 태스크 (생성 작업은 queue에 레코드 목록만 넣음)
+    - 한 작업이 넣은 레코드는 넣은 순서대로 기록 (문서 안 페어 순서 유지)
+    - on_written(records): 레코드를 파일에 flush한 뒤 실제 기록한 레코드로 호출 (진행 상태 기록용, 레코드가 없어도 호출)
+    - transform(records): 기록 전에 거를 함수 (중복 질문 제거 등, writer 태스크에서만 순차 실행)
+    """
+
+    def __init__(self, path, mode: str = "a", transform=None):
+        self.path = path
+        self.mode = mode
+        self.transform = transform
+        self.queue = asyncio.Queue()
+        self.count = 0
+
+    async def put(self, records, on_written=None):
+        await self.queue.put((records, on_written))
+
+    async def run(self):
+        last_flush = time.monotonic()
+        with open(self.path, self.mode, encoding="utf-8") as f:
+            while True:
+                item = await self.queue.get()
+                if item is None:
+                    break
+                records, on_written = item
+                if self.transform is not None and records:
+                    records = await asyncio.to_thread(self.transform, records)
+                for rec in records:
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                self.count += len(records)
+                if on_written is not None:
+                    # 디스크에 남은 뒤에만 완료로 표시 (중단 시 기록 안 된 작업이 완료로 남지 않게)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    last_flush = time.monotonic()
+                    on_written(records)
+                elif time.monotonic() - last_flush >= WRITE_FLUSH_SEC:
+                    f.flush()
+                    last_flush = time.monotonic()
+
+    async def close(self):
+        await self.queue.put(None)
+
+
+# =========================
+# 실행
+# =========================
+async def run_docs(docs, process_doc, workers: int, desc: str = "Processing docs", total: int = None):
+    """
+    문서 단위 작업을 workers개 태스크로 동시에 실행
+    - docs: 문서 목록 또는 제너레이터 (필요할 때마다 하나씩 꺼냄)
+    - process_doc(doc): 문서 하나를 처리하는 코루틴, 생성 개수 반환
+    - 문서 안의 순차 의존(이전 질문 목록 등)은 process_doc 안에서 유지
+    """
+    docs = iter(docs)
+    progress = tqdm(total=total, desc=desc, unit="doc")
+    totals = Counter()
+
+    async def worker():
+        for doc in docs:
+            written = await process_doc(doc)
+            totals["qas"] += written
+            totals["docs"] += 1
+            progress.update(1)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    progress.close()
+    return totals
+
+
+def usage_summary(usage: Counter, elapsed: float) -> str:
+    tokens = usage["prompt_tokens"] + usage["completion_tokens"]
+    return (
+        f"요청 {usage['requests']}개 (재시도 {usage['retries']}, 실패 {usage['failures']}) / "
+        f"토큰 {tokens:,} (프롬프트 {usage['prompt_tokens']:,}, 완성 {usage['completion_tokens']:,}) / "
+        f"{elapsed:.0f}s, {usage['requests'] / max(elapsed, 1e-9) * 60:.0f} req/min, "
+        f"{tokens / max(elapsed, 1e-9) * 60:,.0f} tok/min"
+    )
@@ -0,0 +1,21 @@
+import json
+import hashlib
+
+
+def qa_record_id(tag, source_file, question, answer) -> str:
+    """
+    QA 레코드 고정 id = hash(태그, 원문 파일명, 질문, 답변)
+    - 같은 레코드는 몇 번을 다시 넣어도 같은 id → upsert가 중복 없이 동작
+    """
+    key = json.dumps(
+        [tag or "", source_file or "", (question or "").strip(), (answer or "").strip()],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def record_id(obj: dict) -> str:
+    """JSONL 레코드의 id (없으면 내용으로 계산)"""
+    return obj.get("id") or qa_record_id(
+        obj.get("tags"), obj.get("source_file"), obj.get("question"), obj.get("answer")
+    )
@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from pathlib import Path
+
+# =========================
+# 설정
+# =========================
+MANIFEST_SUFFIX = ".manifest.json"  # 출력 JSONL 옆에 저장 (google_api_qa_dataset.jsonl.manifest.json)
+SAVE_EVERY_SEC = 5.0  # 진행 상태 저장 간격 (종료 / 중단 시에는 항상 저장)
+
+
+def text_sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class QAManifest:
+    """
+    QA 생성 진행 상태 (문서별 / 페어별)
+    - files[문서 키] = {"sha1", "tag", "source_file", "prompt", "complete", "pairs": {페어 번호: {...}}}
+    - 페어 항목: 페어 텍스트 sha1 + 프롬프트 버전 + 생성된 레코드 id
+      → 재실행 시 문서 sha1과 프롬프트 버전이 같으면 문서 전체를, 다르면 텍스트가 같은 페어만 건너뜀
+    - 레코드가 JSONL에 기록된 뒤에만 페어를 완료로 표시 (중단돼도 기록 안 된 페어는 다시 생성)
+    - 임시 파일에 쓴 뒤 교체하는 방식으로 원자적 저장
+    """
+
+    def __init__(self, out_jsonl, prompt_version: str):
+        self.path = Path(str(out_jsonl) + MANIFEST_SUFFIX)
+        self.prompt_version = prompt_version
+        self.data = {"files": {}}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+            self.data.setdefault("files", {})
+        self.last_save = time.monotonic()
+        self.dirty = False
+
+    # ---------- 조회 ----------
+    def file_done(self, key: str, sha1: str) -> bool:
+        entry = self.data["files"].get(key)
+        return bool(
+            entry and entry.get("complete") and entry.get("sha1") == sha1
+            and entry.get("prompt") == self.prompt_version
+        )
+
+    def pair_done(self, key: str, index: int, pair_sha1: str):
+        """완료된 같은 페어 항목 (텍스트 / 프롬프트가 바뀌었으면 None)"""
+        pair = self.data["files"].get(key, {}).get("pairs", {}).get(str(index))
+        if pair and pair.get("sha1") == pair_sha1 and pair.get("prompt") == self.prompt_version:
+            return pair
+        return None
+
+    def pair_ids(self, key: str, index: int):
+        """페어에 기록된 레코드 id (텍스트가 바뀐 예전 항목 포함, 없으면 빈 리스트)"""
+        return self.data["files"].get(key, {}).get("pairs", {}).get(str(index), {}).get("ids", [])
+
+    def live_ids(self):
+        """문서 키 → 현재 유효한 레코드 id 집합"""
+        return {
+            key: {_id for pair in entry.get("pairs", {}).values() for _id in pair.get("ids", [])}
+            for key, entry in self.data["files"].items()
+        }
+
+    # ---------- 갱신 ----------
+    def _file_entry(self, key: str, sha1: str, tag: str, source_file: str):
+        entry = self.data["files"].setdefault(key, {"pairs": {}})
+        entry.update({"sha1": sha1, "tag": tag, "source_file": source_file, "prompt": self.prompt_version})
+        return entry
+
+    def start_file(self, key: str, sha1: str, tag: str, source_file: str, num_pairs: int):
+        """문서 처리 시작: 사라진 페어 번호 정리, 완료 표시 해제"""
+        entry = self._file_entry(key, sha1, tag, source_file)
+        entry["complete"] = False
+        entry["pairs"] = {i: p for i, p in entry.get("pairs", {}).items() if int(i) < num_pairs}
+        self._touch()
+
+    def mark_pair(self, key: str, index: int, pair_sha1: str, records):
+        entry = self.data["files"][key]
+        entry["pairs"][str(index)] = {
+            "sha1": pair_sha1,
+            "prompt": self.prompt_version,
+            "ids": [rec["id"] for rec in records],
+        }
+        self._touch()
+
+    def finish_file(self, key: str):
+        self.data["files"][key]["complete"] = True
+        self._touch()
+
+    def _touch(self):
+        self.dirty = True
+        if time.monotonic() - self.last_save >= SAVE_EVERY_SEC:
+            self.save()
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".qa-manifest-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.dirty = False
+        self.last_save = time.monotonic()
+
+
+def compact_jsonl(out_jsonl, manifest: QAManifest):
+    """
+    출력 JSONL 정리 (전체 실행이 끝까지 완료됐을 때만 호출)
+    - 매니페스트에 있는 문서의 레코드는 현재 페어가 가리키는 id만 남김 (바뀐 페어의 예전 레코드 삭제)
+    - 같은 id는 처음 나온 것만 (중단 후 재생성된 중복 제거)
+    - 매니페스트에 없는 문서의 레코드(이전 버전 출력 등)는 그대로 유지
+    """
+    out_jsonl = Path(out_jsonl)
+    if not out_jsonl.exists():
+        return 0
+    live = manifest.live_ids()
+    owner = {
+        (entry.get("tag"), entry.get("source_file")): key
+        for key, entry in manifest.data["files"].items()
+    }
+
+    seen, removed = set(), 0
+    fd, tmp_path = tempfile.mkstemp(dir=out_jsonl.parent, prefix=".qa-compact-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as out, open(out_jsonl, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                key = owner.get((rec.get("tags"), rec.get("source_file")))
+                stale = key is not None and rec.get("id") not in live[key]
+                if stale or rec.get("id") in seen:
+                    removed += 1
+                    continue
+                seen.add(rec.get("id"))
+                out.write(line if line.endswith("\n") else line + "\n")
+        os.replace(tmp_path, out_jsonl)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return removed
@@ -0,0 +1,161 @@
+"""
+여러 API(태그)의 QA 생성을 한 번의 실행으로 스케줄링
+- 예전 preprocess_qa_code/generate_*_qa.py(API별 동기 스크립트 9개) + pair_QA.py를 대체
+- 생성 로직(청킹 / 프롬프트 / 레코드 스키마 / 매니페스트 / 중복 질문 제거)은 4_create_qa_json.py 그대로 사용
+- 모든 태그가 속도 제한 ChatClient 하나를 공유 → 한 태그의 문서가 끝나가도 다음 태그 문서가 바로 요청 슬롯을 채움
+- 바뀐 문서(매니페스트에 완료 표시가 없거나 내용 sha1이 다른 문서)가 많은 태그부터 처리
+- 종료 시 태그별 문서 / QA 수, 요청 수, 토큰 사용량, 처리량 출력
+
+사용:
+  python3 qa_scheduler.py --from-corpus                      # 전체 태그
+  python3 qa_scheduler.py --tags bigquery gmail --dry-run    # 처리 순서 / 바뀐 문서 수만 확인
+"""
+import os
+import time
+import asyncio
+import argparse
+import importlib
+from collections import Counter, defaultdict
+
+from qa_engine import RPM, TPM, CONCURRENCY, ChatClient, JsonlWriter, run_docs, usage_summary
+from qa_manifest import QAManifest, compact_jsonl, text_sha1
+from question_dedup import THRESHOLD
+from corpus_dataset import CORPUS_DIR
+
+qa = importlib.import_module("4_create_qa_json")  # 파일명이 숫자로 시작해 import 문으로는 불러올 수 없음
+
+
+# =========================
+# 계획
+# =========================
+def plan_tags(docs, manifest, tags=None):
+    """
+    문서를 태그별로 나누고 다시 생성할 문서만 남김
+    - 반환: ({태그: [(본문, 경로, Source URL, 태그, sha1)]}, 태그별 전체 문서 수)
+    - 완료된 문서는 본문을 들고 있지 않음 (바뀐 문서만 메모리에 유지)
+    """
+    pending, totals = defaultdict(list), Counter()
+    for text, file_path, source_url, tag in docs:
+        if tags and tag not in tags:
+            continue
+        totals[tag] += 1
+        doc_sha1 = text_sha1(text)
+        if not manifest.file_done(qa.doc_key(file_path), doc_sha1):
+            pending[tag].append((text, file_path, source_url, tag, doc_sha1))
+    return pending, totals
+
+
+def order_tags(pending):
+    """바뀐 문서가 많은 태그부터 (같으면 태그 이름순)"""
+    return sorted((tag for tag, docs in pending.items() if docs), key=lambda tag: (-len(pending[tag]), tag))
+
+
+def print_plan(order, pending, totals):
+    print("[PLAN] 처리 순서 (바뀐 문서 / 전체 문서)")
+    for rank, tag in enumerate(order, start=1):
+        print(f"  {rank:2d}. {tag}: {len(pending[tag])} / {totals[tag]}")
+    unchanged = sorted(tag for tag in totals if not pending.get(tag))
+    if unchanged:
+        print(f"  변경 없음: {', '.join(unchanged)}")
+
+
+# =========================
+# 실행
+# =========================
+async def schedule_async(
+    docs, tags=None, concurrency=CONCURRENCY, rpm=RPM, tpm=TPM, dedup_threshold=THRESHOLD, dry_run=False
+):
+    """
+    태그 목록의 바뀐 문서를 우선순위 순서로 하나의 작업 큐에 넣고, 공유 ChatClient로 동시에 처리
+    - 출력 JSONL / 매니페스트 / 중복 인덱스는 4_create_qa_json.py와 같은 파일 (두 스크립트를 번갈아 써도 이어서 진행)
+    - 태그별 사용량은 ChatClient.usage_by[태그]로 모으고, 처리량은 태그의 첫 문서 시작 ~ 마지막 문서 완료 구간 기준
+    """
+    manifest = QAManifest(qa.OUT_JSONL, f"{qa.PROMPT_VERSION}/{qa.MODEL}")
+    pending, totals = plan_tags(docs, manifest, tags)
+    missing = sorted(set(tags or ()) - totals.keys())
+    if missing:
+        print(f"⚠️ 문서가 없는 태그: {', '.join(missing)}")
+    order = order_tags(pending)
+    print_plan(order, pending, totals)
+    if dry_run or not order:
+        if not order:
+            print("[DONE] 새로 생성할 문서 없음")
+        return
+
+    os.makedirs(os.path.dirname(qa.OUT_JSONL) or ".", exist_ok=True)
+    dedup = qa.open_dedup(dedup_threshold)
+    chat = ChatClient(qa.MODEL, rpm=rpm, tpm=tpm, concurrency=concurrency, max_retry=qa.MAX_RETRY)
+    writer = JsonlWriter(qa.OUT_JSONL, "a", transform=dedup.filter if dedup else None)
+    writer_task = asyncio.create_task(writer.run())
+    stats = defaultdict(Counter)
+    spans = {}  # 태그 → [첫 문서 시작, 마지막 문서 완료]
+
+    async def process_doc(doc):
+        text, file_path, source_url, tag, doc_sha1 = doc
+        span = spans.setdefault(tag, [time.perf_counter(), None])
+        written = await qa.process_one_text(
+            chat, writer, manifest, text, file_path, source_url, tag, doc_sha1, dedup
+        )
+        span[1] = time.perf_counter()
+        stats[tag]["docs"] += 1
+        stats[tag]["qas"] += written
+        return written
+
+    queue = [doc for tag in order for doc in pending[tag]]
+    t0 = time.perf_counter()
+    try:
+        totals_run = await run_docs(
+            queue, process_doc, workers=concurrency * qa.DOCS_PER_REQUEST, desc="Scheduling docs", total=len(queue)
+        )
+    finally:
+        await writer.close()
+        await writer_task
+        manifest.save()
+
+    removed = compact_jsonl(qa.OUT_JSONL, manifest)
+    elapsed = time.perf_counter() - t0
+    print(f"\n[DONE] tags={len(order)}, docs={totals_run['docs']}, qas={totals_run['qas']} (written={writer.count}), out={qa.OUT_JSONL}")
+    if removed:
+        print(f"[COMPACT] 이전 / 중복 레코드 {removed}개 제거")
+        if dedup:
+            dedup.sync(qa.OUT_JSONL)
+    if dedup:
+        print(f"[DEDUP] {dedup.summary()}")
+
+    print("[TAG] 태그별 처리량 / 토큰 사용량")
+    for tag in order:
+        start, end = spans.get(tag, (t0, t0))
+        print(
+            f"  {tag}: 문서 {stats[tag]['docs']}/{len(pending[tag])}, QA {stats[tag]['qas']}개 / "
+            f"{usage_summary(chat.usage_by[tag], (end or start) - start)}"
+        )
+    print(f"[API] {usage_summary(chat.usage, elapsed)}")
+    print(f"[TOKENS] {qa.token_cache.summary()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="여러 API 태그의 QA 생성을 공유 클라이언트 하나로 스케줄링")
+    parser.add_argument("--tags", nargs="+", default=None, help="생성할 태그 (기본: 문서가 있는 모든 태그)")
+    parser.add_argument(
+        "--from-corpus",
+        nargs="?",
+        const=CORPUS_DIR,
+        default=None,
+        help="txt 파일 대신 corpus_dataset.py 데이터셋(pages)에서 읽기 (기본: ./corpus)",
+    )
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="동시 API 요청 수 (모든 태그 합산)")
+    parser.add_argument("--rpm", type=int, default=RPM, help="분당 요청 수 상한 (모든 태그 합산)")
+    parser.add_argument("--tpm", type=int, default=TPM, help="분당 토큰 수 상한 (모든 태그 합산)")
+    parser.add_argument(
+        "--dedup-threshold", type=float, default=THRESHOLD, help="질문 중복 판정 cosine 유사도 (0이면 중복 검사 안 함)"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="태그별 바뀐 문서 수와 처리 순서만 출력")
+    args = parser.parse_args()
+
+    docs = qa.iter_corpus_docs(args.from_corpus) if args.from_corpus else qa.iter_txt_docs()
+    asyncio.run(
+        schedule_async(
+            docs, set(args.tags) if args.tags else None, args.concurrency, args.rpm, args.tpm,
+            args.dedup_threshold, args.dry_run,
+        )
+    )
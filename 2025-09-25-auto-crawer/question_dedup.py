@@ -0,0 +1,142 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import chromadb
+
+from embedding_cache import EmbeddingCache
+from onnx_encoder import EMBED_MODEL, MAX_LENGTH, encoder_backend, load_encoder
+
+# =========================
+# 설정
+# =========================
+DEDUP_DB_DIR = "./chroma_qa_dedup"
+COLLECTION_NAME = "qa_questions"
+THRESHOLD = 0.92  # 질문 임베딩 cosine 유사도가 이 이상이면 기존 질문의 중복으로 보고 버림
+ENCODE_BATCH = 64
+WRITE_BATCH = 1000
+DUP_LOG_SUFFIX = ".dups.jsonl"  # 버린 질문 기록 (임계값 조정용)
+
+
+class QuestionIndex:
+    """
+    생성된 질문 전체에 대한 근사 최근접(HNSW) 중복 검사 인덱스
+    - Chroma 컬렉션(cosine)을 증분 ANN 인덱스로 사용 → 질문 하나 검사가 데이터셋 크기에 대해 로그 시간
+    - 질문 임베딩은 bge-m3 (EMBED_BACKEND 설정을 따름), 같은 질문은 embedding_cache.sqlite3에서 재사용
+    - 태그 / 문서 구분 없이 데이터셋 전체에서 중복 검사 (같은 id는 재생성된 같은 레코드라 중복으로 보지 않음)
+    """
+
+    def __init__(self, db_dir=DEDUP_DB_DIR, threshold: float = THRESHOLD, dup_log=None, model_name=EMBED_MODEL):
+        self.threshold = threshold
+        self.model_name = model_name
+        self.model = None  # 검사할 질문이 있을 때만 로드
+        self.cache = EmbeddingCache(
+            model_name, backend=encoder_backend(), normalize=True, max_length=MAX_LENGTH
+        )
+        client = chromadb.PersistentClient(path=str(db_dir))
+        self.collection = client.get_or_create_collection(
+            name=COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+        )
+        self.dup_log = Path(dup_log) if dup_log else None
+        self.kept = 0
+        self.dropped = 0
+
+    def encode(self, texts):
+        if self.model is None:
+            self.model = load_encoder(self.model_name)
+        return self.model.encode(texts, batch_size=ENCODE_BATCH, normalize_embeddings=True)
+
+    def embed(self, questions) -> np.ndarray:
+        return self.cache.embed(list(questions), self.encode)
+
+    def _nearest(self, vectors, own_ids):
+        """
+        인덱스에서 자기 id를 뺀 가장 가까운 질문 → [(id, 유사도)] (없으면 None)
+        - 재생성 / 재개된 레코드는 자기 질문이 이미 인덱스에 있으므로 2개를 조회해 자기 id가 아닌 첫 결과 사용
+        """
+        count = self.collection.count()
+        if count == 0:
+            return [None] * len(vectors)
+        res = self.collection.query(query_embeddings=vectors.tolist(), n_results=min(2, count), include=["distances"])
+        return [
+            next(((_id, 1.0 - dist) for _id, dist in zip(ids, dists) if _id != own_id), None)
+            for ids, dists, own_id in zip(res["ids"], res["distances"], own_ids)
+        ]
+
+    def filter(self, records):
+        """
+        레코드 목록 → 중복이 아닌 레코드만 (통과한 질문은 바로 인덱스에 추가)
+        - 인덱스 안의 질문 + 같은 목록의 앞선 질문과 비교
+        """
+        if not records:
+            return []
+        vectors = self.embed([rec["question"] for rec in records])
+        nearest = self._nearest(vectors, [rec["id"] for rec in records])
+
+        kept, kept_vecs, dups = [], [], []
+        for rec, vec, near in zip(records, vectors, nearest):
+            match = near if near and near[1] >= self.threshold else None
+            if match is None and kept_vecs:
+                sims = np.stack(kept_vecs) @ vec
+                best = int(np.argmax(sims))
+                if sims[best] >= self.threshold:
+                    match = (kept[best]["id"], float(sims[best]))
+            if match is not None:
+                dups.append({"id": rec["id"], "question": rec["question"], "dup_of": match[0], "similarity": round(match[1], 4)})
+                continue
+            kept.append(rec)
+            kept_vecs.append(vec)
+
+        if kept:
+            self.collection.upsert(
+                ids=[rec["id"] for rec in kept],
+                embeddings=np.stack(kept_vecs).tolist(),
+                metadatas=[{"tags": rec.get("tags") or "", "source_file": rec.get("source_file") or ""} for rec in kept],
+            )
+        if dups and self.dup_log:
+            with open(self.dup_log, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(d, ensure_ascii=False) + "\n" for d in dups)
+        self.kept += len(kept)
+        self.dropped += len(dups)
+        return kept
+
+    def remove(self, ids):
+        """재생성 / 정리로 빠진 레코드의 질문을 인덱스에서 삭제"""
+        ids = list(ids)
+        for start in range(0, len(ids), WRITE_BATCH):
+            self.collection.delete(ids=ids[start : start + WRITE_BATCH])
+
+    def sync(self, jsonl_path):
+        """
+        인덱스를 현재 JSONL 레코드와 맞춤 (시작 시 1회)
+        - JSONL에 없는 id 삭제, 인덱스에 없는 레코드 추가 (처음 실행이면 기존 데이터셋 전체를 넣음)
+        """
+        records = {}
+        if Path(jsonl_path).exists():
+            with open(jsonl_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        rec = json.loads(line)
+                        records.setdefault(rec["id"], rec)
+
+        indexed = set()
+        total = self.collection.count()
+        for offset in range(0, total, WRITE_BATCH):
+            indexed.update(self.collection.get(limit=WRITE_BATCH, offset=offset, include=[])["ids"])
+        stale = indexed - records.keys()
+        if stale:
+            self.remove(stale)
+
+        missing = [rec for _id, rec in records.items() if _id not in indexed]
+        for start in range(0, len(missing), WRITE_BATCH):
+            part = missing[start : start + WRITE_BATCH]
+            self.collection.upsert(
+                ids=[rec["id"] for rec in part],
+                embeddings=self.embed([rec["question"] for rec in part]).tolist(),
+                metadatas=[{"tags": rec.get("tags") or "", "source_file": rec.get("source_file") or ""} for rec in part],
+            )
+        if stale or missing:
+            print(f"[DEDUP] 질문 인덱스 동기화: 추가 {len(missing)}개, 삭제 {len(stale)}개 (총 {self.collection.count()}개)")
+
+    def summary(self) -> str:
+        return f"통과 {self.kept}개 / 중복 제거 {self.dropped}개 (임계값 cosine {self.threshold})"
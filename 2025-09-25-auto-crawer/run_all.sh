@@ -29,14 +29,34 @@ fi
 echo "=== 1_update_docs.py 실행 ==="
 python3 1_update_docs.py
 
-echo "=== 2_remove_vs.py 실행 ==="
-python3 2_remove_vs.py
+# txt 문서 → tag 파티션 Arrow 데이터셋 (이후 단계는 폴더 순회/헤더 파싱 없이 memory-map으로 읽음)
+echo "=== 문서 코퍼스 데이터셋 생성 ==="
+python3 corpus_dataset.py pages
 
-echo "=== 3_insert_vs.py 실행 ==="
-python3 3_insert_vs.py
+# 태그 전체 삭제(2_remove_vs.py) 후 재임베딩 대신, 변경된 청크만 추가/삭제
+echo "=== 3_insert_vs.py --sync 실행 ==="
+python3 3_insert_vs.py --sync --from-corpus
 
-echo "=== 4_create_qa_json.py 실행 ==="
-python3 4_create_qa_json.py
+echo "=== near-duplicate 청크 병합 ==="
+python3 near_dedup.py --db-dir ./chroma_text_api --collection google_api_docs
+
+# 병합까지 끝난 부모 청크 기준으로 자식 스팬 동기화 (새 자식만 임베딩)
+echo "=== 부모-자식 청크 인덱스 동기화 ==="
+python3 child_index.py --db-dir ./chroma_text_api --collection google_api_docs
+
+# 동기화 / 병합으로 청크 id가 바뀌면 청크 저장소 / PCA / sparse / ColBERT 인덱스가 stale로 꺼짐 → 켜져 있던 것만 다시 빌드
+echo "=== 원문 청크 저장소 / 파생 인덱스 재빌드 (stale만) ==="
+python3 chunk_store.py --db-dir ./chroma_text_api --collection google_api_docs --if-stale
+python3 pca_tier.py --db-dir ./chroma_text_api --collection google_api_docs --if-stale
+python3 sparse_index.py --db-dir ./chroma_text_api --collection google_api_docs --if-stale
+python3 colbert_store.py --db-dir ./chroma_text_api --collection google_api_docs --if-stale
+
+# 모든 태그를 공유 클라이언트 하나로 생성 (바뀐 문서가 많은 태그부터, 태그별 토큰 사용량 출력)
+echo "=== QA 생성 (qa_scheduler.py) ==="
+python3 qa_scheduler.py --from-corpus
+
+echo "=== QA 코퍼스 데이터셋 생성 ==="
+python3 corpus_dataset.py qa
 
 echo "=== 5_remove_qa_vs.py 실행 ==="
 python3 5_remove_qa_vs.py
@@ -44,4 +64,13 @@ python3 5_remove_qa_vs.py
 echo "=== 6_insert_qa_vs.py 실행 ==="
 python3 6_insert_qa_vs.py
 
+# 매니페스트의 임베딩 프로필과 목표 프로필이 다른 컬렉션만 재임베딩 (같으면 확인만)
+echo "=== 임베딩 프로필 확인 ==="
+python3 embedding_profile.py
+
+echo "=== QA 청크 저장소 / 파생 인덱스 재빌드 (stale만) ==="
+python3 chunk_store.py --db-dir ./chroma_qa_db --collection qna_collection --if-stale
+python3 pca_tier.py --db-dir ./chroma_qa_db --collection qna_collection --if-stale
+python3 sparse_index.py --db-dir ./chroma_qa_db --collection qna_collection --if-stale
+
 echo "모든 작업 완료"
@@ -0,0 +1,145 @@
+import argparse
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import chromadb
+from tqdm import tqdm
+
+from index_manifest import stale_tier_config, update_collection_entry
+from embedding_profile import changed_keys, make_profile, resolve_profile
+
+# =========================
+# 설정
+# =========================
+EMBED_MODEL = "BAAI/bge-m3"
+ENCODE_BATCH = 32  # bge-m3 한 번에 인코딩할 문서 수
+MAX_LENGTH = 1024  # 문서 최대 토큰 길이 (청크 1200자 기준 충분)
+READ_BATCH = 5000
+INDEX_DIRNAME = "sparse_index"
+
+
+# =========================
+# 역색인 구성
+# =========================
+def build_inverted_index(lexical_weights):
+    """
+    문서별 {token_id: weight} 목록 → 토큰 기준 CSR 역색인
+    - term_ids[t] 토큰의 posting은 rows/weights[offsets[t]:offsets[t+1]]
+    """
+    terms, rows, weights = [], [], []
+    for row, lw in enumerate(lexical_weights):
+        for token_id, weight in lw.items():
+            terms.append(int(token_id))
+            rows.append(row)
+            weights.append(float(weight))
+
+    terms = np.asarray(terms, dtype=np.uint32)
+    order = np.argsort(terms, kind="stable")
+    terms = terms[order]
+    term_ids, starts = np.unique(terms, return_index=True)
+    offsets = np.append(starts, len(terms)).astype(np.int64)
+
+    return {
+        "term_ids": term_ids,
+        "offsets": offsets,
+        "rows": np.asarray(rows, dtype=np.uint32)[order],
+        "weights": np.asarray(weights, dtype=np.float32)[order],
+    }
+
+
+def save_inverted_index(out_dir: Path, index: dict, ids, tags):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, arr in index.items():
+        np.save(out_dir / f"{name}.npy", arr)
+    np.save(out_dir / "ids.npy", np.asarray(ids))
+    np.save(out_dir / "tags.npy", np.asarray(tags))
+
+
+# =========================
+# 빌드
+# =========================
+def build_sparse_index(db_dir: str, collection_name: str, write_dense: bool = False):
+    """
+    컬렉션 문서를 bge-m3로 한 번 인코딩해 sparse(lexical weight) 역색인 생성
+    - write_dense=True면 같은 forward 결과의 dense 벡터로 Chroma 임베딩도 갱신
+      (dense/sparse가 같은 인코딩 호출에서 나오도록 인덱스를 맞출 때 사용)
+      - 접두어 없는 bge-m3 정규화 벡터라 임베딩 프로필이 이와 다른 컬렉션에는 쓰지 않음
+    """
+    from FlagEmbedding import BGEM3FlagModel
+
+    if write_dense:
+        profile = resolve_profile(db_dir, collection_name)
+        changed = changed_keys(profile, make_profile(), keys=("model", "passage_prefix", "normalize"))
+        if changed:
+            print(f"[{collection_name}] 임베딩 프로필이 bge-m3 기본 설정과 다름({', '.join(changed)}) → --write-dense 불가")
+            return None
+
+    client = chromadb.PersistentClient(path=str(db_dir))
+    collection = client.get_collection(name=collection_name)
+    total = collection.count()
+    if total == 0:
+        print(f"[{collection_name}] 저장된 문서가 없습니다.")
+        return None
+
+    model = BGEM3FlagModel(EMBED_MODEL, use_fp16=False)
+
+    ids, tags, lexical_weights = [], [], []
+    for offset in tqdm(range(0, total, READ_BATCH), desc=f"[{collection_name}] sparse 인코딩"):
+        data = collection.get(include=["documents", "metadatas"], limit=READ_BATCH, offset=offset)
+        out = model.encode(
+            data["documents"],
+            batch_size=ENCODE_BATCH,
+            max_length=MAX_LENGTH,
+            return_dense=write_dense,
+            return_sparse=True,
+            return_colbert_vecs=False,
+        )
+        ids.extend(data["ids"])
+        tags.extend((md or {}).get("tags", "") for md in data["metadatas"])
+        lexical_weights.extend(out["lexical_weights"])
+
+        if write_dense:
+            collection.update(ids=data["ids"], embeddings=out["dense_vecs"].tolist())
+
+    index = build_inverted_index(lexical_weights)
+    rel_dir = Path(INDEX_DIRNAME) / collection_name
+    save_inverted_index(Path(db_dir) / rel_dir, index, ids, tags)
+
+    config = {
+        "enabled": True,
+        "model": EMBED_MODEL,
+        "path": rel_dir.as_posix(),
+        "count": len(ids),
+        "terms": int(len(index["term_ids"])),
+        "postings": int(len(index["rows"])),
+        "built_at": date.today().isoformat(),
+    }
+    update_collection_entry(db_dir, collection_name, "sparse", config)
+    print(
+        f"[{collection_name}] sparse 역색인 저장 완료: 문서 {len(ids)}개, "
+        f"토큰 {config['terms']}개, posting {config['postings']}개"
+    )
+    return config
+
+
+# =========================
+# 엔트리포인트
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="bge-m3 sparse(lexical weight) 역색인 빌드")
+    parser.add_argument("--db-dir", default="./chroma_text_api")
+    parser.add_argument("--collection", default="google_api_docs")
+    parser.add_argument("--write-dense", action="store_true", help="같은 인코딩 결과로 dense 임베딩도 갱신")
+    parser.add_argument("--disable", action="store_true", help="서빙 시 sparse 모드 끄기 (BM25 사용)")
+    parser.add_argument("--if-stale", action="store_true", help="id 변경으로 stale 표시된 경우에만 다시 빌드")
+    args = parser.parse_args()
+
+    if args.disable:
+        update_collection_entry(args.db_dir, args.collection, "sparse", None)
+        print(f"[{args.collection}] sparse 모드 비활성화")
+    elif args.if_stale:
+        if stale_tier_config(args.db_dir, args.collection, "sparse"):
+            build_sparse_index(args.db_dir, args.collection, args.write_dense)
+    else:
+        build_sparse_index(args.db_dir, args.collection, args.write_dense)
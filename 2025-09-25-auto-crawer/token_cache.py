@@ -0,0 +1,55 @@
+import os
+import hashlib
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import tiktoken
+
+# =========================
+# 설정
+# =========================
+TOKEN_CACHE_DIR = "./token_cache"
+ENCODING = "cl100k_base"
+
+
+class TokenCache:
+    """
+    문서 텍스트 → tiktoken 토큰 id 배열 캐시 (내용 sha1 키, uint32 .npy 파일)
+    - 청킹 / 페어 길이 계산 / 컨텍스트 자르기가 같은 배열을 slice로 공유 → 문서당 인코딩 1회
+    - 재실행 시 내용이 같은 문서는 인코딩 없이 파일에서 읽음
+    - 인코딩 이름별 하위 폴더 (토크나이저가 바뀌면 자동으로 캐시 미스)
+    """
+
+    def __init__(self, cache_dir=TOKEN_CACHE_DIR, encoding: str = ENCODING):
+        self.enc = tiktoken.get_encoding(encoding)
+        self.dir = Path(cache_dir) / encoding
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, sha1: str) -> Path:
+        return self.dir / sha1[:2] / f"{sha1}.npy"
+
+    def tokens(self, text: str) -> np.ndarray:
+        sha1 = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        path = self.path(sha1)
+        if path.exists():
+            self.hits += 1
+            return np.load(path)
+
+        self.misses += 1
+        toks = np.asarray(self.enc.encode(text), dtype=np.uint32)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, toks)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return toks
+
+    def summary(self) -> str:
+        return f"토큰 캐시 hit {self.hits} / miss {self.misses}"
@@ -0,0 +1,56 @@
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBED_MODEL = "BAAI/bge-m3"
+QUERY_MAX_LENGTH = 512
+
+_model = None
+
+
+def get_bge_m3():
+    """bge-m3 (dense + sparse + multi-vector 동시 출력) 모델 lazy 로드"""
+    global _model
+    if _model is None:
+        from FlagEmbedding import BGEM3FlagModel
+
+        _model = BGEM3FlagModel(EMBED_MODEL, use_fp16=False)
+    return _model
+
+
+@lru_cache(maxsize=256)
+def encode_query(query: str):
+    """
+    쿼리를 bge-m3로 한 번만 인코딩해서 dense / sparse / colbert 출력을 모두 반환
+    - 같은 쿼리로 여러 retriever(원문, QA)가 호출돼도 forward는 1회
+    """
+    out = get_bge_m3().encode(
+        [query],
+        max_length=QUERY_MAX_LENGTH,
+        return_dense=True,
+        return_sparse=True,
+        return_colbert_vecs=True,
+    )
+    return {
+        "dense": np.asarray(out["dense_vecs"][0], dtype=np.float32),
+        "sparse": dict(out["lexical_weights"][0]),
+        "colbert": np.asarray(out["colbert_vecs"][0], dtype=np.float32),
+    }
+
+
+class BGEM3DenseEmbeddings(Embeddings):
+    """
+    get_bge_m3() 모델의 dense 출력 임베딩 (CLS 풀링 + L2 정규화, HuggingFaceEmbeddings와 같은 벡터 공간)
+    - sparse / ColBERT와 같은 모델 1개를 공유하고, 쿼리는 encode_query 캐시를 그대로 사용
+    """
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        out = get_bge_m3().encode(texts, return_dense=True, return_sparse=False, return_colbert_vecs=False)
+        return np.asarray(out["dense_vecs"], dtype=np.float32).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return encode_query(text)["dense"].tolist()
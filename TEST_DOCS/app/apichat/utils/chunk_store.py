@@ -0,0 +1,91 @@
+import os
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import zstandard as zstd
+from langchain_core.documents import Document
+
+from .index_manifest import get_collection_entry
+
+# 청크 저장소 컬럼 구성 (2025-09-25-auto-crawer/chunk_store.py가 이 모듈을 import해서 같은 구성으로 씀)
+DICT_COLUMNS = ["tags", "source", "source_file"]
+
+
+class ChunkStore:
+    """청크 저장소 리더 (모든 배열은 memory-map, 텍스트는 요청한 행만 압축 해제)"""
+
+    def __init__(self, store_dir):
+        store_dir = Path(store_dir)
+
+        def load(name):
+            return np.load(store_dir / f"{name}.npy", mmap_mode="r")
+
+        self.blob = np.memmap(store_dir / "blob.bin", dtype=np.uint8, mode="r")
+        self.offsets = load("offsets")
+        self.ids = load("ids")
+        self.id_sorted = load("id_sorted")
+        self.id_rows = load("id_rows")
+        self.chunk_id = load("chunk_id")
+        self.codes = {col: load(f"{col}_codes") for col in DICT_COLUMNS}
+        self.vocab = {col: np.load(store_dir / f"{col}_vocab.npy") for col in DICT_COLUMNS}
+        # 나머지 메타데이터 JSON 컬럼 (이 컬럼이 없던 이전 저장소 / 전부 빈 값이면 None)
+        extra_path = store_dir / "extra.bin"
+        has_extra = extra_path.exists() and extra_path.stat().st_size > 0
+        self.extra = np.memmap(extra_path, dtype=np.uint8, mode="r") if has_extra else None
+        self.extra_offsets = load("extra_offsets") if has_extra else None
+
+        dict_path = store_dir / "zstd_dict.bin"
+        dict_data = zstd.ZstdCompressionDict(dict_path.read_bytes()) if dict_path.exists() else None
+        self.decompressor = zstd.ZstdDecompressor(dict_data=dict_data)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows_for_ids(self, ids):
+        """id 목록 → row 목록 (없는 id는 None)"""
+        ids = np.asarray(ids, dtype=str)
+        pos = np.searchsorted(self.id_sorted, ids)
+        pos = np.minimum(pos, len(self.id_sorted) - 1)
+        found = self.id_sorted[pos] == ids
+        return [int(self.id_rows[p]) if ok else None for p, ok in zip(pos, found)]
+
+    def rows_for_tags(self, tags):
+        """태그 목록에 해당하는 row 배열"""
+        codes = np.flatnonzero(np.isin(self.vocab["tags"], list(tags)))
+        return np.flatnonzero(np.isin(self.codes["tags"], codes))
+
+    def text(self, row: int) -> str:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return self.decompressor.decompress(self.blob[start:end].tobytes()).decode("utf-8")
+
+    def metadata(self, row: int) -> dict:
+        md = {col: str(self.vocab[col][self.codes[col][row]]) for col in DICT_COLUMNS}
+        if self.chunk_id[row] >= 0:
+            md["chunk_id"] = int(self.chunk_id[row])
+        if self.extra is not None:
+            start, end = int(self.extra_offsets[row]), int(self.extra_offsets[row + 1])
+            if end > start:
+                md.update(json.loads(self.extra[start:end].tobytes().decode("utf-8")))
+        return md
+
+    def documents(self, rows) -> List[Document]:
+        """row 목록 → Document 목록 (요청한 k개만 압축 해제)"""
+        return [Document(page_content=self.text(r), metadata=self.metadata(r)) for r in rows]
+
+
+def load_chunk_store(db_dir: str, collection_name: str) -> Optional[ChunkStore]:
+    """매니페스트에 청크 저장소가 있을 때만 로드 (없으면 Chroma에서 조회)."""
+    config = get_collection_entry(db_dir, collection_name).get("chunk_store") or {}
+    if not config.get("enabled"):
+        if config.get("stale"):
+            # 저장소 생성 뒤 청크 id가 바뀜 (다시 빌드 전까지는 저장소에 없는 청크가 생김)
+            print(f"청크 저장소 stale, Chroma에서 조회: {collection_name}")
+        return None
+
+    store_dir = os.path.join(db_dir, config["path"])
+    if not os.path.isdir(store_dir):
+        print(f"청크 저장소 폴더 없음, Chroma에서 조회: {store_dir}")
+        return None
+    return ChunkStore(store_dir)
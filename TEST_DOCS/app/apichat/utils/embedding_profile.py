@@ -0,0 +1,81 @@
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from .bge_m3 import EMBED_MODEL as BGE_M3_MODEL, BGEM3DenseEmbeddings
+from .index_manifest import get_collection_entry
+from .onnx_embeddings import EMBED_BACKEND, MAX_LENGTH, load_embeddings
+
+# 매니페스트에 프로필이 없을 때 기본값 (2025-09-25-auto-crawer/embedding_profile.py와 동일)
+DEFAULT_PROFILE = {
+    "model": "BAAI/bge-m3",
+    "query_prefix": "",
+    "passage_prefix": "",
+    "normalize": True,
+    "dim": 1024,
+    "max_length": MAX_LENGTH,
+}
+
+# 레지스트리 도입 전 컬렉션 설정 (프로필 기록 없이 받은 DB 폴더용)
+LEGACY_PROFILES = {
+    "qna_collection": {"passage_prefix": "passage: "},
+}
+
+# 같은 모델 설정은 컬렉션이 달라도 모델 1개만 로드
+_models = {}
+
+
+def load_profile(db_dir, collection_name: str, default_model: str = None) -> dict:
+    """컬렉션 임베딩 프로필 (매니페스트 embedding_profile → 없으면 레지스트리 도입 전 설정)"""
+    profile = dict(DEFAULT_PROFILE)
+    if default_model:
+        profile["model"] = default_model
+    stored = get_collection_entry(db_dir, collection_name).get("embedding_profile")
+    profile.update(stored or LEGACY_PROFILES.get(collection_name, {}))
+    return profile
+
+
+class ProfileEmbeddings(Embeddings):
+    """
+    컬렉션 임베딩 프로필대로 설정되는 임베딩
+    - 쿼리에는 query_prefix, 문서에는 passage_prefix를 붙이고 정규화 / max_length도 프로필을 따름
+    - torch 백엔드의 bge-m3 정규화 프로필은 bge_m3.get_bge_m3() 모델로 인코딩 (하이브리드 검색과 모델 / 쿼리 캐시 공유)
+    - DB 폴더를 내려받은 뒤 매니페스트를 읽도록 첫 임베딩 호출 때 프로필과 모델을 로드
+    """
+
+    def __init__(self, db_dir, collection_name: str, default_model: str = None):
+        self.db_dir = db_dir
+        self.collection_name = collection_name
+        self.default_model = default_model
+        self._profile = None
+
+    @property
+    def profile(self) -> dict:
+        if self._profile is None:
+            self._profile = load_profile(self.db_dir, self.collection_name, self.default_model)
+            p = self._profile
+            print(
+                f"[{self.collection_name}] 임베딩 프로필: {p['model']} "
+                f"(query_prefix={p['query_prefix']!r}, passage_prefix={p['passage_prefix']!r}, "
+                f"normalize={p['normalize']}, dim={p['dim']})"
+            )
+        return self._profile
+
+    @property
+    def base(self) -> Embeddings:
+        p = self.profile
+        key = (p["model"], p["normalize"], p["max_length"])
+        if key not in _models:
+            if EMBED_BACKEND == "torch" and p["model"] == BGE_M3_MODEL and p["normalize"]:
+                # sparse / ColBERT용 bge-m3와 같은 모델을 공유 (bge-m3 두 벌 로드 방지)
+                _models[key] = BGEM3DenseEmbeddings()
+            else:
+                _models[key] = load_embeddings(p["model"], normalize=p["normalize"], max_length=p["max_length"])
+        return _models[key]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        prefix = self.profile["passage_prefix"]
+        return self.base.embed_documents([prefix + t for t in texts])
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(self.profile["query_prefix"] + text)
@@ -0,0 +1,44 @@
+import os
+import json
+
+# 인덱스 빌드 스크립트(2025-09-25-auto-crawer/index_manifest.py)가
+# 벡터 DB 폴더 안에 함께 저장하는 매니페스트 파일명
+MANIFEST_FILENAME = "index_manifest.json"
+
+
+def load_manifest(db_dir) -> dict:
+    """DB 폴더의 매니페스트 로드. 없거나 깨졌으면 빈 구조 반환."""
+    path = os.path.join(db_dir, MANIFEST_FILENAME)
+    if not os.path.exists(path):
+        return {"collections": {}}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except Exception as e:
+        print(f"매니페스트 로드 실패({path}): {e}")
+        return {"collections": {}}
+    manifest.setdefault("collections", {})
+    return manifest
+
+
+def get_collection_entry(db_dir, collection_name: str) -> dict:
+    """컬렉션별 설정 조회 (없으면 빈 dict)."""
+    return load_manifest(db_dir)["collections"].get(collection_name, {})
+
+
+def apply_hnsw_search_ef(vectorstore, db_dir, collection_name: str):
+    """
+    매니페스트의 ef_search를 로드된 컬렉션에 반영 (M / ef_construction은 빌드 시 고정)
+    - ef_search는 재빌드 없이 바꿀 수 있는 검색 시점 파라미터
+    """
+    search_ef = (get_collection_entry(db_dir, collection_name).get("hnsw") or {}).get("search_ef")
+    if not search_ef:
+        return
+    try:
+        collection = vectorstore._collection
+        current = (collection.configuration or {}).get("hnsw", {}).get("ef_search")
+        if current != search_ef:
+            collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+            print(f"[{collection_name}] HNSW ef_search {current} → {search_ef}")
+    except Exception as e:
+        print(f"[{collection_name}] HNSW ef_search 적용 실패, 기존 설정 사용: {e}")
@@ -0,0 +1,81 @@
+import os
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# 임베딩 백엔드 스위치 (기본 torch, EMBED_BACKEND=onnx 이면 ONNX Runtime 사용)
+# ONNX 모델은 2025-09-25-auto-crawer/onnx_encoder.py 로 변환한 폴더를 사용
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./onnx/bge-m3")
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "1") == "1"
+MAX_LENGTH = 8192
+
+
+class OnnxBgeM3Embeddings(Embeddings):
+    """
+    ONNX Runtime(CPU) bge-m3 dense 임베딩 (CLS 풀링 + L2 정규화)
+    - HuggingFaceEmbeddings(normalize_embeddings=True)와 같은 벡터 공간이라 기존 DB 그대로 사용
+    """
+
+    def __init__(
+        self,
+        model_dir: str = ONNX_MODEL_DIR,
+        quantized: bool = ONNX_QUANTIZED,
+        batch_size: int = 32,
+        normalize: bool = True,
+        max_length: int = MAX_LENGTH,
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        model_file = "model_int8.onnx" if quantized else "model.onnx"
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.batch_size = batch_size
+        self.normalize = normalize
+        self.max_length = max_length
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        parts = []
+        for start in range(0, len(texts), self.batch_size):
+            enc = self.tokenizer(
+                texts[start : start + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self.input_names}
+            parts.append(self.session.run(None, feeds)[0][:, 0])
+        vecs = np.concatenate(parts).astype(np.float32)
+        if not self.normalize:
+            return vecs
+        return vecs / np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+
+def load_embeddings(model_name: str, normalize: bool = True, max_length: int = MAX_LENGTH) -> Embeddings:
+    """EMBED_BACKEND 설정에 따라 HuggingFaceEmbeddings 또는 ONNX 임베딩 반환 (max_length는 ONNX만 적용)"""
+    if EMBED_BACKEND == "onnx":
+        print(f"임베딩 백엔드: ONNX Runtime ({ONNX_MODEL_DIR}, int8={ONNX_QUANTIZED})")
+        return OnnxBgeM3Embeddings(ONNX_MODEL_DIR, ONNX_QUANTIZED, normalize=normalize, max_length=max_length)
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        encode_kwargs={"normalize_embeddings": normalize},  # DB 생성 시 설정과 일치해야 함
+    )
@@ -0,0 +1,95 @@
+import os
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from .bge_m3 import encode_query
+from .index_manifest import get_collection_entry
+
+INT8_SCALE = 127.0
+
+
+def chunk_key(metadata: dict) -> str:
+    """청크 식별 키 (colbert_store.py가 빌드 시 이 함수를 import해서 사용)"""
+    return f"{metadata.get('tags', '')}/{metadata.get('source_file', '')}#{metadata.get('chunk_id', '')}"
+
+
+class ColbertStore:
+    """
+    bge-m3 multi-vector(ColBERT) 토큰 벡터 저장소 (colbert_store.py 산출물, int8, memory-map 로드)
+    - 청크 i의 토큰은 tokens[offsets[i]:offsets[i+1]]
+    """
+
+    def __init__(self, store_dir: str):
+        self.tokens = np.load(os.path.join(store_dir, "tokens.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(store_dir, "offsets.npy"))
+        keys = np.load(os.path.join(store_dir, "keys.npy"))
+        self.row_by_key = {key: row for row, key in enumerate(keys.tolist())}
+
+    def maxsim(self, query_vecs: np.ndarray, rows: List[int]) -> np.ndarray:
+        """
+        후보 청크들의 MaxSim 점수를 한 번의 행렬곱으로 계산
+        - score(d) = mean_i max_j <q_i, d_j>
+        """
+        rows = np.asarray(rows)
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+
+        seg_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        token_idx = np.repeat(starts - seg_starts, lengths) + np.arange(lengths.sum())
+        doc_tokens = self.tokens[token_idx].astype(np.float32) / INT8_SCALE
+
+        sim = query_vecs @ doc_tokens.T
+        return np.maximum.reduceat(sim, seg_starts, axis=1).mean(axis=0)
+
+    def rerank(self, query: str, docs: List[Document], top_n: Optional[int] = None) -> List[Document]:
+        """
+        상위 top_n 후보만 MaxSim으로 재정렬 (None이면 전체, 저장소에 없는 문서는 원래 순서로 뒤에 유지)
+        - 쿼리 토큰 벡터는 BGEM3HybridRetriever의 dense/sparse 검색과 같은 encode_query 결과를 재사용 (캐시)
+        """
+        top_n = len(docs) if top_n is None else top_n
+        head, tail = docs[:top_n], docs[top_n:]
+        rows = [self.row_by_key.get(chunk_key(doc.metadata)) for doc in head]
+        known = [i for i, row in enumerate(rows) if row is not None]
+        if not known:
+            return docs
+
+        query_vecs = encode_query(query)["colbert"]
+        scores = self.maxsim(query_vecs, [rows[i] for i in known])
+        reranked = [head[known[i]] for i in np.argsort(-scores)]
+        unknown = [doc for i, doc in enumerate(head) if rows[i] is None]
+        return reranked + unknown + tail
+
+
+def load_colbert_store(db_dir: str, collection_name: str) -> Optional[ColbertStore]:
+    """매니페스트에서 해당 컬렉션 MaxSim 재정렬이 켜져 있을 때만 로드."""
+    config = get_collection_entry(db_dir, collection_name).get("colbert") or {}
+    if not config.get("enabled"):
+        return None
+
+    store_dir = os.path.join(db_dir, config["path"])
+    if not os.path.isdir(store_dir):
+        print(f"multi-vector 저장소 폴더 없음, 재정렬 생략: {store_dir}")
+        return None
+    return ColbertStore(store_dir)
+
+
+class ColbertRerankRetriever(BaseRetriever):
+    """
+    bge-m3 하이브리드 retriever 결과(융합 순서)를 MaxSim으로 2차 재정렬하는 retriever
+    - base_retriever는 BGEM3HybridRetriever (같은 쿼리 인코딩을 공유해야 추가 forward가 없음)
+    - top_n은 융합 결과 크기(dense k + sparse k)에 맞춤 (그보다 크면 의미 없음)
+    """
+
+    base_retriever: BaseRetriever
+    store: ColbertStore
+    top_n: Optional[int] = None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        docs = self.base_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return self.store.rerank(query, docs, self.top_n)
@@ -3,8 +3,8 @@ from dotenv import load_dotenv
 
 import torch
 from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 from .vector_db import create_chroma_db
+from .embedding_profile import ProfileEmbeddings
 
 # .env 로드
 load_dotenv()
@@ -16,10 +16,9 @@ DB_DIR = os.path.join(HERE, "chroma_db")
 COLLECTION_NAME = "google_api_docs"
 EMBED_MODEL = "BAAI/bge-m3"
 
-embeddings = HuggingFaceEmbeddings(
-    model_name=EMBED_MODEL,
-    encode_kwargs={"normalize_embeddings": True},  # DB 생성 시 설정과 일치해야 함
-)
+# 매니페스트의 임베딩 프로필(모델, 접두어, 정규화)대로 쿼리 임베딩
+# EMBED_BACKEND=onnx 이면 ONNX Runtime(int8) 인코더, 기본은 HuggingFaceEmbeddings
+embeddings = ProfileEmbeddings(DB_DIR, COLLECTION_NAME, EMBED_MODEL)
 
 
 def retriever_setting(force_download=False):
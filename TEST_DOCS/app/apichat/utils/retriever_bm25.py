@@ -2,8 +2,10 @@ from collections import defaultdict
 from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
-from .retriever import retriever_setting
+from .retriever import retriever_setting, DB_DIR, COLLECTION_NAME
 from .retriever_qa import retriever_setting2
+from .retriever_qa import DB_DIR as QA_DB_DIR, COLLECTION_NAME as QA_COLLECTION_NAME
+from .chunk_store import load_chunk_store
 
 
 # 벡터DB tag 통일 후 삭제 예정
@@ -30,56 +32,83 @@ def normalize_tag(tag: str, is_qa: bool = False) -> str:
     return TAG_ALIAS.get(tag, tag)
 
 
-def bm25_retrievers_by_tag(k=5):
+def raw_tags(api_tags, is_qa: bool = False):
     """
-    원문 Chroma DB 문서를 태그별로 분리하여 BM25 retrievers 생성
+    표준 태그 목록 → DB에 저장된 원본 태그까지 포함한 목록 (메타 필터용)
     """
-    vs = retriever_setting()
+    alias = TAG_ALIAS_QA if is_qa else TAG_ALIAS
+    tags = list(api_tags or [])
+    tags += [raw for raw, std in alias.items() if std in tags and raw not in tags]
+    return tags
 
-    # Chroma에서 문서 + 메타데이터 꺼내오기
-    data = vs.get(include=["documents", "metadatas"])
-    docs = data["documents"]
-    metas = data["metadatas"]
 
-    # 태그별로 문서 묶기
+def tag_documents(vs, store, is_qa: bool = False):
+    """
+    문서를 표준 태그별로 묶어서 반환
+    - 청크 저장소가 있으면: 태그 컬럼으로 행을 고르고 해당 행만 압축 해제 (SQL 조회 없음)
+    - 없으면: Chroma에서 전체 문서 + 메타데이터 조회
+    """
     tag_docs = defaultdict(list)
-    for doc, meta in zip(docs, metas):
-        # 태그 alias 적용
-        raw_tag = meta["tags"]
-        tag = normalize_tag(raw_tag, is_qa=False)  # 원문 DB → 표준 태그
 
+    if store is not None:
+        for raw_tag in store.vocab["tags"].tolist():
+            tag = normalize_tag(raw_tag, is_qa=is_qa)
+            tag_docs[tag].extend(store.documents(store.rows_for_tags([raw_tag])))
+        return tag_docs
+
+    # Chroma에서 문서 + 메타데이터 꺼내오기
+    data = vs.get(include=["documents", "metadatas"])
+    for doc, meta in zip(data["documents"], data["metadatas"]):
+        # 태그 alias 적용
+        tag = normalize_tag(meta["tags"], is_qa=is_qa)
         tag_docs[tag].append(Document(page_content=doc, metadata=meta))
+    return tag_docs
+
 
-    # 태그별 BM25Retriever 생성
+def build_bm25_dict(tag_docs, k):
+    """태그별 BM25Retriever 생성"""
     bm25_dict = {}
     for tag, dlist in tag_docs.items():
         r = BM25Retriever.from_documents(dlist)
         r.k = k
         bm25_dict[tag] = r
-
     return bm25_dict
 
 
+# 인덱스는 서빙 중 바뀌지 않으므로 k별로 한 번만 생성해서 재사용
+_bm25_cache = {}
+
+
+def bm25_retrievers_by_tag(k=5):
+    """
+    원문 Chroma DB 문서를 태그별로 분리하여 BM25 retrievers 생성
+    """
+    key = ("text", k)
+    if key not in _bm25_cache:
+        store = load_chunk_store(DB_DIR, COLLECTION_NAME)
+        vs = retriever_setting() if store is None else None
+        _bm25_cache[key] = build_bm25_dict(tag_documents(vs, store, is_qa=False), k)
+    return _bm25_cache[key]
+
+
 def bm25_retrievers_by_tag_qa(k=10):
     """
     QA Chroma DB 문서를 태그별로 분리하여 BM25 retrievers 생성
     """
-    vs = retriever_setting2()
-    data = vs.get(include=["documents", "metadatas"])
-    docs = data["documents"]
-    metas = data["metadatas"]
-
-    tag_docs = defaultdict(list)
-    for doc, meta in zip(docs, metas):
-        raw_tag = meta["tags"]
-        tag = normalize_tag(raw_tag, is_qa=True)  # QA DB → 표준 태그
+    key = ("qa", k)
+    if key not in _bm25_cache:
+        store = load_chunk_store(QA_DB_DIR, QA_COLLECTION_NAME)
+        vs = retriever_setting2() if store is None else None
+        _bm25_cache[key] = build_bm25_dict(tag_documents(vs, store, is_qa=True), k)
+    return _bm25_cache[key]
 
-        tag_docs[tag].append(Document(page_content=doc, metadata=meta))
 
-    bm25_dict = {}
-    for tag, dlist in tag_docs.items():
-        r = BM25Retriever.from_documents(dlist)
-        r.k = k
-        bm25_dict[tag] = r
-        
-    return bm25_dict
\ No newline at end of file
+def bm25_retrievers_by_tag_child(child_vs, k=20):
+    """
+    자식 스팬 컬렉션(child_index.py)을 태그별로 분리하여 BM25 retrievers 생성
+    - 부모-자식 검색에서 dense 자식 검색과 함께 앙상블 (결과는 ParentChildRetriever가 부모로 확장)
+    """
+    key = ("child", k)
+    if key not in _bm25_cache:
+        _bm25_cache[key] = build_bm25_dict(tag_documents(child_vs, None, is_qa=False), k)
+    return _bm25_cache[key]
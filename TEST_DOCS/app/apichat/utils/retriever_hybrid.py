@@ -2,14 +2,110 @@ from collections import defaultdict
 from langchain.retrievers import EnsembleRetriever
 from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
-from .retriever import retriever_setting
+from .retriever import retriever_setting, DB_DIR, COLLECTION_NAME, embeddings
 from .retriever_qa import retriever_setting2
-from .retriever_bm25 import bm25_retrievers_by_tag, bm25_retrievers_by_tag_qa
+from .retriever_qa import DB_DIR as QA_DB_DIR, COLLECTION_NAME as QA_COLLECTION_NAME
+from .retriever_qa import embeddings as qa_embeddings
+from .retriever_bm25 import bm25_retrievers_by_tag, bm25_retrievers_by_tag_qa, bm25_retrievers_by_tag_child, raw_tags
+from .retriever_pca import load_pca_tier, PCATierRetriever
+from .retriever_sparse import load_sparse_index, BGEM3HybridRetriever
+from .retriever_parent_child import load_child_index, ParentChildRetriever
+from .reranker_colbert import load_colbert_store, ColbertRerankRetriever
+from .chunk_store import load_chunk_store
+from .index_manifest import apply_hnsw_search_ef
+
+CHILD_FANOUT = 4  # 부모-자식 모드에서 부모 k개를 채우기 위해 검색할 자식 수 배율
 
 _vs = retriever_setting()
 
 _vs_qa = retriever_setting2()
 
+# 매니페스트에 HNSW 스윕 결과가 있으면 ef_search 반영
+apply_hnsw_search_ef(_vs, DB_DIR, COLLECTION_NAME)
+apply_hnsw_search_ef(_vs_qa, QA_DB_DIR, QA_COLLECTION_NAME)
+
+# 매니페스트에 PCA 티어가 켜진 컬렉션만 축소 차원 1차 검색 사용 (없으면 None)
+_pca_tier = load_pca_tier(DB_DIR, COLLECTION_NAME)
+_pca_tier_qa = load_pca_tier(QA_DB_DIR, QA_COLLECTION_NAME)
+
+# 매니페스트에 sparse 모드가 켜진 컬렉션은 BM25 대신 bge-m3 lexical weight 사용 (없으면 None)
+_sparse_index = load_sparse_index(DB_DIR, COLLECTION_NAME)
+_sparse_index_qa = load_sparse_index(QA_DB_DIR, QA_COLLECTION_NAME)
+
+# 원문 청크 multi-vector 저장소 (켜져 있으면 bge-m3 하이브리드 결과를 MaxSim으로 2차 재정렬)
+# 쿼리 토큰 벡터는 BGEM3HybridRetriever와 같은 bge-m3 인코딩 결과를 재사용하므로 sparse 모드에서만 사용
+# (HuggingFaceEmbeddings dense 경로에 붙이면 bge-m3를 한 번 더 로드하고 쿼리마다 forward가 추가됨)
+_colbert_store = load_colbert_store(DB_DIR, COLLECTION_NAME) if _sparse_index is not None else None
+
+# 청크 저장소 (있으면 PCA/sparse 검색 결과 텍스트를 Chroma SQLite 대신 memory-map 파일에서 조회)
+_chunk_store = load_chunk_store(DB_DIR, COLLECTION_NAME)
+_chunk_store_qa = load_chunk_store(QA_DB_DIR, QA_COLLECTION_NAME)
+
+# 부모-자식 인덱스 (켜져 있으면 작은 자식 스팬으로 검색하고 글자 예산 안에서만 부모로 확장, 없으면 None)
+_child_index = load_child_index(DB_DIR, COLLECTION_NAME, embeddings)
+
+
+def with_rerank(retriever):
+    """MaxSim 재정렬이 켜져 있으면 retriever를 감싸서 반환 (bge-m3 하이브리드 retriever 전용)"""
+    if _colbert_store is None:
+        return retriever
+    return ColbertRerankRetriever(
+        base_retriever=retriever, store=_colbert_store, top_n=retriever.k + retriever.sparse_k
+    )
+
+
+def dense_retriever(vs, tier, embedding, tags, k, filters, chunk_store=None):
+    """
+    dense 검색 retriever 선택
+    - PCA 티어가 있으면: 축소 차원 후보 검색 + 원본 차원 재채점
+    - 없으면: 기존 Chroma retriever
+    """
+    if tier is not None:
+        return PCATierRetriever(
+            vectorstore=vs,
+            embeddings=embedding,
+            tier=tier,
+            k=k,
+            tags=tags or None,
+            chunk_store=chunk_store,
+        )
+    return vs.as_retriever(search_kwargs={"k": k}, filter=filters)
+
+
+def bm25_ensemble(bm25_dict, api_tags):
+    """요청 태그들의 BM25 retriever (없으면 None, 여러 개면 동일 가중치 앙상블)"""
+    bm25_retrievers = [bm25_dict[tag] for tag in api_tags if tag in bm25_dict]
+    if not bm25_retrievers:
+        return None
+    if len(bm25_retrievers) == 1:
+        return bm25_retrievers[0]
+    return EnsembleRetriever(
+        retrievers=bm25_retrievers,
+        weights=[1 / len(bm25_retrievers)] * len(bm25_retrievers)
+    )
+
+
+def parent_child_retriever(api_tags, k):
+    """
+    자식 스팬 검색(dense + BM25) → 부모별로 묶어 글자 예산 안에서 확장
+    - 부모 하나에 자식 여러 개가 걸릴 수 있으므로 자식은 k의 CHILD_FANOUT배 검색
+    """
+    child_k = k * CHILD_FANOUT
+    tags = raw_tags(api_tags)
+    child_retriever = _child_index.vectorstore.as_retriever(
+        search_kwargs={"k": child_k, "filter": {"tags": {"$in": tags}} if tags else None}
+    )
+    bm25 = bm25_ensemble(bm25_retrievers_by_tag_child(_child_index.vectorstore, k=child_k), api_tags)
+    if bm25 is not None:
+        child_retriever = EnsembleRetriever(retrievers=[child_retriever, bm25], weights=[0.8, 0.2])
+
+    return ParentChildRetriever(
+        child_retriever=child_retriever,
+        vectorstore=_vs,
+        k=k,
+        budget_chars=_child_index.budget_chars,
+        chunk_store=_chunk_store,
+    )
 
 
 def hybrid_retriever_setting(api_tags,k=5):
@@ -21,8 +117,29 @@ def hybrid_retriever_setting(api_tags,k=5):
     if api_tags:
         filters["tags"] = {"$in": api_tags}
 
+    # 부모-자식 모드: 부모 청크 단위 인덱스(sparse / PCA / BM25) 대신 자식 스팬 검색
+    if _child_index is not None:
+        return parent_child_retriever(api_tags, k)
+
+    # sparse 모드: bge-m3 한 번 인코딩으로 dense + sparse 검색 (BM25 생략)
+    if _sparse_index is not None:
+        return with_rerank(
+            BGEM3HybridRetriever(
+                vectorstore=_vs,
+                embeddings=embeddings,
+                sparse_index=_sparse_index,
+                pca_tier=_pca_tier,
+                chunk_store=_chunk_store,
+                k=k,
+                sparse_k=k,
+                tags=raw_tags(api_tags) or None,
+            )
+        )
+
     # Chroma retriever (필터 적용)
-    chroma_retriever = _vs.as_retriever(search_kwargs={"k": k}, filter=filters)
+    chroma_retriever = dense_retriever(
+        _vs, _pca_tier, embeddings, raw_tags(api_tags), k, filters, _chunk_store
+    )
 
     # 태그별 BM25 retrievers
     # bm25_retrievers = 요청된 태그들(api_tags)에 해당하는 BM25Retriever 객체들의 리스트
@@ -57,7 +174,21 @@ def hybrid_retriever_setting_qa(api_tags,k=10):
     if api_tags:
         filters["tags"] = {"$in": api_tags}
 
-    chroma_retriever = _vs_qa.as_retriever(search_kwargs={"k": 5}, filter=filters)
+    if _sparse_index_qa is not None:
+        return BGEM3HybridRetriever(
+            vectorstore=_vs_qa,
+            embeddings=qa_embeddings,
+            sparse_index=_sparse_index_qa,
+            pca_tier=_pca_tier_qa,
+            chunk_store=_chunk_store_qa,
+            k=5,
+            sparse_k=k,
+            tags=raw_tags(api_tags, is_qa=True) or None,
+        )
+
+    chroma_retriever = dense_retriever(
+        _vs_qa, _pca_tier_qa, qa_embeddings, raw_tags(api_tags, is_qa=True), 5, filters, _chunk_store_qa
+    )
 
     _bm25_dict_qa = bm25_retrievers_by_tag_qa(k=k)
 
@@ -0,0 +1,146 @@
+from collections import OrderedDict
+from typing import List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_community.vectorstores import Chroma
+
+from .chunk_store import ChunkStore
+from .index_manifest import get_collection_entry
+
+SNAP_CHARS = 80  # 확장한 경계를 이 글자 수 안의 줄바꿈에 맞춤 (문장 중간에서 잘리지 않게)
+
+
+class ChildIndex:
+    """
+    부모 청크를 작은 스팬으로 나눠 임베딩한 자식 컬렉션(child_index.py 산출물)
+    - budget_chars: 검색 결과 전체 글자 수 상한 (매니페스트 값)
+    """
+
+    def __init__(self, vectorstore: Chroma, budget_chars: int):
+        self.vectorstore = vectorstore
+        self.budget_chars = budget_chars
+
+
+def load_child_index(db_dir: str, collection_name: str, embeddings: Embeddings) -> Optional[ChildIndex]:
+    """매니페스트에 부모-자식 인덱스가 켜져 있을 때만 자식 컬렉션 로드."""
+    config = get_collection_entry(db_dir, collection_name).get("parent_child") or {}
+    if not config.get("enabled"):
+        return None
+
+    vs = Chroma(
+        collection_name=config["collection"],
+        persist_directory=db_dir,
+        embedding_function=embeddings,
+    )
+    if vs._collection.count() == 0:
+        print(f"자식 컬렉션 비어 있음, 부모 청크 검색 사용: {config['collection']}")
+        return None
+    return ChildIndex(vs, config.get("budget_chars", 3000))
+
+
+def fetch_parents(parent_ids: List[str], vectorstore: Chroma, chunk_store: Optional[ChunkStore] = None):
+    """부모 id → (텍스트, 메타데이터) (청크 저장소가 있으면 저장소에서, 없으면 Chroma에서 조회)"""
+    if chunk_store is not None:
+        rows = chunk_store.rows_for_ids(parent_ids)
+        return {
+            pid: (chunk_store.text(row), chunk_store.metadata(row))
+            for pid, row in zip(parent_ids, rows)
+            if row is not None
+        }
+    data = vectorstore._collection.get(ids=parent_ids, include=["documents", "metadatas"])
+    return {
+        pid: (doc, md or {}) for pid, doc, md in zip(data["ids"], data["documents"], data["metadatas"])
+    }
+
+
+def _snap(text: str, start: int, end: int, hit_start: int, hit_end: int):
+    """늘린 경계만 가까운 줄바꿈으로 안쪽으로 당김 (매칭된 스팬은 자르지 않음)"""
+    if start < hit_start:
+        nl = text.find("\n", start, hit_start)
+        if nl != -1 and nl - start < SNAP_CHARS:
+            start = nl + 1
+    if end > hit_end:
+        nl = text.rfind("\n", hit_end, end)
+        if nl != -1 and end - nl < SNAP_CHARS:
+            end = nl
+    return start, end
+
+
+def expand_windows(windows: "OrderedDict[str, list]", lengths: dict, budget: int):
+    """
+    부모별 매칭 구간 [start, end]를 글자 예산 안에서 확장
+    1) 순위대로 매칭 구간(자식 스팬들을 합친 범위)만 담고, 예산을 넘는 하위 부모는 제외 (1위는 항상 포함)
+    2) 남은 예산을 순위대로 배분해 앞뒤 이웃 스팬으로 넓힘 (예산이 충분하면 부모 청크 전체)
+    """
+    selected, used = OrderedDict(), 0
+    for pid, (start, end) in windows.items():
+        size = end - start
+        if selected and used + size > budget:
+            continue
+        selected[pid] = [start, end]
+        used += size
+
+    remaining = budget - used
+    for pid, window in selected.items():
+        if remaining <= 0:
+            break
+        start, end = window
+        grow = min(remaining, lengths[pid] - (end - start))
+        left = min(start, grow // 2)
+        right = min(lengths[pid] - end, grow - left)
+        left = min(start, grow - right)
+        window[0], window[1] = start - left, end + right
+        remaining -= left + right
+    return selected
+
+
+class ParentChildRetriever(BaseRetriever):
+    """
+    small-to-big retriever
+    - child_retriever: 자식 스팬 검색 (dense / BM25 앙상블 등, 메타데이터에 parent_id / start / end)
+    - 상위 자식 hit을 부모별로 묶고, 부모 텍스트 안에서 글자 예산만큼만 이웃 스팬 또는 부모 전체로 확장
+    - 반환 Document 메타데이터는 부모 것 그대로 (ColBERT 재정렬 / 출처 표시와 호환) + parent_id / span
+    """
+
+    child_retriever: BaseRetriever
+    vectorstore: Chroma
+    k: int = 5
+    budget_chars: int = 3000
+    chunk_store: Optional[ChunkStore] = None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        children = self.child_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+
+        # 자식 순위 그대로 부모 순위 결정, 같은 부모의 자식들은 구간을 합침
+        windows = OrderedDict()
+        for child in children:
+            md = child.metadata
+            pid = md.get("parent_id")
+            if pid is None:
+                continue
+            start, end = int(md.get("start", 0)), int(md.get("end", len(child.page_content)))
+            if pid in windows:
+                windows[pid] = (min(windows[pid][0], start), max(windows[pid][1], end))
+            elif len(windows) < self.k:
+                windows[pid] = (start, end)
+        if not windows:
+            return []
+
+        parents = fetch_parents(list(windows), self.vectorstore, self.chunk_store)
+        windows = OrderedDict((pid, w) for pid, w in windows.items() if pid in parents)
+        lengths = {pid: len(parents[pid][0]) for pid in windows}
+        selected = expand_windows(windows, lengths, self.budget_chars)
+
+        docs = []
+        for pid, (start, end) in selected.items():
+            text, md = parents[pid]
+            hit_start, hit_end = windows[pid]
+            start, end = _snap(text, start, end, hit_start, hit_end)
+            md = dict(md, parent_id=pid, span_start=start, span_end=end, parent_chars=len(text))
+            docs.append(Document(page_content=text[start:end], metadata=md))
+        return docs
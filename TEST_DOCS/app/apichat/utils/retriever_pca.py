@@ -0,0 +1,110 @@
+import os
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_community.vectorstores import Chroma
+
+from .chunk_store import ChunkStore
+from .index_manifest import get_collection_entry
+
+
+class PCATier:
+    """
+    인덱스 빌드 시 계산해 둔 PCA 축소 벡터(pca_tier.py 산출물)를 memory-map으로 로드
+    - 1차 후보 검색은 축소 차원(기본 256)에서만 수행
+    """
+
+    def __init__(self, tier_dir: str, candidates: int = 100):
+        self.mean = np.load(os.path.join(tier_dir, "mean.npy"))
+        self.components = np.load(os.path.join(tier_dir, "components.npy"))
+        self.vectors = np.load(os.path.join(tier_dir, "vectors.npy"), mmap_mode="r")
+        self.ids = np.load(os.path.join(tier_dir, "ids.npy"))
+        self.tags = np.load(os.path.join(tier_dir, "tags.npy"))
+        self.candidates = candidates
+
+    def project(self, query_vec: np.ndarray) -> np.ndarray:
+        reduced = (query_vec - self.mean) @ self.components.T
+        return reduced / max(np.linalg.norm(reduced), 1e-12)
+
+    def search(self, query_vec: np.ndarray, n: int, tags: Optional[List[str]] = None) -> List[str]:
+        """축소 차원 내적 상위 n개 후보 id 반환 (tags가 있으면 해당 태그 행만 스캔)."""
+        rows = np.flatnonzero(np.isin(self.tags, tags)) if tags else None
+        vectors = self.vectors[rows] if rows is not None else self.vectors
+        if len(vectors) == 0:
+            return []
+
+        scores = vectors @ self.project(query_vec)
+        n = min(n, len(scores))
+        top = np.argpartition(-scores, n - 1)[:n]
+        if rows is not None:
+            top = rows[top]
+        return self.ids[top].tolist()
+
+
+def load_pca_tier(db_dir: str, collection_name: str) -> Optional[PCATier]:
+    """매니페스트에서 해당 컬렉션 PCA 티어가 켜져 있을 때만 로드."""
+    config = get_collection_entry(db_dir, collection_name).get("pca") or {}
+    if not config.get("enabled"):
+        return None
+
+    tier_dir = os.path.join(db_dir, config["path"])
+    if not os.path.isdir(tier_dir):
+        print(f"PCA 티어 폴더 없음, 원본 차원 검색 사용: {tier_dir}")
+        return None
+    return PCATier(tier_dir, candidates=config.get("candidates", 100))
+
+
+def pca_search_by_vector(
+    vectorstore: Chroma,
+    tier: PCATier,
+    query_vec: np.ndarray,
+    k: int,
+    tags: Optional[List[str]] = None,
+    chunk_store: Optional[ChunkStore] = None,
+) -> List[Document]:
+    """PCA 축소 차원으로 후보를 뽑고, 후보만 원본 차원(1024) 벡터로 재채점"""
+    candidate_ids = tier.search(query_vec, tier.candidates, tags)
+    if not candidate_ids:
+        return []
+
+    # 후보만 원본 차원 벡터를 가져와 재채점 (임베딩은 정규화되어 있으므로 내적 = 코사인)
+    # 청크 저장소가 있으면 Chroma에서는 임베딩만 읽고, 텍스트는 최종 k개만 저장소에서 압축 해제
+    include = ["embeddings"] if chunk_store is not None else ["embeddings", "documents", "metadatas"]
+    data = vectorstore._collection.get(ids=candidate_ids, include=include)
+    full = np.asarray(data["embeddings"], dtype=np.float32)
+    scores = full @ query_vec
+    order = np.argsort(-scores)[:k]
+
+    if chunk_store is not None:
+        rows = chunk_store.rows_for_ids([data["ids"][i] for i in order])
+        return chunk_store.documents([r for r in rows if r is not None])
+
+    return [
+        Document(page_content=data["documents"][i], metadata=data["metadatas"][i] or {})
+        for i in order
+    ]
+
+
+class PCATierRetriever(BaseRetriever):
+    """
+    PCA 축소 차원 1차 검색 + 원본 차원 재채점 retriever
+    """
+
+    vectorstore: Chroma
+    embeddings: Embeddings
+    tier: PCATier
+    k: int = 5
+    tags: Optional[List[str]] = None
+    chunk_store: Optional[ChunkStore] = None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        query_vec = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        return pca_search_by_vector(
+            self.vectorstore, self.tier, query_vec, self.k, self.tags, self.chunk_store
+        )
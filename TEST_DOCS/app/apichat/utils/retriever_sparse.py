@@ -0,0 +1,140 @@
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_community.vectorstores import Chroma
+
+from .bge_m3 import encode_query
+from .chunk_store import ChunkStore
+from .index_manifest import get_collection_entry
+from .retriever_pca import PCATier, pca_search_by_vector
+
+
+class SparseIndex:
+    """
+    bge-m3 lexical weight 역색인 (sparse_index.py 산출물, memory-map 로드)
+    - term_ids[t] 토큰의 posting은 rows/weights[offsets[t]:offsets[t+1]]
+    """
+
+    def __init__(self, index_dir: str):
+        def load(name):
+            return np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+
+        self.term_ids = load("term_ids")
+        self.offsets = load("offsets")
+        self.rows = load("rows")
+        self.weights = load("weights")
+        self.ids = np.load(os.path.join(index_dir, "ids.npy"))
+        self.tags = np.load(os.path.join(index_dir, "tags.npy"))
+
+    def search(self, query_weights: Dict[str, float], k: int, tags: Optional[List[str]] = None):
+        """쿼리 토큰의 posting만 순회해 내적 점수 계산 → 상위 k개 (id, score)"""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for token_id, q_weight in query_weights.items():
+            pos = np.searchsorted(self.term_ids, int(token_id))
+            if pos >= len(self.term_ids) or self.term_ids[pos] != int(token_id):
+                continue
+            start, end = self.offsets[pos], self.offsets[pos + 1]
+            # 한 토큰의 posting 안에서 row는 중복되지 않으므로 바로 누적 가능
+            scores[self.rows[start:end]] += q_weight * self.weights[start:end]
+
+        if tags:
+            scores[~np.isin(self.tags, tags)] = 0.0
+
+        hit = np.flatnonzero(scores > 0)
+        if len(hit) == 0:
+            return []
+        top = hit[np.argsort(-scores[hit])[:k]]
+        return [(self.ids[i], float(scores[i])) for i in top]
+
+
+def load_sparse_index(db_dir: str, collection_name: str) -> Optional[SparseIndex]:
+    """매니페스트에서 해당 컬렉션 sparse 모드가 켜져 있을 때만 로드."""
+    config = get_collection_entry(db_dir, collection_name).get("sparse") or {}
+    if not config.get("enabled"):
+        return None
+
+    index_dir = os.path.join(db_dir, config["path"])
+    if not os.path.isdir(index_dir):
+        print(f"sparse 역색인 폴더 없음, BM25 사용: {index_dir}")
+        return None
+    return SparseIndex(index_dir)
+
+
+def weighted_rrf(result_lists: List[List[Document]], weights: List[float], c: int = 60):
+    """
+    EnsembleRetriever와 동일한 가중 RRF (page_content 기준 중복 제거)
+    """
+    scores, docs = {}, {}
+    for results, weight in zip(result_lists, weights):
+        for rank, doc in enumerate(results, start=1):
+            key = doc.page_content
+            scores[key] = scores.get(key, 0.0) + weight / (rank + c)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class BGEM3HybridRetriever(BaseRetriever):
+    """
+    bge-m3 한 번의 인코딩으로 dense + sparse 두 검색을 모두 수행하는 하이브리드 retriever
+    - dense: Chroma (PCA 티어가 있으면 축소 차원 1차 검색)
+      - 쿼리 벡터는 컬렉션 임베딩 프로필(ProfileEmbeddings)로 계산 (query_prefix / 모델 / 정규화 일치)
+      - 프로필이 bge-m3 기본 설정이면 sparse와 같은 encode_query 캐시 결과라 forward는 1회
+    - sparse: bge-m3 lexical weight 역색인 (BM25 대체)
+    - 청크 저장소가 있으면 sparse 결과 텍스트/메타데이터는 Chroma 대신 저장소에서 조회
+    """
+
+    vectorstore: Chroma
+    embeddings: Embeddings
+    sparse_index: SparseIndex
+    pca_tier: Optional[PCATier] = None
+    chunk_store: Optional[ChunkStore] = None
+    k: int = 5
+    sparse_k: int = 5
+    tags: Optional[List[str]] = None
+    weights: List[float] = [0.8, 0.2]
+
+    def _dense_search(self, query_vec: np.ndarray) -> List[Document]:
+        if self.pca_tier is not None:
+            return pca_search_by_vector(
+                self.vectorstore, self.pca_tier, query_vec, self.k, self.tags, self.chunk_store
+            )
+        where = {"tags": {"$in": self.tags}} if self.tags else None
+        data = self.vectorstore._collection.query(
+            query_embeddings=[query_vec.tolist()],
+            n_results=self.k,
+            where=where,
+            include=["documents", "metadatas"],
+        )
+        return [
+            Document(page_content=doc, metadata=meta or {})
+            for doc, meta in zip(data["documents"][0], data["metadatas"][0])
+        ]
+
+    def _sparse_search(self, query_weights: Dict[str, float]) -> List[Document]:
+        hits = self.sparse_index.search(query_weights, self.sparse_k, self.tags)
+        if not hits:
+            return []
+        ids = [str(_id) for _id, _ in hits]
+        if self.chunk_store is not None:
+            rows = self.chunk_store.rows_for_ids(ids)
+            return self.chunk_store.documents([r for r in rows if r is not None])
+
+        data = self.vectorstore._collection.get(ids=ids, include=["documents", "metadatas"])
+        by_id = {
+            _id: Document(page_content=doc, metadata=meta or {})
+            for _id, doc, meta in zip(data["ids"], data["documents"], data["metadatas"])
+        }
+        return [by_id[_id] for _id in ids if _id in by_id]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        query_vec = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        dense_docs = self._dense_search(query_vec)
+        sparse_docs = self._sparse_search(encode_query(query)["sparse"])
+        return weighted_rrf([dense_docs, sparse_docs], self.weights)
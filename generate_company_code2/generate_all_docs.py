@@ -0,0 +1,287 @@
+"""
+부서별 사내 문서를 한 번에 비동기로 생성 → COMPANY_DATA2/<부서>/
+- 부서별 스크립트(generate_docs_*.py, generated_*_docs.py)의 DOC_SPECS / build_messages / render_doc / write_index를 그대로 사용
+- 모든 부서 문서가 qa_engine.ChatClient(모델별 하나)를 공유 → RPM / TPM 제한, 동시 요청 수(--concurrency), retry-after 백오프
+- --batch: 같은 계획(바뀐 문서만)을 Batch API로 제출하고 결과를 같은 출력 루트 / 매니페스트에 저장
+  (부서별 스크립트의 --batch도 이 함수로 해당 부서만 처리)
+- 문서 파일은 임시 파일에 쓴 뒤 교체 (중단돼도 반쯤 쓴 문서가 남지 않음)
+- (spec, 프롬프트, 모델 / 생성 파라미터) 해시를 COMPANY_DATA2/generate_manifest.json에 기록 → 바뀐 문서만 다시 생성
+
+사용:
+  python3 generate_all_docs.py                         # 전체 부서
+  python3 generate_all_docs.py --depts backend_docs    # 일부 부서만
+  python3 generate_all_docs.py --batch                 # Batch API로 제출 → 완료까지 대기 (중단되면 재실행으로 이어서 대기)
+  python3 generate_all_docs.py --adopt-existing        # 이미 있는 문서를 현재 해시로 등록만 (생성 없음)
+"""
+import os
+import sys
+import json
+import asyncio
+import hashlib
+import argparse
+import datetime as dt
+import tempfile
+from pathlib import Path
+from collections import Counter
+
+from dotenv import load_dotenv
+
+# 요청 속도 제한 / 재시도는 2025-09-25-auto-crawer/qa_engine.py, Batch API 헬퍼는 batch_api.py를 그대로 사용
+sys.path.append(str(Path(__file__).resolve().parent.parent / "2025-09-25-auto-crawer"))
+from qa_engine import ChatClient
+from batch_api import batch_line, run_batches, clear_state, usage_summary
+
+import generate_docs_cto
+import generate_docs_DataAiTeam
+import generated_backend_docs
+import generated_frontend_docs
+
+load_dotenv()
+
+# =========================
+# 설정
+# =========================
+OUT_ROOT = Path(__file__).resolve().parent.parent / "COMPANY_DATA2"  # 실행 위치와 무관하게 같은 출력 루트
+MANIFEST_FILE = "generate_manifest.json"
+BATCH_DIRNAME = ".batch"  # --batch 입력 파일 / 제출 상태 (출력 루트 아래)
+CONCURRENCY = 8  # 동시에 대기 중인 API 요청 수 (모든 부서 합산)
+TODAY_PLACEHOLDER = "{today}"  # 해시 계산 시 작성일 자리 (날짜가 바뀌었다고 다시 생성하지 않게)
+
+# COMPANY_DATA2 하위 폴더 → 부서 스크립트
+DEPARTMENTS = {
+    "backend_docs": generated_backend_docs,
+    "frontend_docs": generated_frontend_docs,
+    "docs_DataAiTeam": generate_docs_DataAiTeam,
+    "docs_cto": generate_docs_cto,
+}
+DEPT_BY_MODULE = {module.__name__: dept for dept, module in DEPARTMENTS.items()}
+
+
+# =========================
+# 유틸
+# =========================
+def spec_hash(module, spec) -> str:
+    """문서 spec + 프롬프트(작성일 제외) + 모델 / 생성 파라미터 해시"""
+    payload = {
+        "spec": spec,
+        "messages": module.build_messages(spec, TODAY_PLACEHOLDER),
+        "model": module.MODEL,
+        "temperature": module.TEMPERATURE,
+        "max_tokens": module.MAX_TOKENS,
+    }
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def atomic_write_text(path: Path, text: str):
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".doc-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_manifest(out_root: Path) -> dict:
+    path = out_root / MANIFEST_FILE
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(out_root: Path, manifest: dict):
+    atomic_write_text(out_root / MANIFEST_FILE, json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + "\n")
+
+
+def plan_docs(depts, out_root: Path, manifest: dict):
+    """
+    부서별 문서 → (생성할 작업 목록, 최신 문서 수)
+    - 작업: (부서, 모듈, 번호, spec, 해시, 출력 경로)
+    - 출력 파일이 있고 매니페스트 해시가 같으면 건너뜀
+    """
+    jobs, fresh = [], 0
+    for dept in depts:
+        module = DEPARTMENTS[dept]
+        docs_dir = out_root / dept
+        for idx, spec in enumerate(module.DOC_SPECS, start=1):
+            path = module.doc_path(idx, spec, docs_dir)
+            h = spec_hash(module, spec)
+            if path.exists() and manifest.get(dept, {}).get(path.name) == h:
+                fresh += 1
+                continue
+            jobs.append((dept, module, idx, spec, h, path))
+    return jobs, fresh
+
+
+def remove_stale(depts, out_root: Path, manifest: dict) -> int:
+    """매니페스트에 있지만 현재 DOC_SPECS에 없는 문서 파일 삭제 (제목 / 순서가 바뀐 예전 문서)"""
+    removed = 0
+    for dept in depts:
+        module = DEPARTMENTS[dept]
+        docs_dir = out_root / dept
+        current = {module.doc_path(idx, spec, docs_dir).name for idx, spec in enumerate(module.DOC_SPECS, start=1)}
+        entries = manifest.get(dept, {})
+        for name in [name for name in entries if name not in current]:
+            (docs_dir / name).unlink(missing_ok=True)
+            del entries[name]
+            removed += 1
+    return removed
+
+
+# =========================
+# 생성
+# =========================
+async def generate_all(depts, out_root: Path = OUT_ROOT, concurrency: int = CONCURRENCY, client=None):
+    """
+    선택한 부서의 바뀐 문서를 동시에 생성
+    - 문서 하나가 끝날 때마다 파일 → 매니페스트 순서로 저장 (중단 후 재실행하면 남은 문서만 생성)
+    - 부서 INDEX.txt는 끝난 뒤 폴더에 있는 문서 기준으로 다시 작성
+    - client: chat.completions.create를 가진 비동기 클라이언트 (없으면 ChatClient가 AsyncOpenAI 생성)
+    """
+    manifest = load_manifest(out_root)
+    for dept in depts:
+        (out_root / dept).mkdir(parents=True, exist_ok=True)
+    removed = remove_stale(depts, out_root, manifest)
+    jobs, fresh = plan_docs(depts, out_root, manifest)
+    print(f"[PLAN] 생성 {len(jobs)}개 / 변경 없음 {fresh}개" + (f" / 삭제 {removed}개" if removed else ""))
+
+    today = dt.date.today().isoformat()
+    chat_clients = {}  # 모델 → ChatClient (속도 제한은 모델별 한도)
+    done = Counter()
+    failed = []
+
+    def chat_client(model: str) -> ChatClient:
+        if model not in chat_clients:
+            chat_clients[model] = ChatClient(model, concurrency=concurrency, client=client)
+        return chat_clients[model]
+
+    async def run_job(job):
+        dept, module, idx, spec, h, path = job
+        content = await chat_client(module.MODEL).complete(
+            module.build_messages(spec, today),
+            max_tokens=module.MAX_TOKENS,
+            temperature=module.TEMPERATURE,
+        )
+        if not content:
+            failed.append(f"{dept}/{spec['title']}")
+            return
+        atomic_write_text(path, module.render_doc(spec, content.strip(), today))
+        manifest.setdefault(dept, {})[path.name] = h
+        save_manifest(out_root, manifest)
+        done[dept] += 1
+        print(f"[OK] {dept}/{path.name}")
+
+    try:
+        await asyncio.gather(*(run_job(job) for job in jobs))
+    finally:
+        save_manifest(out_root, manifest)
+        for dept in depts:
+            DEPARTMENTS[dept].write_index(out_root / dept)
+
+    usage = sum((c.usage for c in chat_clients.values()), Counter())
+    tokens = usage["prompt_tokens"] + usage["completion_tokens"]
+    print(f"\n[완료] {', '.join(f'{dept} {done[dept]}개' for dept in depts)} 생성 → {out_root}")
+    print(
+        f"[API] 요청 {usage['requests']}개 (재시도 {usage['retries']}, 실패 {usage['failures']}) / "
+        f"토큰 {tokens:,} (프롬프트 {usage['prompt_tokens']:,}, 완성 {usage['completion_tokens']:,})"
+    )
+    if failed:
+        print(f"[실패] {len(failed)}개 문서 미생성 (다시 실행하면 이 문서만 생성): {', '.join(failed)}")
+
+
+def generate_all_batch(depts, out_root: Path = OUT_ROOT, client=None):
+    """
+    generate_all과 같은 계획(바뀐 문서만)을 Batch API로 제출 → 완료 후 같은 출력 경로 / 매니페스트에 저장
+    - custom_id는 "<부서>/<파일명>", 제출 시점 해시는 배치 상태 메타에 보관
+    - 대기 중 중단되면 같은 명령으로 재실행 (제출한 배치를 이어서 기다림, 부서 선택과 무관하게 결과 전체 병합)
+    - 제출 뒤 spec이 바뀐 문서는 저장하지 않음 (다음 실행에서 다시 계획)
+    """
+    manifest = load_manifest(out_root)
+    for dept in depts:
+        (out_root / dept).mkdir(parents=True, exist_ok=True)
+    removed = remove_stale(depts, out_root, manifest)
+    jobs, fresh = plan_docs(depts, out_root, manifest)
+    print(f"[PLAN] 제출 {len(jobs)}개 / 변경 없음 {fresh}개" + (f" / 삭제 {removed}개" if removed else ""))
+
+    today = dt.date.today().isoformat()
+    lines = [
+        batch_line(
+            f"{dept}/{path.name}",
+            module.MODEL,
+            module.build_messages(spec, today),
+            temperature=module.TEMPERATURE,
+            max_tokens=module.MAX_TOKENS,
+        )
+        for dept, module, idx, spec, h, path in jobs
+    ]
+    meta = {"today": today, "jobs": {f"{dept}/{path.name}": [dept, idx, h] for dept, _, idx, _, h, path in jobs}}
+    work_dir = out_root / BATCH_DIRNAME
+    results, meta, usage = run_batches(lines, work_dir, meta, client=client, metadata={"job": "generate_all_docs"})
+    today = meta.get("today", today)  # 재실행으로 이어받은 배치는 제출한 날짜로 저장
+
+    done, written = Counter(), set()
+    for custom_id, (dept, idx, h) in meta.get("jobs", {}).items():
+        content = results.get(custom_id)
+        module = DEPARTMENTS[dept]
+        if not content or idx > len(module.DOC_SPECS):
+            continue
+        spec = module.DOC_SPECS[idx - 1]
+        path = module.doc_path(idx, spec, out_root / dept)
+        if spec_hash(module, spec) != h:
+            continue
+        atomic_write_text(path, module.render_doc(spec, content.strip(), today))
+        manifest.setdefault(dept, {})[path.name] = h
+        done[dept] += 1
+        written.add(custom_id)
+    save_manifest(out_root, manifest)
+    clear_state(work_dir)
+
+    merged = list(depts) + sorted(set(done) - set(depts))  # 이어받은 배치에 다른 부서 문서가 있으면 그 부서도
+    for dept in merged:
+        DEPARTMENTS[dept].write_index(out_root / dept)
+    failed = [f"{dept}/{spec['title']}" for dept, _, _, spec, _, path in jobs if f"{dept}/{path.name}" not in written]
+
+    print(f"\n[완료] {', '.join(f'{dept} {done[dept]}개' for dept in merged)} 생성 → {out_root}")
+    print(f"[BATCH] {usage_summary(usage)}")
+    if failed:
+        print(f"[실패] {len(failed)}개 문서 미생성 (다시 실행하면 이 문서만 제출): {', '.join(failed)}")
+
+
+def generate_department_batch(module_name: str, out_root: Path = OUT_ROOT):
+    """부서별 스크립트 --batch 진입점 (모듈 이름 → 부서 폴더, 일괄 생성과 같은 출력 루트 / 매니페스트 사용)"""
+    generate_all_batch([DEPT_BY_MODULE[module_name]], out_root)
+
+
+def adopt_existing(depts, out_root: Path = OUT_ROOT):
+    """이미 있는 문서 파일을 현재 해시로 매니페스트에 등록 (기존 COMPANY_DATA2를 다시 생성하지 않고 이어서 쓰기)"""
+    manifest = load_manifest(out_root)
+    adopted = 0
+    for dept in depts:
+        module = DEPARTMENTS[dept]
+        for idx, spec in enumerate(module.DOC_SPECS, start=1):
+            path = module.doc_path(idx, spec, out_root / dept)
+            if path.exists():
+                manifest.setdefault(dept, {})[path.name] = spec_hash(module, spec)
+                adopted += 1
+    save_manifest(out_root, manifest)
+    print(f"[완료] 기존 문서 {adopted}개를 매니페스트에 등록")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="부서별 사내 문서 비동기 일괄 생성")
+    parser.add_argument("--depts", nargs="+", choices=list(DEPARTMENTS), default=list(DEPARTMENTS), help="생성할 부서 폴더")
+    parser.add_argument("--out-root", type=Path, default=OUT_ROOT, help="출력 루트 (부서별 하위 폴더)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="동시 API 요청 수")
+    parser.add_argument("--batch", action="store_true", help="Batch API로 제출하고 완료까지 대기")
+    parser.add_argument("--adopt-existing", action="store_true", help="생성 없이 기존 문서를 현재 해시로 등록")
+    args = parser.parse_args()
+
+    if args.adopt_existing:
+        adopt_existing(args.depts, args.out_root)
+    elif args.batch:
+        generate_all_batch(args.depts, args.out_root)
+    else:
+        asyncio.run(generate_all(args.depts, args.out_root, args.concurrency))
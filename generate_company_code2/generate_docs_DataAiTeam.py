@@ -1,4 +1,5 @@
 import os
+import argparse
 import datetime as dt
 from pathlib import Path
 from textwrap import dedent
@@ -10,7 +11,6 @@ from openai import OpenAI
 load_dotenv()
 
 DOCS_DIR = Path("docs_DataAiTeam")
-DOCS_DIR.mkdir(parents=True, exist_ok=True)
 
 API_KEY = os.getenv("OPENAI_API_KEY")
 MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
@@ -162,49 +162,83 @@ def safe_slug(text: str) -> str:
     return "_".join(slug.split())
 
 
+def build_messages(spec: Dict, today: str) -> List[Dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": make_user_prompt(spec["category"], spec["title"], today)},
+    ]
+
+
+def doc_path(idx: int, spec: Dict, docs_dir: Path = DOCS_DIR) -> Path:
+    return docs_dir / f"{idx:02d}_{safe_slug(spec['category'])}__{safe_slug(spec['title'])}.txt"
+
+
+def render_doc(spec: Dict, content: str, today: str) -> str:
+    category, title = spec["category"], spec["title"]
+    header = (
+        f"# {category} | {title}\n\n"
+        f"작성일: {today}\n회사: CodeNova | 대상: 데이터/AI팀\n\n---\n"
+    )
+    return header + content + "\n"
+
+
+def write_doc(idx: int, spec: Dict, content: str, today: str):
+    doc_path(idx, spec).write_text(render_doc(spec, content, today), encoding="utf-8")
+
+
+def write_index(docs_dir: Path = DOCS_DIR) -> int:
+    """생성된 문서 목록 (INDEX.txt) 저장 → 문서 수"""
+    index_lines = [
+        f"{idx:02d}. {spec['category']} - {spec['title']} -> {doc_path(idx, spec, docs_dir).name}"
+        for idx, spec in enumerate(DOC_SPECS, start=1)
+        if doc_path(idx, spec, docs_dir).exists()
+    ]
+    (docs_dir / "INDEX.txt").write_text(
+        "CodeNova 데이터/AI팀 문서 — 생성 결과 목록\n"
+        + "\n".join(index_lines)
+        + "\n",
+        encoding="utf-8",
+    )
+    return len(index_lines)
+
+
 def generate_and_write_docs():
+    DOCS_DIR.mkdir(parents=True, exist_ok=True)
     client = OpenAI(api_key=API_KEY)
-
     today = dt.date.today().isoformat()
-    index_lines = []
-    for idx, spec in enumerate(DOC_SPECS, start=1):
-        category, title = spec["category"], spec["title"]
-        user_prompt = make_user_prompt(category, title, today)
 
+    for idx, spec in enumerate(DOC_SPECS, start=1):
         completion = client.chat.completions.create(
             model=MODEL,
             temperature=TEMPERATURE,
             max_tokens=MAX_TOKENS,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt},
-            ],
+            messages=build_messages(spec, today),
         )
         content = completion.choices[0].message.content.strip()
+        write_doc(idx, spec, content, today)
 
-        prefix = f"{idx:02d}"
-        filename = f"{prefix}_{safe_slug(category)}__{safe_slug(title)}.txt"
-        out_path = DOCS_DIR / filename
-
-        header = (
-            f"# {category} | {title}\n\n"
-            f"작성일: {today}\n회사: CodeNova | 대상: 데이터/AI팀\n\n---\n"
-        )
-        out_path.write_text(header + content + "\n", encoding="utf-8")
+    count = write_index()
+    print(f"[완료] docs/ 폴더에 {count}개 문서를 저장했습니다")
+    print("목록: docs/INDEX.txt 를 확인하세요.")
 
-        index_lines.append(f"{prefix}. {category} - {title} -> {filename}")
 
-    (DOCS_DIR / "INDEX.txt").write_text(
-        "CodeNova 데이터/AI팀 문서 — 생성 결과 목록\n"
-        + "\n".join(index_lines)
-        + "\n",
-        encoding="utf-8",
-    )
+def generate_and_write_docs_batch():
+    """
+    - generate_all_docs.py의 Batch 모드로 이 부서만 처리 (COMPANY_DATA2/<부서> + generate_manifest.json)
+      → 일괄 생성과 같은 위치에 쓰고, 바뀐 문서만 제출
+    - 대기 중 중단되면 같은 명령으로 재실행 (제출한 배치를 이어서 기다림)
+    """
+    from generate_all_docs import generate_department_batch  # generate_all_docs가 이 모듈을 import하므로 호출 시점에
 
-    print(f"[완료] docs/ 폴더에 {len(DOC_SPECS)}개 문서를 저장했습니다")
-    print("목록: docs/INDEX.txt 를 확인하세요.")
+    generate_department_batch(Path(__file__).stem)
 
 
 if __name__ == "__main__":
-    generate_and_write_docs()
-load_dotenv()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", action="store_true", help="Batch API로 제출하고 완료까지 대기")
+    args = parser.parse_args()
+
+    if args.batch:
+        generate_and_write_docs_batch()
+    else:
+        generate_and_write_docs()
@@ -1,4 +1,5 @@
 import os
+import argparse
 import datetime as dt
 from pathlib import Path
 from textwrap import dedent
@@ -12,7 +13,6 @@ load_dotenv()
 
 # 1) 출력 폴더
 DOCS_DIR = Path("docs2")
-DOCS_DIR.mkdir(parents=True, exist_ok=True)
 
 # 2) OpenAI 설정
 API_KEY = os.getenv("OPENAI_API_KEY")
@@ -210,43 +210,75 @@ def safe_slug(text: str) -> str:
     slug = "".join(keep).strip().replace("  ", " ")
     return "_".join(slug.split())
 
-# 9) 생성/저장 루프
+# 9) 문서별 메시지 / 출력 경로
+def build_messages(spec: Dict, today: str) -> List[Dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},   # 공통 규칙
+        {"role": "user", "content": make_user_prompt(spec["category"], spec["title"], today, spec["prompt"])},       # 문서별 사용자 프롬프트
+    ]
+
+def doc_path(idx: int, spec: Dict, docs_dir: Path = DOCS_DIR) -> Path:
+    return docs_dir / f"{idx:02d}_{safe_slug(spec['category'])}__{safe_slug(spec['title'])}.txt"
+
+def render_doc(spec: Dict, content: str, today: str) -> str:
+    header = f"<!-- 회사: 코드노바 | 대상: 사원(프론트엔드) | 작성일: {today} -->\n"
+    return header + content + "\n"
+
+def write_doc(idx: int, spec: Dict, content: str, today: str):
+    doc_path(idx, spec).write_text(render_doc(spec, content, today), encoding="utf-8")
+
+def write_index(docs_dir: Path = DOCS_DIR) -> int:
+    """생성된 문서 목록 (INDEX.txt) 저장 → 문서 수"""
+    index_lines = [
+        f"{idx:02d}. {spec['category']} - {spec['title']} -> {doc_path(idx, spec, docs_dir).name}"
+        for idx, spec in enumerate(DOC_SPECS, start=1)
+        if doc_path(idx, spec, docs_dir).exists()
+    ]
+    (docs_dir / "INDEX.txt").write_text(
+        "코드노바 프론트엔드 문서 — 생성 결과 목록\n" + "\n".join(index_lines) + "\n",
+        encoding="utf-8",
+    )
+    return len(index_lines)
+
+# 10) 생성/저장 루프
 def generate_and_write_docs():
     if not API_KEY:
         raise RuntimeError("OPENAI_API_KEY가 설정되지 않았습니다. .env를 확인하세요.")
+    DOCS_DIR.mkdir(parents=True, exist_ok=True)
     client = OpenAI(api_key=API_KEY)
     today = today_str()
-    index_lines = []
 
     for idx, spec in enumerate(DOC_SPECS, start=1):
-        category, title, prompt = spec["category"], spec["title"], spec["prompt"]
-        user_prompt = make_user_prompt(category, title, today, prompt)
-
         completion = client.chat.completions.create(
             model=MODEL,
             temperature=TEMPERATURE,
             max_tokens=MAX_TOKENS,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},   # 공통 규칙
-                {"role": "user", "content": user_prompt},       # 문서별 사용자 프롬프트
-            ],
+            messages=build_messages(spec, today),
         )
         content = completion.choices[0].message.content.strip()
+        write_doc(idx, spec, content, today)
 
-        prefix = f"{idx:02d}"
-        filename = f"{prefix}_{safe_slug(category)}__{safe_slug(title)}.txt"
-        out_path = DOCS_DIR / filename
+    count = write_index()
+    print(f"[완료] docs/ 폴더에 {count}개 문서를 저장했습니다.")
+    print("목록: docs/INDEX.txt 를 확인하세요.")
 
-        header = f"<!-- 회사: 코드노바 | 대상: 사원(프론트엔드) | 작성일: {today} -->\n"
-        out_path.write_text(header + content + "\n", encoding="utf-8")
-        index_lines.append(f"{prefix}. {category} - {title} -> {filename}")
+# 11) Batch API 모드: 전체 요청을 한 번에 제출 → 완료 후 같은 형식으로 저장 (지연 대신 비용 / 처리량)
+def generate_and_write_docs_batch():
+    """
+    - generate_all_docs.py의 Batch 모드로 이 부서만 처리 (COMPANY_DATA2/<부서> + generate_manifest.json)
+      → 일괄 생성과 같은 위치에 쓰고, 바뀐 문서만 제출
+    - 대기 중 중단되면 같은 명령으로 재실행 (제출한 배치를 이어서 기다림)
+    """
+    from generate_all_docs import generate_department_batch  # generate_all_docs가 이 모듈을 import하므로 호출 시점에
 
-    (DOCS_DIR / "INDEX.txt").write_text(
-        "코드노바 프론트엔드 문서 — 생성 결과 목록\n" + "\n".join(index_lines) + "\n",
-        encoding="utf-8",
-    )
-    print(f"[완료] docs/ 폴더에 {len(DOC_SPECS)}개 문서를 저장했습니다.")
-    print("목록: docs/INDEX.txt 를 확인하세요.")
+    generate_department_batch(Path(__file__).stem)
 
 if __name__ == "__main__":
-    generate_and_write_docs()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", action="store_true", help="Batch API로 제출하고 완료까지 대기")
+    args = parser.parse_args()
+
+    if args.batch:
+        generate_and_write_docs_batch()
+    else:
+        generate_and_write_docs()
@@ -1,14 +1,16 @@
 import os
-import re
+import sys
 import torch
 from pathlib import Path
 from typing import List, Optional
-from tqdm import tqdm
 from langchain_community.vectorstores import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.docstore.document import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 분할 / 임베딩 파이프라인은 2025-09-25-auto-crawer 모듈을 그대로 사용
+sys.path.append(str(Path(__file__).resolve().parent / "2025-09-25-auto-crawer"))
+from embedding_pipeline import run_pipeline
+from doc_loader import iter_chunks
 
 
 class GoogleAPIDocumentProcessor:
@@ -17,76 +19,32 @@ class GoogleAPIDocumentProcessor:
                  db_dir: str = "./chroma_google_api_db"):
         self.api_data_dir = Path(api_data_dir)
         self.db_dir = db_dir
+        self.ids: List[str] = []  # documents와 같은 순서의 청크 id (iter_chunks의 내용 해시 id)
         self.documents: List[Document] = []
         self.vectorstore: Optional[Chroma] = None
         self.embedding_model: Optional[HuggingFaceEmbeddings] = None
 
-    def get_api_tag_from_path(self, path: str) -> str:
-        folder = os.path.basename(os.path.dirname(path))
-        if folder.endswith("_docs_crawled"):
-            return folder.replace("_docs_crawled", "")
-        return folder
-
-    def _extract_source_url(self, content: str) -> str:
-        pattern = r'(?i)Source\s*URL\s*:\s*(https?://\S+)'
-        m = re.search(pattern, content)
-        if m:
-            return m.group(1).strip()
-        head = content[:2048]
-        m2 = re.search(pattern, head)
-        return m2.group(1).strip() if m2 else ""
-
-    def load_api_documents(self) -> List[Document]:
-        documents = []
+    def load_api_documents(self, max_workers: int = 4) -> List[Document]:
+        ids, documents = [], []
 
         if not self.api_data_dir.exists():
             print(f"⚠️ 데이터 디렉토리가 존재하지 않습니다: {self.api_data_dir}")
             return documents
 
         print(f"📂 API 데이터 로드 중 (.txt 파일만 탐색): {self.api_data_dir}")
-        file_paths = list(self.api_data_dir.rglob("*.txt"))
-
-        for file_path in file_paths:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                source_url = self._extract_source_url(content)
-                tag = self.get_api_tag_from_path(str(file_path))  # str() 추가
-
-                if tag is None:
-                    continue
-
-                text_splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=1200,
-                    chunk_overlap=150,
-                    separators=["\n\n", "\n", ". ", " ", ""]
-                )
-                chunks = text_splitter.split_text(content)
-
-                for i, chunk in enumerate(chunks):
-                    doc = Document(
-                        page_content=chunk,
-                        metadata={
-                            'chunk_id': i,
-                            'source': source_url,
-                            'tags': tag,
-                            'source_file': file_path.name,
-                            'last_verified': '2025-08-19'
-                        }
-                    )
-                    documents.append(doc)
-
-            except Exception as e:
-                print(f"⚠️ {file_path} 파일 로드 중 오류 발생: {e}")
+        # 파일 읽기/분할은 프로세스 풀에서 병렬 처리 (splitter는 프로세스당 1개 재사용)
+        for _id, text, metadata in iter_chunks(self.api_data_dir.rglob("*.txt"), max_workers):
+            ids.append(_id)
+            documents.append(Document(page_content=text, metadata=metadata))
 
+        self.ids = ids
         self.documents = documents
         print(f"✅ 총 {len(documents)}개의 문서 청크를 로드했습니다.")
         return documents
 
-    def initialize_vectorstore_parallel(self, batch_size: int = 100, max_workers: int = 4):
-        if not self.documents:
-            print("⚠️ 벡터 DB를 생성할 문서가 없습니다. `load_api_documents`를 먼저 실행해주세요.")
+    def initialize_vectorstore_parallel(self, batch_size: int = 32, max_workers: int = 4):
+        if not self.documents and not self.api_data_dir.exists():
+            print(f"⚠️ 데이터 디렉토리가 존재하지 않습니다: {self.api_data_dir}")
             return
 
         print("🔧 임베딩 모델 초기화 중... (BAAI/bge-m3)")
@@ -113,23 +71,35 @@ class GoogleAPIDocumentProcessor:
                 print(f"🗑️ 기존 '{self.db_dir}' 폴더를 삭제했습니다.")
 
         print("💾 새 벡터 저장소 생성 중...")
-
-        # 첫 배치로 DB 생성
-        first_batch = self.documents[:batch_size]
-        self.vectorstore = Chroma.from_documents(
-            documents=first_batch,
-            embedding=self.embedding_model,
+        self.vectorstore = Chroma(
             persist_directory=self.db_dir,
+            embedding_function=self.embedding_model,
             collection_name="google_api_docs"  # 컬렉션 이름 명시
         )
+        collection = self.vectorstore._collection
+
+        def write(batch_items, embeddings):
+            collection.add(
+                ids=[_id for _id, _, _ in batch_items],
+                embeddings=embeddings.tolist(),
+                documents=[text for _, text, _ in batch_items],
+                metadatas=[meta for _, _, meta in batch_items],
+            )
 
-        # 나머지 배치 처리
-        remaining_docs = self.documents[batch_size:]
-        if remaining_docs:
-            batches = [remaining_docs[i:i + batch_size] for i in range(0, len(remaining_docs), batch_size)]
-
-            for batch in tqdm(batches, desc="임베딩 및 DB 저장 중"):
-                self.vectorstore.add_documents(batch)
+        # 길이순 배치 + 프로세스 풀(max_workers개) 인코딩 + 쓰기 스레드
+        # load_api_documents()를 건너뛰면 파일을 읽는 즉시 청크를 흘려보냄 (전체 로드 대기 없음)
+        if self.documents:
+            items = [(_id, doc.page_content, doc.metadata) for _id, doc in zip(self.ids, self.documents)]
+        else:
+            items = iter_chunks(self.api_data_dir.rglob("*.txt"), max_workers)
+        run_pipeline(
+            items,
+            write,
+            model_name="BAAI/bge-m3",
+            device=device,
+            workers=max_workers,
+            batch_size=batch_size,
+        )
 
         # 명시적으로 persist 호출 (중요!)
         self.vectorstore.persist()
@@ -186,7 +156,6 @@ if __name__ == "__main__":
         print("🚀 API 문서 벡터 DB 구축 시작")
         print("=" * 60)
 
-        processor.load_api_documents()
         processor.initialize_vectorstore_parallel()
 
         # DB 검증
@@ -1,29 +1,38 @@
-import json, uuid
+import sys, json
+from pathlib import Path
 import chromadb
-from sentence_transformers import SentenceTransformer
-from chromadb.utils.embedding_functions import EmbeddingFunction
+
+# QA 고정 id / 임베딩 프로필 / 임베딩 캐시는 2025-09-25-auto-crawer 모듈을 그대로 사용
+sys.path.append(str(Path(__file__).resolve().parent / "2025-09-25-auto-crawer"))
+from qa_ids import record_id
+from embedding_profile import PassageEmbeddingFunction, record_profile, resolve_profile
 
 DB_PATH = "./chroma_db"
 COLLECTION_NAME = "qna_collection"
 JSONL_PATH = "google_api_qa_dataset.jsonl"
-NORMALIZE = True
-
-class BGEPassageEmbedding(EmbeddingFunction):
-    def __init__(self, model_name="BAAI/bge-m3", normalize=True, device=None):
-        self.model = SentenceTransformer(model_name, device=device)
-        self.normalize = normalize
-    def __call__(self, texts):
-        texts = [f"passage: {t}" for t in texts]
-        embs = self.model.encode(texts, normalize_embeddings=self.normalize)
-        return embs.tolist()
+# 컬렉션에 기록된 임베딩 프로필 (기록 없는 기존 컬렉션은 "passage: " 접두어 설정)
+PROFILE = resolve_profile(DB_PATH, COLLECTION_NAME)
 
+embedding_fn = PassageEmbeddingFunction(PROFILE)
 client = chromadb.PersistentClient(path=DB_PATH)
 collection = client.get_or_create_collection(
     name=COLLECTION_NAME,
-    embedding_function=BGEPassageEmbedding("BAAI/bge-m3", normalize=NORMALIZE),
+    embedding_function=embedding_fn,
     metadata={"hnsw:space": "cosine"}
 )
 
+# DB에 이미 있는 id는 건너뛰고 새 레코드만 임베딩 + upsert
+def flush(docs, ids, metadatas):
+    existing = set(collection.get(ids=ids, include=[])["ids"])
+    new = [i for i, _id in enumerate(ids) if _id not in existing]
+    if new:
+        collection.upsert(
+            documents=[docs[i] for i in new],
+            metadatas=[metadatas[i] for i in new],
+            ids=[ids[i] for i in new],
+        )
+    return len(new)
+
 # 리스트/딕셔너리를 문자열로 안전 변환
 def to_meta_value(v):
     if isinstance(v, (str, int, float, bool)) or v is None:
@@ -35,10 +44,11 @@ def to_meta_value(v):
 
 BATCH = 200
 docs, ids, metadatas = [], [], []
+seen = set()
 inserted = 0
 
 with open(JSONL_PATH, "r", encoding="utf-8") as f:
-    for idx, line in enumerate(f, start=1):
+    for line in f:
         line = line.strip()
         if not line:
             continue
@@ -46,7 +56,11 @@ with open(JSONL_PATH, "r", encoding="utf-8") as f:
 
         q = obj.get("question", "")
         a = obj.get("answer", "")
-        _id = obj.get("id") or str(uuid.uuid4())
+        # 고정 id = hash(태그, 원문 파일명, 질문, 답변) → 재실행해도 중복 삽입되지 않음
+        _id = record_id(obj)
+        if _id in seen:
+            continue
+        seen.add(_id)
 
         # 메타데이터(Q/A 제외)
         raw_meta = {
@@ -62,16 +76,19 @@ with open(JSONL_PATH, "r", encoding="utf-8") as f:
         ids.append(_id)
         metadatas.append(meta)
 
-        if idx % BATCH == 0:
-            collection.upsert(documents=docs, metadatas=metadatas, ids=ids)
-            inserted += len(ids)
-            print(f"[UPSERT] 누적 DB 반영: {inserted}개", flush=True)
+        if len(ids) == BATCH:
+            inserted += flush(docs, ids, metadatas)
+            print(f"[UPSERT] 누적 신규 반영: {inserted}개", flush=True)
             docs, ids, metadatas = [], [], []
 
 if docs:
-    collection.upsert(documents=docs, metadatas=metadatas, ids=ids)
-    inserted += len(ids)
-    print(f"[UPSERT] 누적 DB 반영: {inserted}개", flush=True)
+    inserted += flush(docs, ids, metadatas)
+    print(f"[UPSERT] 누적 신규 반영: {inserted}개", flush=True)
+
+if inserted:
+    dim = len(collection.get(limit=1, include=["embeddings"])["embeddings"][0])
+    record_profile(DB_PATH, COLLECTION_NAME, PROFILE, dim)
 
-print(f"업서트 완료: {len(ids)}개")
+print(f"업서트 완료: 신규 {inserted}개, 기존 유지 {len(seen) - inserted}개")
+print(f"[CACHE] 임베딩 캐시 hit {embedding_fn.cache.hits}개 / miss {embedding_fn.cache.misses}개", flush=True)
 print(f"[COUNT] 현재 컬렉션 문서 수: {collection.count()}", flush=True)
@@ -0,0 +1,193 @@
+"""
+사내 문서 권한별 분리 인덱스 (sLLM 리트리버용)
+- sllm_vectordb_insert_*.ipynb는 모든 부서 청크를 company_chroma_db 한 컬렉션에 넣고 role 메타데이터로 구분
+  → 권한 검색이 다른 부서 벡터까지 스캔 / 후처리 필터링
+- 여기서는 권한(role)마다 별도 Chroma 컬렉션(= 별도 HNSW 인덱스)을 만듦: company_docs_<role>
+  - frontend / backend / data_ai: 자기 부서 컬렉션만 검색
+  - cto: 네 컬렉션을 각각 검색한 뒤 거리순으로 합침 (벡터 중복 저장 없음)
+  - 권한에 없는 컬렉션은 열지도 않음 → 다른 부서 청크가 결과에 섞일 수 없음
+- 청크 id = sha1(role, 파일명, 청크 텍스트) → 재실행 시 바뀐 청크만 임베딩, 사라진 청크는 삭제
+- 청킹(500자 / 50자 오버랩), 임베딩(BAAI/bge-m3), 메타데이터(sourcefile / role / last_edit)는 노트북과 동일
+  → langchain Chroma(collection_name=...)로 그대로 읽을 수 있음
+
+사용:
+  python build_role_index.py                                   # ../../COMPANY_DATA2 → ./company_chroma_db
+  python build_role_index.py --query "캐시 만료 시간 기준" --permission backend
+"""
+import os
+import glob
+import hashlib
+import argparse
+from pathlib import Path
+
+import chromadb
+
+# =========================
+# 설정
+# =========================
+DATA_DIR = "../../COMPANY_DATA2"
+DB_DIR = "./company_chroma_db"
+EMBED_MODEL = "BAAI/bge-m3"
+COLLECTION_PREFIX = "company_docs_"
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+LAST_EDIT = "2025-08-19"  # 노트북과 같은 고정 수정일
+WRITE_BATCH = 256  # 임베딩 / 추가 배치 크기
+TOP_K = 3
+
+# 권한(role) → COMPANY_DATA2 하위 폴더
+ROLE_DIRS = {
+    "frontend": "frontend_docs",
+    "backend": "backend_docs",
+    "data_ai": "docs_DataAiTeam",
+    "cto": "docs_cto",
+}
+
+# sLLM 서버 permission 값 → 검색할 권한 컬렉션 (cto는 전체 합집합)
+PERMISSION_ROLES = {
+    "frontend": ["frontend"],
+    "backend": ["backend"],
+    "data_ai": ["data_ai"],
+    "cto": list(ROLE_DIRS),
+}
+
+
+def collection_name(role: str) -> str:
+    return f"{COLLECTION_PREFIX}{role}"
+
+
+def chunk_id(role: str, sourcefile: str, text: str) -> str:
+    return hashlib.sha1(f"{role}\x00{sourcefile}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def load_embeddings(model_name=EMBED_MODEL):
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+# =========================
+# 청킹
+# =========================
+def iter_role_chunks(role: str, data_dir=DATA_DIR):
+    """권한 폴더의 txt → (id, 청크 텍스트, 메타데이터) (같은 파일 안 중복 청크는 한 번만)"""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    for txt_file in sorted(glob.glob(os.path.join(data_dir, ROLE_DIRS[role], "*.txt"))):
+        sourcefile = os.path.basename(txt_file)
+        if sourcefile == "INDEX.txt":  # 생성 결과 목록 (문서 아님)
+            continue
+        with open(txt_file, "r", encoding="utf-8") as f:
+            text = f.read()
+        seen = set()
+        for chunk in splitter.split_text(text):
+            _id = chunk_id(role, sourcefile, chunk)
+            if _id in seen:
+                continue
+            seen.add(_id)
+            yield _id, chunk, {"sourcefile": sourcefile, "role": role, "last_edit": LAST_EDIT}
+
+
+# =========================
+# 인덱스
+# =========================
+class RoleIndex:
+    """권한별 Chroma 컬렉션 묶음 (빌드 / 권한 범위 검색)"""
+
+    def __init__(self, db_dir=DB_DIR, embeddings=None):
+        self.client = chromadb.PersistentClient(path=str(db_dir))
+        self._embeddings = embeddings
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:  # 바뀐 청크 / 검색이 있을 때만 로드
+            self._embeddings = load_embeddings()
+        return self._embeddings
+
+    def collection(self, role: str):
+        return self.client.get_or_create_collection(name=collection_name(role), metadata={"hnsw:space": "cosine"})
+
+    def existing_ids(self, collection):
+        ids = set()
+        total = collection.count()
+        for offset in range(0, total, WRITE_BATCH):
+            ids.update(collection.get(limit=WRITE_BATCH, offset=offset, include=[])["ids"])
+        return ids
+
+    def sync_role(self, role: str, data_dir=DATA_DIR):
+        """폴더 내용과 컬렉션을 맞춤 → {"chunks", "added", "deleted"} (바뀐 청크만 임베딩)"""
+        collection = self.collection(role)
+        chunks = {_id: (text, meta) for _id, text, meta in iter_role_chunks(role, data_dir)}
+        existing = self.existing_ids(collection)
+
+        stale = list(existing - chunks.keys())
+        for start in range(0, len(stale), WRITE_BATCH):
+            collection.delete(ids=stale[start : start + WRITE_BATCH])
+
+        missing = [_id for _id in chunks if _id not in existing]
+        for start in range(0, len(missing), WRITE_BATCH):
+            ids = missing[start : start + WRITE_BATCH]
+            texts = [chunks[_id][0] for _id in ids]
+            collection.add(
+                ids=ids,
+                documents=texts,
+                embeddings=self.embeddings.embed_documents(texts),
+                metadatas=[chunks[_id][1] for _id in ids],
+            )
+        return {"chunks": len(chunks), "added": len(missing), "deleted": len(stale)}
+
+    def search(self, query: str, permission: str, k: int = TOP_K):
+        """
+        permission 범위 컬렉션만 검색 → [(청크 텍스트, 메타데이터, 거리)] (거리 오름차순 상위 k개)
+        - 알 수 없는 permission(예: "none")이면 빈 리스트
+        - 쿼리 임베딩은 한 번만 계산해 권한 컬렉션들에 공유
+        """
+        roles = PERMISSION_ROLES.get(permission, [])
+        if not roles:
+            return []
+        vector = self.embeddings.embed_query(query)
+        hits = []
+        for role in roles:
+            collection = self.collection(role)
+            if collection.count() == 0:
+                continue
+            res = collection.query(
+                query_embeddings=[vector],
+                n_results=min(k, collection.count()),
+                include=["documents", "metadatas", "distances"],
+            )
+            hits.extend(zip(res["documents"][0], res["metadatas"][0], res["distances"][0]))
+        return sorted(hits, key=lambda hit: hit[2])[:k]
+
+
+def build(data_dir=DATA_DIR, db_dir=DB_DIR, roles=None, embeddings=None):
+    index = RoleIndex(db_dir, embeddings)
+    for role in roles or ROLE_DIRS:
+        if not Path(data_dir, ROLE_DIRS[role]).is_dir():
+            print(f"⚠️ {role}: 폴더 없음 ({Path(data_dir, ROLE_DIRS[role])})")
+            continue
+        stats = index.sync_role(role, data_dir)
+        print(
+            f"[{role}] {collection_name(role)}: 청크 {stats['chunks']}개 "
+            f"(추가 {stats['added']}, 삭제 {stats['deleted']}, 유지 {stats['chunks'] - stats['added']})"
+        )
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="사내 문서 권한별 분리 벡터 인덱스 빌드 / 검색")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="부서별 문서 폴더 루트 (COMPANY_DATA2)")
+    parser.add_argument("--db-dir", default=DB_DIR)
+    parser.add_argument("--roles", nargs="+", choices=list(ROLE_DIRS), default=None, help="빌드할 권한 (기본: 전체)")
+    parser.add_argument("--query", default=None, help="빌드 후 권한 범위 검색 확인")
+    parser.add_argument("--permission", default="cto", choices=list(PERMISSION_ROLES))
+    parser.add_argument("-k", type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    index = build(args.data_dir, args.db_dir, args.roles)
+    if args.query:
+        for i, (text, meta, distance) in enumerate(index.search(args.query, args.permission, args.k), start=1):
+            print(f"Result {i}: ({meta['role']}/{meta['sourcefile']}, distance {distance:.4f})")
+            print(text)
+            print("=" * 50)
@@ -0,0 +1,318 @@
+"""
+사전 토큰화 SFT 데이터셋(prepare_sft_dataset.py) → 고정 길이 시퀀스 패킹 + 패딩 효율 리포트
+- 여러 대화를 PACK_LENGTH 토큰 안에 best-fit decreasing으로 채워 넣음 (짧은 formal/informal 샘플의 남는 컨텍스트 활용)
+- 팩마다 대화 경계(seq_lens)를 저장 → collate 시 대화마다 0부터 다시 시작하는 position_ids 생성
+  - flash_attention_2: 배치 전체를 한 행으로 이어붙이고 attention_mask를 넘기지 않음 (DataCollatorWithFlattening과 같은 방식)
+    → position_ids 리셋으로 varlen 경계를 잡아 대화끼리 attention 없음
+    (2D attention_mask를 같이 넘기면 마스크로 unpad하고 position_ids는 무시되어 팩 안 대화끼리 서로 봄)
+  - sdpa / eager: block_mask=True면 대화별 causal 블록 대각 4D 마스크 생성
+- 각 대화 첫 토큰 label은 IGNORE_INDEX (앞 대화 마지막 토큰으로 다음 대화를 예측하지 않게)
+- 패킹을 못 쓰는 환경용 LengthGroupedBatchSampler (비슷한 길이끼리 배치)
+- --report: 랜덤 배치 / 길이별 배치 / 패킹의 패딩 효율과 에포크당 스텝 수 비교 (CPU, 토큰 배열만 사용)
+
+사용:
+  python pack_sft_dataset.py --report                    # sft_dataset/* 전체, 리포트만
+  python pack_sft_dataset.py sft_dataset/qwen3_company_train_dataset_informal --pack-length 8192
+
+학습 (노트북):
+  train_dataset = load_sft_dataset("sft_dataset/qwen3_company_train_dataset_informal_packed8192")
+  collate_fn = make_packed_collate_fn(tokenizer.pad_token_id)  # 모델은 attn_implementation="flash_attention_2" (배치를 한 행으로 이어붙임)
+  (flash attention이 없으면 block_mask=True, 패킹 없이 쓰려면 DataLoader(batch_sampler=LengthGroupedBatchSampler(...))
+   또는 SFTConfig(group_by_length=True, length_column_name="length"))
+"""
+import json
+import bisect
+import random
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+from prepare_sft_dataset import DATA_FILE, META_FILE, IGNORE_INDEX, MAX_LENGTH, OUT_DIR, list_array
+
+# =========================
+# 설정
+# =========================
+PACK_LENGTH = MAX_LENGTH  # 팩 하나의 토큰 수 상한
+BATCH_SIZE = 2  # 노트북 per_device_train_batch_size
+MEGABATCH_MULT = 50  # 길이별 배치: 배치 x 이 배수 단위로 섞은 뒤 그 안에서 길이순 정렬
+PACKED_SUFFIX = "_packed"
+SEED = 42
+
+PACKED_SCHEMA = pa.schema(
+    [
+        ("input_ids", pa.list_(pa.int32())),
+        ("labels", pa.list_(pa.int32())),
+        ("seq_lens", pa.list_(pa.int32())),  # 팩 안 대화별 토큰 수 (합 = length)
+        ("length", pa.int32()),
+        ("num_labels", pa.int32()),
+    ]
+)
+
+
+# =========================
+# 읽기
+# =========================
+def read_token_table(path):
+    """prepare_sft_dataset.py 결과 (폴더 또는 data.arrow) → pyarrow Table (memory-map)"""
+    path = Path(path)
+    path = path / DATA_FILE if path.is_dir() else path
+    return pa.ipc.open_stream(pa.memory_map(str(path), "r")).read_all()
+
+
+def list_column_arrays(column):
+    """list<int32> 컬럼 → (이어 붙인 값 ndarray, offsets ndarray) (행마다 파이썬 리스트로 바꾸지 않음)"""
+    column = column.combine_chunks()
+    offsets = column.offsets.to_numpy()
+    values = column.values.to_numpy(zero_copy_only=False)
+    return values, offsets
+
+
+# =========================
+# 패킹
+# =========================
+def pack_lengths(lengths, pack_length: int = PACK_LENGTH):
+    """
+    길이 목록 → 팩 목록 [[행 번호, ...]] (best-fit decreasing)
+    - 긴 대화부터, 남은 공간이 가장 작으면서 들어가는 팩에 넣음 (없으면 새 팩)
+    - pack_length보다 긴 대화는 혼자 한 팩 (prepare 단계 max_length와 같으면 생기지 않음)
+    """
+    order = sorted(range(len(lengths)), key=lambda i: (-lengths[i], i))
+    packs = []
+    free = []  # (남은 공간, 팩 번호) 오름차순
+    for i in order:
+        n = int(lengths[i])
+        pos = bisect.bisect_left(free, (n, -1))
+        if pos < len(free):
+            space, pack_id = free.pop(pos)
+        else:
+            space, pack_id = pack_length, len(packs)
+            packs.append([])
+        packs[pack_id].append(i)
+        space -= n
+        if space > 0:
+            bisect.insort(free, (space, pack_id))
+    return packs
+
+
+def build_packs(table: pa.Table, packs):
+    """팩 목록 → PACKED_SCHEMA RecordBatch (대화 첫 토큰 label은 IGNORE_INDEX)"""
+    ids_values, offsets = list_column_arrays(table.column("input_ids"))
+    label_values, _ = list_column_arrays(table.column("labels"))
+
+    input_ids, labels, seq_lens = [], [], []
+    for pack in packs:
+        spans = [(offsets[i], offsets[i + 1]) for i in pack]
+        input_ids.append(np.concatenate([ids_values[s:e] for s, e in spans]).astype(np.int32))
+        pack_labels = np.concatenate([label_values[s:e] for s, e in spans]).astype(np.int32)
+        lens = np.asarray([e - s for s, e in spans], dtype=np.int32)
+        starts = np.concatenate([[0], np.cumsum(lens)[:-1]])
+        pack_labels[starts] = IGNORE_INDEX
+        labels.append(pack_labels)
+        seq_lens.append(lens)
+
+    return pa.RecordBatch.from_arrays(
+        [
+            list_array(input_ids),
+            list_array(labels),
+            list_array(seq_lens),
+            pa.array([len(ids) for ids in input_ids], type=pa.int32()),
+            pa.array([int((lab != IGNORE_INDEX).sum()) for lab in labels], type=pa.int32()),
+        ],
+        schema=PACKED_SCHEMA,
+    )
+
+
+def pack_dataset(src, pack_length: int = PACK_LENGTH, out_dir=None):
+    """사전 토큰화 데이터셋 하나 → <이름>_packed<길이>/data.arrow + meta.json"""
+    src = Path(src)
+    table = read_token_table(src)
+    lengths = table.column("length").to_numpy()
+    packs = pack_lengths(lengths, pack_length)
+    batch = build_packs(table, packs)
+
+    dest = Path(out_dir or src.parent) / f"{src.name}{PACKED_SUFFIX}{pack_length}"
+    dest.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest / f".{DATA_FILE}.tmp"
+    with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_stream(sink, PACKED_SCHEMA) as writer:
+        writer.write_batch(batch)
+    tmp_path.replace(dest / DATA_FILE)
+
+    meta = {
+        "source": src.name,
+        "pack_length": pack_length,
+        "conversations": len(lengths),
+        "packs": len(packs),
+        "tokens": int(lengths.sum()),
+        "fill": round(float(lengths.sum()) / (len(packs) * pack_length), 4),
+    }
+    with open(dest / META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    print(
+        f"[OK] {src.name}: 대화 {meta['conversations']}개 → 팩 {meta['packs']}개 "
+        f"(채움률 {meta['fill']:.1%}) → {dest / DATA_FILE}"
+    )
+    return meta
+
+
+# =========================
+# 학습용 collate / sampler
+# =========================
+def segment_position_ids(seq_lens, total: int) -> np.ndarray:
+    """대화마다 0부터 다시 시작하는 position_ids (패딩 구간도 0부터)"""
+    lens = list(seq_lens)
+    pad = total - sum(lens)
+    if pad > 0:
+        lens.append(pad)
+    lens = np.asarray(lens, dtype=np.int64)
+    starts = np.repeat(np.cumsum(lens) - lens, lens)
+    return np.arange(total) - starts
+
+
+def make_packed_collate_fn(pad_token_id: int, block_mask: bool = False):
+    """
+    팩 행 → 텐서 배치 (input_ids / labels / position_ids [/ attention_mask])
+    - block_mask=False: 배치의 팩들을 (1, 전체 토큰) 한 행으로 이어붙이고 attention_mask 없음 (flash_attention_2)
+      - 패딩 없음, 대화 경계는 position_ids 리셋으로만 전달 (마스크가 있으면 transformers가 position_ids를 안 씀)
+    - block_mask=True: 최대 길이로 패딩 + 대화별 causal 블록 대각 4D bool 마스크 (B, 1, L, L) (sdpa / eager)
+      - 패딩 구간은 자기들끼리 position 0부터 시작하는 블록, label은 IGNORE_INDEX
+    """
+    import torch
+
+    def flatten(batch):
+        input_ids = torch.cat([torch.as_tensor(example["input_ids"]) for example in batch])
+        labels = torch.cat([torch.as_tensor(example["labels"]) for example in batch])
+        position_ids = torch.cat(
+            [torch.as_tensor(segment_position_ids(example["seq_lens"], len(example["input_ids"]))) for example in batch]
+        )
+        return {"input_ids": input_ids[None], "labels": labels[None], "position_ids": position_ids[None]}
+
+    def collate_fn(batch):
+        if not block_mask:
+            return flatten(batch)
+        max_length = max(len(example["input_ids"]) for example in batch)
+        input_ids = torch.full((len(batch), max_length), pad_token_id, dtype=torch.long)
+        labels = torch.full((len(batch), max_length), IGNORE_INDEX, dtype=torch.long)
+        position_ids = torch.zeros((len(batch), max_length), dtype=torch.long)
+        masks_4d = []
+        for i, example in enumerate(batch):
+            n = len(example["input_ids"])
+            input_ids[i, :n] = torch.as_tensor(example["input_ids"])
+            labels[i, :n] = torch.as_tensor(example["labels"])
+            position_ids[i] = torch.as_tensor(segment_position_ids(example["seq_lens"], max_length))
+            segment = torch.repeat_interleave(
+                torch.arange(len(example["seq_lens"])), torch.as_tensor(example["seq_lens"])
+            )
+            # 패딩 구간은 자기들끼리 한 블록 (모두 가려진 행이 생기면 softmax가 NaN)
+            segment = torch.cat([segment, torch.full((max_length - n,), -1)])
+            same = segment[:, None] == segment[None, :]
+            masks_4d.append(same & torch.ones(max_length, max_length, dtype=torch.bool).tril())
+        attention_mask = torch.stack(masks_4d)[:, None]
+        return {"input_ids": input_ids, "labels": labels, "position_ids": position_ids, "attention_mask": attention_mask}
+
+    return collate_fn
+
+
+class LengthGroupedBatchSampler:
+    """
+    패킹을 못 쓸 때의 대안: 비슷한 길이끼리 배치 (DataLoader batch_sampler로 사용)
+    - 에포크마다 섞은 뒤 batch_size x MEGABATCH_MULT 묶음 안에서 길이순 정렬 → 배치로 자르고 배치 순서를 다시 섞음
+    - 가장 긴 배치를 맨 앞에 둬서 메모리 부족은 첫 스텝에서 드러남
+    """
+
+    def __init__(self, lengths, batch_size: int = BATCH_SIZE, megabatch_mult: int = MEGABATCH_MULT, seed: int = SEED):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.megabatch = batch_size * megabatch_mult
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def batches(self):
+        rng = random.Random(self.seed + self.epoch)
+        indices = list(range(len(self.lengths)))
+        rng.shuffle(indices)
+        batches = []
+        for start in range(0, len(indices), self.megabatch):
+            mega = sorted(indices[start : start + self.megabatch], key=lambda i: -self.lengths[i])
+            batches.extend(mega[j : j + self.batch_size] for j in range(0, len(mega), self.batch_size))
+        longest = max(range(len(batches)), key=lambda b: max(self.lengths[i] for i in batches[b]))
+        first = batches.pop(longest)
+        rng.shuffle(batches)
+        return [first] + batches
+
+    def __iter__(self):
+        return iter(self.batches())
+
+    def __len__(self):
+        return (len(self.lengths) + self.batch_size - 1) // self.batch_size
+
+
+# =========================
+# 리포트
+# =========================
+def padding_efficiency(batches, lengths):
+    """배치 목록 → (실제 토큰 / 배치별 최대 길이로 패딩한 토큰, 스텝 수)"""
+    real = sum(int(lengths[i]) for b in batches for i in b)
+    padded = sum(max(int(lengths[i]) for i in b) * len(b) for b in batches)
+    return real / max(padded, 1), len(batches)
+
+
+def padding_report(lengths, batch_size: int = BATCH_SIZE, pack_length: int = PACK_LENGTH, seed: int = SEED):
+    """랜덤 배치 / 길이별 배치 / 패킹 → {방식: (패딩 효율, 에포크당 스텝 수)}"""
+    lengths = np.asarray(lengths)
+    rng = random.Random(seed)
+    indices = list(range(len(lengths)))
+    rng.shuffle(indices)
+    random_batches = [indices[i : i + batch_size] for i in range(0, len(indices), batch_size)]
+
+    packs = pack_lengths(lengths, pack_length)
+    pack_lens = np.asarray([sum(int(lengths[i]) for i in pack) for pack in packs])
+    pack_order = list(range(len(packs)))
+    rng.shuffle(pack_order)
+    pack_batches = [pack_order[i : i + batch_size] for i in range(0, len(pack_order), batch_size)]
+
+    return {
+        "random": padding_efficiency(random_batches, lengths),
+        "length_grouped": padding_efficiency(LengthGroupedBatchSampler(lengths, batch_size, seed=seed).batches(), lengths),
+        "packed": padding_efficiency(pack_batches, pack_lens),
+    }
+
+
+def print_report(name, lengths, batch_size: int = BATCH_SIZE, pack_length: int = PACK_LENGTH):
+    lengths = np.asarray(lengths)
+    print(
+        f"[REPORT] {name}: 대화 {len(lengths)}개, 토큰 {int(lengths.sum()):,} "
+        f"(길이 p50 {int(np.percentile(lengths, 50))} / p95 {int(np.percentile(lengths, 95))} / max {int(lengths.max())}), "
+        f"batch_size={batch_size}, pack_length={pack_length}"
+    )
+    for mode, (efficiency, steps) in padding_report(lengths, batch_size, pack_length).items():
+        print(f"  {mode:15s} 패딩 효율 {efficiency:6.1%}, 에포크당 스텝 {steps}")
+
+
+def default_inputs(out_dir=OUT_DIR):
+    return sorted(
+        p for p in Path(out_dir).iterdir()
+        if (p / DATA_FILE).exists() and PACKED_SUFFIX not in p.name
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="사전 토큰화 SFT 데이터셋 패킹 + 패딩 효율 리포트")
+    parser.add_argument("inputs", nargs="*", type=Path, help=f"prepare_sft_dataset.py 결과 폴더 (기본: {OUT_DIR}/*)")
+    parser.add_argument("--pack-length", type=int, default=PACK_LENGTH)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="리포트용 배치 크기")
+    parser.add_argument("--report", action="store_true", help="패킹 파일을 만들지 않고 리포트만 출력")
+    args = parser.parse_args()
+
+    inputs = args.inputs or default_inputs()
+    if not inputs:
+        raise SystemExit(f"입력 데이터셋이 없습니다: 먼저 prepare_sft_dataset.py 실행 ({OUT_DIR})")
+    for src in inputs:
+        lengths = read_token_table(src).column("length").to_numpy()
+        print_report(src.name, lengths, args.batch_size, args.pack_length)
+        if not args.report:
+            pack_dataset(src, args.pack_length)
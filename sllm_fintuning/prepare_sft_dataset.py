@@ -0,0 +1,297 @@
+"""
+sLLM 파인튜닝 데이터 사전 토큰화 → Arrow 데이터셋
+- qwen3_company_train_dataset_*.json(대화 messages 리스트)을 chat template 적용 + 토큰화를 파일당 한 번만 수행
+- assistant 응답(<|im_start|>assistant 뒤 ~ <|im_end|> 포함)만 학습하는 labels를 토큰 배열 연산으로 계산
+  (노트북 collate_fn의 while 루프와 같은 결과, 매 에포크 / 매 배치 재계산 없음)
+- 결과: sft_dataset/<입력 파일명>/data.arrow (input_ids, labels 컬럼, HF datasets와 같은 Arrow IPC stream 형식)
+  → 학습 시 load_sft_dataset()으로 memory-map, make_collate_fn()은 패딩 / 텐서 변환만 수행
+- 입력 파일 / 토크나이저 / chat template / max_length가 같으면 다시 만들지 않음 (meta.json)
+
+사용 (CPU, 토크나이저만 로드):
+  python prepare_sft_dataset.py                       # ../sllm_company_data/training_data/qwen3_company_train_dataset_*.json
+  python prepare_sft_dataset.py a.json b.json --check 50   # 노트북 루프 방식과 labels 비교
+"""
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+from numpy.lib.stride_tricks import sliding_window_view
+
+# =========================
+# 설정
+# =========================
+DATA_DIR = "../sllm_company_data/training_data"
+INPUT_GLOB = "qwen3_company_train_dataset_*.json"
+OUT_DIR = "./sft_dataset"
+MODEL_ID = "Qwen/Qwen3-8B"
+MAX_LENGTH = 8192  # 노트북 collate_fn의 truncation max_length
+IGNORE_INDEX = -100  # loss에서 제외할 label
+IM_START, IM_END, ASSISTANT = "<|im_start|>", "<|im_end|>", "assistant"
+TOKENIZE_BATCH = 256  # 한 번에 토큰화 / 기록할 대화 수
+DATA_FILE = "data.arrow"
+META_FILE = "meta.json"
+
+SCHEMA = pa.schema(
+    [
+        ("input_ids", pa.list_(pa.int32())),
+        ("labels", pa.list_(pa.int32())),  # assistant 응답 외에는 IGNORE_INDEX
+        ("length", pa.int32()),  # 토큰 수 (패킹 / 길이별 묶음용)
+        ("num_labels", pa.int32()),  # 학습 대상 토큰 수
+        ("truncated", pa.bool_()),  # MAX_LENGTH에서 잘렸는지
+    ]
+)
+
+
+# =========================
+# labels 마스크
+# =========================
+def find_pattern(ids: np.ndarray, pattern) -> np.ndarray:
+    """토큰 배열에서 pattern(토큰 id 목록)이 시작하는 위치들"""
+    pattern = np.asarray(pattern, dtype=ids.dtype)
+    if len(pattern) == 0 or len(ids) < len(pattern):
+        return np.empty(0, dtype=np.int64)
+    if len(pattern) == 1:
+        return np.flatnonzero(ids == pattern[0])
+    return np.flatnonzero((sliding_window_view(ids, len(pattern)) == pattern).all(axis=1))
+
+
+def assistant_label_mask(ids: np.ndarray, start_tokens, end_tokens) -> np.ndarray:
+    """
+    학습 대상 위치 bool 마스크
+    - 구간: start_tokens(<|im_start|>assistant) 바로 뒤 ~ 그 뒤 첫 end_tokens(<|im_end|>)까지 (end 포함)
+    - end가 없으면(MAX_LENGTH에서 잘림) 끝까지
+    - 구간 시작 / 끝에 +1 / -1을 찍고 누적합 > 0인 위치 (루프 없이 계산)
+    """
+    n = len(ids)
+    starts = find_pattern(ids, start_tokens) + len(start_tokens)
+    if len(starts) == 0:
+        return np.zeros(n, dtype=bool)
+    ends = find_pattern(ids, end_tokens)
+    nxt = np.searchsorted(ends, starts)  # 각 구간 시작 이후 첫 end
+    stops = np.full(len(starts), n, dtype=np.int64)
+    found = nxt < len(ends)
+    stops[found] = ends[nxt[found]] + len(end_tokens)
+
+    delta = np.zeros(n + 1, dtype=np.int32)
+    np.add.at(delta, starts, 1)
+    np.add.at(delta, stops, -1)
+    return np.cumsum(delta[:n]) > 0
+
+
+def loop_labels(input_ids, im_start_tokens, assistant_tokens, im_end_tokens):
+    """노트북 collate_fn의 labels 계산 (while 루프 그대로, --check 비교용)"""
+    labels = [IGNORE_INDEX] * len(input_ids)
+    i = 0
+    while i < len(input_ids):
+        if input_ids[i : i + len(im_start_tokens)] == im_start_tokens:
+            assistant_pos = i + len(im_start_tokens)
+            if input_ids[assistant_pos : assistant_pos + len(assistant_tokens)] == assistant_tokens:
+                current_pos = assistant_pos + len(assistant_tokens)
+                while current_pos < len(input_ids):
+                    if input_ids[current_pos : current_pos + len(im_end_tokens)] == im_end_tokens:
+                        for j in range(len(im_end_tokens)):
+                            labels[current_pos + j] = input_ids[current_pos + j]
+                        break
+                    labels[current_pos] = input_ids[current_pos]
+                    current_pos += 1
+                i = current_pos
+        i += 1
+    return labels
+
+
+# =========================
+# 토큰화
+# =========================
+class SFTTokenizer:
+    """chat template 적용 + 토큰화 + labels 계산 (토크나이저만 사용, GPU / 모델 불필요)"""
+
+    def __init__(self, model_id=MODEL_ID, max_length: int = MAX_LENGTH):
+        from transformers import AutoTokenizer
+
+        self.model_id = model_id
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
+        self.im_start, self.im_end, self.assistant = (
+            self.tokenizer.encode(s, add_special_tokens=False) for s in (IM_START, IM_END, ASSISTANT)
+        )
+        self.start_tokens = self.im_start + self.assistant
+
+    def fingerprint(self) -> dict:
+        """결과를 바꾸는 설정 (meta.json 비교용)"""
+        template = self.tokenizer.chat_template or ""
+        return {
+            "model_id": self.model_id,
+            "chat_template_sha1": hashlib.sha1(template.encode("utf-8")).hexdigest(),
+            "vocab_size": len(self.tokenizer),
+            "max_length": self.max_length,
+        }
+
+    def render(self, messages) -> str:
+        # 노트북과 같이 role / content만 남기고 템플릿 적용
+        clean = [{"role": m["role"], "content": m["content"]} for m in messages]
+        return self.tokenizer.apply_chat_template(clean, tokenize=False, add_generation_prompt=False).strip()
+
+    def encode_batch(self, conversations):
+        """대화 목록 → 행 목록 (input_ids / labels / length / num_labels / truncated)"""
+        texts = [self.render(conv["messages"]) for conv in conversations]
+        encoded = self.tokenizer(texts, add_special_tokens=True, padding=False)["input_ids"]
+        rows = []
+        for ids in encoded:
+            truncated = len(ids) > self.max_length
+            ids = np.asarray(ids[: self.max_length], dtype=np.int32)
+            mask = assistant_label_mask(ids, self.start_tokens, self.im_end)
+            labels = np.where(mask, ids, IGNORE_INDEX).astype(np.int32)
+            rows.append(
+                {
+                    "input_ids": ids,
+                    "labels": labels,
+                    "length": len(ids),
+                    "num_labels": int(mask.sum()),
+                    "truncated": truncated,
+                }
+            )
+        return rows
+
+
+# =========================
+# 쓰기 / 읽기
+# =========================
+def file_sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def list_array(arrays) -> pa.ListArray:
+    """int32 배열 목록 → list<int32> 컬럼 (offsets + 이어 붙인 값, 행마다 변환하지 않음)"""
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int32)
+    np.cumsum([len(a) for a in arrays], out=offsets[1:])
+    values = np.concatenate(arrays) if len(arrays) else np.empty(0, dtype=np.int32)
+    return pa.ListArray.from_arrays(pa.array(offsets), pa.array(values, type=pa.int32()))
+
+
+def _record_batch(rows) -> pa.RecordBatch:
+    return pa.RecordBatch.from_arrays(
+        [
+            list_array([r["input_ids"] for r in rows]),
+            list_array([r["labels"] for r in rows]),
+            pa.array([r["length"] for r in rows], type=pa.int32()),
+            pa.array([r["num_labels"] for r in rows], type=pa.int32()),
+            pa.array([r["truncated"] for r in rows], type=pa.bool_()),
+        ],
+        schema=SCHEMA,
+    )
+
+
+def prepare_file(sft: SFTTokenizer, src: Path, out_dir=OUT_DIR, force: bool = False):
+    """
+    JSON 파일 하나 → out_dir/<파일명>/data.arrow + meta.json
+    - 같은 입력 / 설정으로 이미 만들었으면 건너뜀 (meta 반환)
+    """
+    dest = Path(out_dir) / src.stem
+    meta_path = dest / META_FILE
+    source = {"file": src.name, "sha1": file_sha1(src)}
+    fingerprint = sft.fingerprint()
+    if not force and meta_path.exists() and (dest / DATA_FILE).exists():
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("source") == source and meta.get("tokenizer") == fingerprint:
+            print(f"[SKIP] {src.name}: 변경 없음 ({meta['rows']}개)")
+            return meta
+
+    with open(src, "r", encoding="utf-8") as f:
+        conversations = json.load(f)
+
+    dest.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest / f".{DATA_FILE}.tmp"
+    totals = {"rows": 0, "tokens": 0, "label_tokens": 0, "truncated": 0}
+    t0 = time.perf_counter()
+    with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_stream(sink, SCHEMA) as writer:
+        for start in range(0, len(conversations), TOKENIZE_BATCH):
+            rows = sft.encode_batch(conversations[start : start + TOKENIZE_BATCH])
+            writer.write_batch(_record_batch(rows))
+            totals["rows"] += len(rows)
+            totals["tokens"] += sum(r["length"] for r in rows)
+            totals["label_tokens"] += sum(r["num_labels"] for r in rows)
+            totals["truncated"] += sum(r["truncated"] for r in rows)
+    tmp_path.replace(dest / DATA_FILE)
+
+    meta = {"source": source, "tokenizer": fingerprint, **totals}
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    print(
+        f"[OK] {src.name}: {totals['rows']}개 대화, 토큰 {totals['tokens']:,} "
+        f"(학습 대상 {totals['label_tokens']:,}, {totals['label_tokens'] / max(totals['tokens'], 1):.1%}), "
+        f"잘림 {totals['truncated']}개, {time.perf_counter() - t0:.1f}s → {dest / DATA_FILE}"
+    )
+    return meta
+
+
+def load_sft_dataset(path):
+    """사전 토큰화 데이터셋 → datasets.Dataset (memory-map, 복사 없음)"""
+    from datasets import Dataset
+
+    path = Path(path)
+    return Dataset.from_file(str(path / DATA_FILE if path.is_dir() else path))
+
+
+def make_collate_fn(pad_token_id: int):
+    """사전 토큰화 행 → 패딩된 텐서 배치 (input_ids / attention_mask / labels)"""
+    import torch
+
+    def collate_fn(batch):
+        max_length = max(len(example["input_ids"]) for example in batch)
+        input_ids = torch.full((len(batch), max_length), pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(batch), max_length), dtype=torch.long)
+        labels = torch.full((len(batch), max_length), IGNORE_INDEX, dtype=torch.long)
+        for i, example in enumerate(batch):
+            n = len(example["input_ids"])
+            input_ids[i, :n] = torch.as_tensor(example["input_ids"])
+            attention_mask[i, :n] = 1
+            labels[i, :n] = torch.as_tensor(example["labels"])
+        return {"input_ids": input_ids, "attention_mask": attention_mask, "labels": labels}
+
+    return collate_fn
+
+
+def check_against_loop(sft: SFTTokenizer, src: Path, n: int) -> int:
+    """앞 n개 대화의 labels를 노트북 루프 방식과 비교 → 불일치 수"""
+    with open(src, "r", encoding="utf-8") as f:
+        conversations = json.load(f)[:n]
+    mismatches = 0
+    for conv, row in zip(conversations, sft.encode_batch(conversations)):
+        ids = row["input_ids"].tolist()
+        expected = loop_labels(ids, sft.im_start, sft.assistant, sft.im_end)
+        if expected != row["labels"].tolist():
+            mismatches += 1
+    print(f"[CHECK] {src.name}: {len(conversations)}개 중 labels 불일치 {mismatches}개")
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SFT 대화 데이터 사전 토큰화 + assistant labels 계산")
+    parser.add_argument("inputs", nargs="*", type=Path, help=f"입력 JSON (기본: {DATA_DIR}/{INPUT_GLOB})")
+    parser.add_argument("--out-dir", default=OUT_DIR)
+    parser.add_argument("--model-id", default=MODEL_ID, help="토크나이저 (허브 id 또는 로컬 경로)")
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH)
+    parser.add_argument("--force", action="store_true", help="변경이 없어도 다시 생성")
+    parser.add_argument("--check", type=int, default=0, help="파일마다 앞 N개를 노트북 루프 방식과 비교")
+    args = parser.parse_args()
+
+    inputs = args.inputs or sorted(Path(DATA_DIR).glob(INPUT_GLOB))
+    if not inputs:
+        raise SystemExit(f"입력 파일이 없습니다: {DATA_DIR}/{INPUT_GLOB}")
+    sft = SFTTokenizer(args.model_id, args.max_length)
+    failed = 0
+    for src in inputs:
+        prepare_file(sft, src, args.out_dir, args.force)
+        if args.check:
+            failed += check_against_loop(sft, src, args.check)
+    if failed:
+        raise SystemExit(1)